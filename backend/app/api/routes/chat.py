@@ -1,14 +1,26 @@
 """
 Chat API Router
 ────────────────
-POST /api/v1/chat/ask — Ask a question against indexed documents
+POST /api/v1/chat/ask   — Ask a question against indexed documents
+                          (JSON, or server-sent events when use_streaming=true)
+POST /api/v1/chat/batch — Ask many questions; answers stream back as they complete
+POST/GET/DELETE /api/v1/chat/sessions — Server-side conversation memory
 """
 
+import json
+import time
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
 
+from app.core import metrics
 from app.core.logger import logger
-from app.models.schemas import ChatRequest, ChatResponse
-from app.services.rag_pipeline import rag_pipeline
+from app.models.schemas import BatchChatRequest, ChatMessage, ChatRequest, ChatResponse, SessionResponse
+from app.services.conversation_memory import Session, conversation_memory
+from app.services.llm_provider import LLMTimeoutError, LLMUnavailableError
+from app.services.rag_pipeline import rag_pipeline, start_rerank_report
 from app.core.config import settings
 
 
@@ -23,25 +35,203 @@ async def ask_question(request: ChatRequest):
       2. Retrieve top-K similar chunks from FAISS
       3. Feed chunks + history to GPT-4
       4. Return the answer with source citations
+
+    With `use_streaming=true` the response is `text/event-stream`: a `sources`
+    event first, then one `token` event per LLM delta, then `done`.
+
+    With `session_id` the history comes from the server-side session (created
+    on first use) and the exchange is recorded there; `conversation_history`
+    then only seeds a session the server doesn't know, e.g. after a restart
+    or on another worker without SESSION_PERSIST.
+
+    With `include_timings=true` the response (or the `done` event) carries
+    `timings_ms`: how long each pipeline stage took for this request.
+
+    With RERANK_ENABLED, `rerank` reports how many chunks the cross-encoder
+    rescored and kept, what it cost and how many context tokens it saved.
     """
     if not request.question.strip():
         raise HTTPException(status_code=400, detail="Question cannot be empty.")
 
+    session = (conversation_memory.get_or_create(request.session_id, request.conversation_history)
+               if request.session_id else None)
+
+    if request.use_streaming:
+        return StreamingResponse(
+            _stream_answer(request, session),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    timings = metrics.start_trace() if request.include_timings else None
+    rerank = start_rerank_report() if settings.RERANK_ENABLED else None
     try:
-        answer, sources, tokens_used, response_time_ms = rag_pipeline.answer(
+        answer, sources, tokens_used, response_time_ms = await rag_pipeline.aanswer(
             question=request.question,
-            conversation_history=request.conversation_history,
+            conversation_history=_history(request, session),
             top_k=request.top_k,
+            hybrid_weight=request.hybrid_weight,
+            filters=request.filters,
         )
+        if session is not None:
+            conversation_memory.record(session, request.question, answer)
         return ChatResponse(
             answer=answer,
             sources=sources,
             model_used=settings.OPENAI_MODEL,
             tokens_used=tokens_used,
             response_time_ms=response_time_ms,
+            session_id=request.session_id,
+            timings_ms=timings,
+            rerank=rerank or None,
         )
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e),
+                            headers={"Retry-After": str(int(settings.LLM_CIRCUIT_RESET_SECONDS))})
+    except LLMTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Chat error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal error during RAG pipeline execution.")
+
+
+def _history(request: ChatRequest, session: Optional[Session]) -> List[ChatMessage]:
+    if session is not None:
+        return conversation_memory.history(session)
+    # System-role messages in the prompt are reserved for the server's own notes
+    return [m for m in request.conversation_history or [] if m.role != "system"]
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_answer(request: ChatRequest, session: Optional[Session] = None) -> AsyncIterator[str]:
+    """Format pipeline stream events as SSE. Errors become an `error` event."""
+    parts: List[str] = []
+    timings = metrics.start_trace() if request.include_timings else None
+    rerank = start_rerank_report() if settings.RERANK_ENABLED else None
+    try:
+        async for event, payload in rag_pipeline.astream_answer(
+            question=request.question,
+            conversation_history=_history(request, session),
+            top_k=request.top_k,
+            hybrid_weight=request.hybrid_weight,
+            filters=request.filters,
+        ):
+            if event == "sources":
+                payload = [s.model_dump() for s in payload]
+            elif event == "token":
+                parts.append(payload)
+            elif event == "done":
+                payload = {**payload, "model_used": settings.OPENAI_MODEL, "session_id": request.session_id}
+                if timings is not None:
+                    payload["timings_ms"] = timings
+                if rerank:
+                    payload["rerank"] = rerank
+                if session is not None:
+                    conversation_memory.record(session, request.question, "".join(parts))
+            yield _sse(event, payload)
+    except (ValueError, LLMUnavailableError, LLMTimeoutError) as e:
+        yield _sse("error", {"detail": str(e)})
+    except Exception as e:
+        logger.error(f"Chat stream error: {e}", exc_info=True)
+        yield _sse("error", {"detail": "Internal error during RAG pipeline execution."})
+
+
+@router.post("/batch")
+async def ask_batch(request: BatchChatRequest):
+    """
+    Answer a list of questions (evaluation jobs, report generation). Retrieval
+    for the whole batch is shared and LLM calls run concurrently.
+
+    The response is `text/event-stream`: one `answer` event per question as it
+    completes (with its `index` in the request), an `error` event for any
+    question that failed after retries, then `done`.
+    """
+    if len(request.questions) > settings.BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_MAX_QUESTIONS} questions per batch.")
+    if any(not q.strip() for q in request.questions):
+        raise HTTPException(status_code=400, detail="Questions cannot be empty.")
+
+    return StreamingResponse(
+        _stream_batch(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream_batch(request: BatchChatRequest) -> AsyncIterator[str]:
+    start = time.time()
+    answered = failed = 0
+    try:
+        async for index, result in rag_pipeline.abatch_answer(
+            questions=request.questions,
+            top_k=request.top_k,
+            hybrid_weight=request.hybrid_weight,
+            filters=request.filters,
+        ):
+            question = request.questions[index]
+            if isinstance(result, Exception):
+                failed += 1
+                known = (ValueError, LLMUnavailableError, LLMTimeoutError)
+                detail = str(result) if isinstance(result, known) else "LLM call failed after retries."
+                yield _sse("error", {"index": index, "question": question, "detail": detail})
+                continue
+            answer, sources, tokens_used, response_time_ms = result
+            answered += 1
+            yield _sse("answer", {
+                "index": index,
+                "question": question,
+                "answer": answer,
+                "sources": [s.model_dump() for s in sources],
+                "tokens_used": tokens_used,
+                "response_time_ms": response_time_ms,
+            })
+    except Exception as e:
+        logger.error(f"Batch chat error: {e}", exc_info=True)
+        yield _sse("error", {"detail": "Internal error during RAG pipeline execution."})
+    yield _sse("done", {
+        "answered": answered,
+        "failed": failed,
+        "elapsed_ms": int((time.time() - start) * 1000),
+        "model_used": settings.OPENAI_MODEL,
+    })
+
+
+@router.post("/sessions", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_session():
+    """
+    Start a server-side conversation. Pass the returned `session_id` with each
+    /chat/ask instead of resending `conversation_history`. Clients may also
+    pick their own ID (8-64 of `A-Za-z0-9_-`); an unknown ID starts empty.
+    """
+    return _session_response(conversation_memory.create())
+
+
+@router.get("/sessions/{session_id}", response_model=SessionResponse)
+async def get_session(session_id: str):
+    """The session's running summary and the turns not yet folded into it."""
+    session = conversation_memory.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found.")
+    return _session_response(session)
+
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_session(session_id: str):
+    """Forget a conversation (e.g. when the user clears the chat)."""
+    if not conversation_memory.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found.")
+
+
+def _session_response(session: Session) -> SessionResponse:
+    return SessionResponse(
+        session_id=session.session_id,
+        summary=session.summary,
+        summarized_messages=session.summarized_messages,
+        recent_messages=list(session.turns),
+        updated_at=datetime.fromtimestamp(session.updated_at),
+    )
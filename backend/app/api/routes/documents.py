@@ -1,33 +1,48 @@
 """
 Documents API Router
 ────────────────────
-POST   /api/v1/documents/upload   — Upload & index a document
-GET    /api/v1/documents          — List all indexed documents
-DELETE /api/v1/documents/{doc_id} — Remove a document from the index
+POST   /api/v1/documents/upload     — Upload & index a document
+POST   /api/v1/documents/bulk       — Upload many files / zips as a background job
+POST   /api/v1/documents/bulk/path  — Ingest a server-side directory or zip as a job
+GET    /api/v1/documents/jobs/{id}  — Poll a bulk job's progress
+GET    /api/v1/documents            — List all indexed documents
+DELETE /api/v1/documents/{doc_id}   — Remove a document from the index
 """
 
 import os
 import shutil
+import uuid
 from pathlib import Path
+from typing import List
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, status
+from fastapi import APIRouter, UploadFile, File, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 
 from app.core.config import settings
 from app.core.logger import logger
-from app.models.schemas import DocumentListResponse, DocumentMetadata, DeleteDocumentResponse
-from app.services.document_processor import DocumentProcessor
+from app.models.schemas import (
+    BulkIngestPathRequest,
+    BulkJobStatus,
+    DocumentListResponse,
+    DocumentMetadata,
+    DeleteDocumentResponse,
+    UploadResponse,
+)
+from app.services.bulk_ingestion import BulkJob, bulk_ingestion_service, collect_files
+from app.services.ingestion import ingestion_pipeline
 from app.services.vector_store import vector_store_service
 
 
 router = APIRouter()
-processor = DocumentProcessor()
 UPLOAD_DIR = Path("./data/uploads")
 
 
-@router.post("/upload", response_model=DocumentMetadata, status_code=status.HTTP_201_CREATED)
-async def upload_document(file: UploadFile = File(...)):
+@router.post("/upload", response_model=UploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_document(response: Response, file: UploadFile = File(...)):
     """
     Upload a document (PDF/TXT/MD/DOCX), chunk it, embed it, and add to FAISS index.
+    Content that is already indexed returns 200 with the existing document,
+    marked `duplicate`, and the uploaded copy is not kept.
     """
     ext = Path(file.filename).suffix.lstrip(".").lower()
     if ext not in settings.ALLOWED_EXTENSIONS:
@@ -36,29 +51,110 @@ async def upload_document(file: UploadFile = File(...)):
             detail=f"Unsupported file type: .{ext}. Allowed: {settings.ALLOWED_EXTENSIONS}"
         )
 
-    # Save to disk
+    # Save under a temporary name first: a duplicate must not replace a stored file
     UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-    filepath = UPLOAD_DIR / file.filename
+    filepath = UPLOAD_DIR / Path(file.filename).name
+    partial = UPLOAD_DIR / f".{uuid.uuid4().hex}.part"
+    saved = False
 
     try:
-        with open(filepath, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+        await run_in_threadpool(_save_upload, file, partial)
+        doc_id = await ingestion_pipeline.known_doc_id(str(partial))
+        if doc_id is not None:
+            os.remove(partial)
+            existing = vector_store_service.get_document_metadata(doc_id)
+            logger.info(f"Upload '{filepath.name}' is already indexed as '{existing['filename']}' (doc_id={doc_id})")
+            response.status_code = status.HTTP_200_OK
+            return UploadResponse(**existing, duplicate=True)
+
+        os.replace(partial, filepath)
+        saved = True
         logger.info(f"Saved upload: {filepath}")
 
-        # Process → chunk → embed → index
-        chunks, metadata = processor.process_file(str(filepath))
-        await vector_store_service.add_documents(chunks, metadata)
+        # Process → chunk (process pool) → embed (batched threads) → index
+        metadata = await ingestion_pipeline.ingest_file(str(filepath))
 
-        return DocumentMetadata(**metadata)
+        return UploadResponse(**metadata)
 
     except Exception as e:
         # Cleanup on failure
-        if filepath.exists():
-            os.remove(filepath)
+        for path in (partial, filepath if saved else None):
+            if path is not None and path.exists():
+                os.remove(path)
         logger.error(f"Upload failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _save_upload(file: UploadFile, filepath: Path):
+    with open(filepath, "wb") as f:
+        shutil.copyfileobj(file.file, f)
+
+
+@router.post("/bulk", response_model=BulkJobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def bulk_upload(files: List[UploadFile] = File(...)):
+    """
+    Upload many documents (and/or .zip archives of documents) in one request.
+    Indexing runs as a background job; poll GET /documents/jobs/{job_id}.
+    """
+    job_id = bulk_ingestion_service.new_job_id()
+    job_dir = UPLOAD_DIR / job_id
+    job_dir.mkdir(parents=True, exist_ok=True)
+
+    filepaths: List[Path] = []
+    for upload in files:
+        filepath = job_dir / Path(upload.filename).name
+        await run_in_threadpool(_save_upload, upload, filepath)
+        filepaths.extend(await run_in_threadpool(collect_files, filepath, job_dir / filepath.stem))
+
+    if not filepaths:
+        raise HTTPException(status_code=400, detail=f"No supported files found. Allowed: {settings.ALLOWED_EXTENSIONS}")
+
+    return _job_status(bulk_ingestion_service.start_job(filepaths, job_id=job_id))
+
+
+@router.post("/bulk/path", response_model=BulkJobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def bulk_ingest_path(request: BulkIngestPathRequest):
+    """Ingest a directory or .zip that already lives under BULK_INGEST_ROOT on the server."""
+    root = Path(settings.BULK_INGEST_ROOT).resolve()
+    target = (root / request.path).resolve()
+    if not target.is_relative_to(root) or not target.exists():
+        raise HTTPException(status_code=400, detail=f"Path must exist under {settings.BULK_INGEST_ROOT}")
+
+    job_id = bulk_ingestion_service.new_job_id()
+    filepaths = await run_in_threadpool(collect_files, target, UPLOAD_DIR / job_id)
+    if not filepaths:
+        raise HTTPException(status_code=400, detail=f"No supported files found. Allowed: {settings.ALLOWED_EXTENSIONS}")
+
+    return _job_status(bulk_ingestion_service.start_job(filepaths, job_id=job_id))
+
+
+@router.get("/jobs/{job_id}", response_model=BulkJobStatus)
+async def get_bulk_job(job_id: str):
+    """Progress of a bulk ingestion job."""
+    job = bulk_ingestion_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return _job_status(job)
+
+
+def _job_status(job: BulkJob) -> BulkJobStatus:
+    return BulkJobStatus(
+        job_id=job.job_id,
+        status=job.status,
+        total_files=job.total_files,
+        processed_files=job.processed_files,
+        failed_files=job.failed_files,
+        skipped_files=job.skipped_files,
+        total_chunks=job.total_chunks,
+        doc_ids=job.doc_ids,
+        errors=job.errors[-20:],
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        elapsed_seconds=round(job.elapsed_seconds, 3),
+        files_per_second=round(job.processed_files / job.elapsed_seconds, 2) if job.elapsed_seconds else None,
+    )
+
+
 @router.get("", response_model=DocumentListResponse)
 async def list_documents():
     """Return list of all indexed documents with their metadata."""
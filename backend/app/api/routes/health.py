@@ -1,8 +1,13 @@
 """Health check endpoint."""
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from app.models.schemas import HealthResponse
 from app.services.vector_store import vector_store_service
+from app.services.answer_cache import answer_cache
+from app.services.semantic_cache import semantic_cache
+from app.services.embedding_cache import embedding_cache
+from app.services.llm_provider import llm_provider
 from app.core.config import settings
 
 router = APIRouter()
@@ -12,9 +17,29 @@ async def health_check():
     return HealthResponse(
         status="healthy",
         version="1.0.0",
+        ready=vector_store_service.is_started,
+        startup_state=vector_store_service.startup_state,
         vector_store_ready=vector_store_service.is_ready,
         num_indexed_documents=vector_store_service.num_documents,
         num_total_chunks=vector_store_service.total_chunks,
         embedding_model=settings.EMBEDDING_MODEL,
+        embedding_backend=settings.EMBEDDING_BACKEND,
         llm_model=settings.OPENAI_MODEL,
+        cache_stats={
+            "answer": answer_cache.snapshot(),
+            "semantic": semantic_cache.snapshot(),
+            "query_embedding": vector_store_service.query_embedder.snapshot(),
+            "chunk_embedding": embedding_cache.snapshot(),
+        },
+        llm_stats=llm_provider.snapshot(),
+    )
+
+
+@router.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the persisted index is restored and the embedding model is warm."""
+    state = vector_store_service.startup_state
+    return JSONResponse(
+        status_code=200 if state == "ready" else 503,
+        content={"ready": state == "ready", "startup_state": state},
     )
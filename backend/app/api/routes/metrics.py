@@ -0,0 +1,63 @@
+"""Prometheus metrics endpoint."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import registry
+from app.services.answer_cache import answer_cache
+from app.services.conversation_memory import conversation_memory
+from app.services.embedding_cache import embedding_cache
+from app.services.llm_provider import llm_provider
+from app.services.reranker import reranker
+from app.services.semantic_cache import semantic_cache
+from app.services.vector_store import vector_store_service
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_CACHES = {
+    "answer": answer_cache,
+    "semantic": semantic_cache,
+    "query_embedding": vector_store_service.query_embedder,
+    "chunk_embedding": embedding_cache,
+    "rerank_score": reranker,
+}
+
+
+def _cache_counts(field: str):
+    return lambda: {(name,): cache.snapshot()[field] for name, cache in _CACHES.items()}
+
+
+def _llm_counts():
+    stats = llm_provider.stats
+    return {
+        ("calls",): stats.calls,
+        ("failures",): stats.failures,
+        ("retries",): stats.retries,
+        ("timeouts",): stats.timeouts,
+        ("short_circuited",): stats.short_circuited,
+        ("hedges",): stats.hedges,
+    }
+
+
+# Counted by the services themselves; read at scrape time
+registry.collect("rag_cache_hits_total", "Cache hits by cache.", "counter", _cache_counts("hits"), ("cache",))
+registry.collect("rag_cache_misses_total", "Cache misses by cache.", "counter", _cache_counts("misses"), ("cache",))
+registry.collect("rag_llm_events_total", "LLM provider calls, failures, retries, timeouts, hedges.", "counter",
+                 _llm_counts, ("event",))
+registry.collect("rag_llm_circuit_open", "1 while the LLM circuit breaker is open.", "gauge",
+                 lambda: float(llm_provider.snapshot()["circuit"] != "closed"))
+registry.collect("rag_index_vectors", "Chunks (vectors) in the index.", "gauge",
+                 lambda: vector_store_service.total_chunks)
+registry.collect("rag_index_documents", "Documents in the index.", "gauge",
+                 lambda: vector_store_service.num_documents)
+registry.collect("rag_sessions_active", "Chat sessions held in memory.", "gauge",
+                 lambda: len(conversation_memory))
+registry.collect("rag_ready", "1 once the index is restored and the embedding model is warm.", "gauge",
+                 lambda: float(vector_store_service.is_started))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
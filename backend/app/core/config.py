@@ -4,7 +4,7 @@ Loads from environment variables / .env file
 """
 
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal
 import os
 
 
@@ -15,12 +15,82 @@ class Settings(BaseSettings):
     OPENAI_MAX_TOKENS: int = 1024
     OPENAI_TEMPERATURE: float = 0.2
 
+    # ── LLM Provider (pooling, timeouts, retries, breaker, hedging) ─────────
+    LLM_PROVIDER: Literal["openai", "fake"] = "openai"   # fake = local seeded model, no API key
+    LLM_MAX_CONNECTIONS: int = 100                # shared HTTP pool per worker
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_TIMEOUT_SECONDS: float = 60.0             # per attempt; per chunk when streaming
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BACKOFF_SECONDS: float = 0.5        # doubles per retry, with jitter
+    LLM_CIRCUIT_FAILURES: int = 5                 # consecutive failures that open the circuit (0 = off)
+    LLM_CIRCUIT_RESET_SECONDS: float = 30.0
+    LLM_HEDGE_AFTER_MS: float = 0                 # send a second request if none answered by then (0 = off)
+    LLM_FAKE_LATENCY_MS: float = 800.0            # fake provider: median latency
+    LLM_FAKE_LATENCY_SIGMA: float = 0.5           # log-normal spread (tail)
+    LLM_FAKE_TOKEN_MS: float = 10.0
+    LLM_FAKE_ERROR_RATE: float = 0.0
+    LLM_FAKE_SEED: int = 0
+
     # ── Embeddings ───────────────────────────────────────────────────────────
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"   # HuggingFace Sentence Transformer
+    EMBEDDING_BACKEND: Literal["torch", "onnx"] = "torch"   # onnx: exported model on ONNX Runtime, no torch at serve time
+    EMBEDDING_ONNX_DIR: str = "./data/onnx"       # exported models, one folder per EMBEDDING_MODEL
+    EMBEDDING_ONNX_INT8: bool = True              # dynamic int8 quantization of the exported weights
+    EMBEDDING_THREADS: int = 0                    # intra-op threads per encode call (0 = runtime default)
+    EMBEDDING_BATCH_SIZE: int = 32                # texts per forward pass
+
+    # ── Persistent Embedding Cache (chunk text hash + model → vector) ──────
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_MB: int = 512
+
+    # ── Query Embedding (LRU cache + micro-batching) ───────────────────────
+    QUERY_EMBEDDING_CACHE_SIZE: int = 2048
+    QUERY_BATCH_MAX_SIZE: int = 32
+    QUERY_BATCH_WAIT_MS: float = 3.0              # 0 disables micro-batching
 
     # ── FAISS / Vector Store ─────────────────────────────────────────────────
     FAISS_INDEX_PATH: str = "./data/faiss_index"
     TOP_K: int = 5                                # Number of similar chunks to retrieve
+    INDEX_WAL_MAX_MB: int = 64                    # compact WAL into a new snapshot past this size
+    INDEX_MMAP: bool = True                       # memory-map snapshot vectors (shared across workers)
+    INDEX_DELTA_MAX_VECTORS: int = 20000          # merge newly added vectors into the base past this
+    INDEX_SHARDS: int = 1                         # split the base index into this many shards, searched in parallel
+    INDEX_SHARD_BY: Literal["round_robin", "doc"] = "round_robin"   # vector ID mod N, or a hash of the doc_id
+
+    # ── ANN Index (approximate search for large corpora) ────────────────────
+    FAISS_INDEX_TYPE: Literal["flat", "ivf", "hnsw", "ivfpq"] = "flat"
+    FAISS_ANN_MIN_VECTORS: int = 20000            # stay exact (flat) below this many chunks
+    FAISS_RETRAIN_GROWTH: float = 2.0             # retrain IVF once the corpus grows this much
+    FAISS_IVF_NLIST: int = 0                      # 0 = auto (≈4·√N)
+    FAISS_IVF_NPROBE: int = 16
+    FAISS_HNSW_M: int = 32
+    FAISS_HNSW_EF_CONSTRUCTION: int = 80
+    FAISS_HNSW_EF_SEARCH: int = 64
+    FAISS_PQ_M: int = 48                          # bytes per vector (at 8 bits); must divide the embedding dim
+    FAISS_PQ_NBITS: int = 8
+    FILTER_EXACT_MAX_VECTORS: int = 20000         # filtered search scans the matching vectors exactly up to this many
+
+    # ── Hybrid Retrieval (BM25 + dense, reciprocal rank fusion) ───────────
+    HYBRID_ENABLED: bool = True                   # maintain the in-process BM25 index
+    HYBRID_WEIGHT: float = 0.5                    # lexical share of the fusion (0 = dense only, 0.5 = plain RRF, 1 = BM25 only)
+    HYBRID_RRF_K: int = 60
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+
+    # ── Reranking (cross-encoder second stage, optional) ───────────────────
+    RERANK_ENABLED: bool = False
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20                   # chunks retrieved and rescored per question
+    RERANK_TOP_N: int = 4                         # best chunks kept for the prompt (at most the request's top_k)
+    RERANK_BATCH_SIZE: int = 32                   # (question, chunk) pairs per forward pass
+    RERANK_MAX_LENGTH: int = 256                  # tokens per pair when scoring; the prompt still gets the whole chunk
+    RERANK_CACHE_SIZE: int = 10000                # (question, chunk) scores kept in memory
+
+    # ── Prompt Budget (tiktoken) ─────────────────────────────────────────────
+    PROMPT_TOKEN_BUDGET: int = 3000               # system prompt + history + question + context chunks
+    HISTORY_TOKEN_BUDGET: int = 1000              # oldest turns dropped past this
+    CONTEXT_MIN_CHUNK_TOKENS: int = 80            # shorten a chunk that doesn't fit only if this much room is left
 
     # ── Document Processing ──────────────────────────────────────────────────
     CHUNK_SIZE: int = 800
@@ -28,6 +98,47 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE_MB: int = 50
     ALLOWED_EXTENSIONS: List[str] = ["pdf", "txt", "md", "docx"]
 
+    # ── Ingestion Pipeline ───────────────────────────────────────────────────
+    INGEST_PARSE_WORKERS: int = max(1, (os.cpu_count() or 2) // 2)   # process pool
+    INGEST_EMBED_WORKERS: int = 2                 # embedding threads
+    INGEST_EMBED_BATCH_SIZE: int = 64             # chunks per encode call
+    INGEST_QUEUE_SIZE: int = 8                    # max batches waiting for an embedder
+    INGEST_STREAMING: bool = True                 # load + chunk page by page, embedding + indexing batches while parsing
+
+    # ── Bulk Ingestion Jobs ──────────────────────────────────────────────────
+    BULK_INGEST_ROOT: str = "./data/imports"      # server-side dirs / zips must live here
+    BULK_FLUSH_CHUNKS: int = 1024                 # chunks pooled across files per embed round
+    BULK_MAX_JOBS: int = 100                      # finished jobs kept for polling
+
+    # ── Answer Cache ─────────────────────────────────────────────────────────
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+
+    # ── Semantic Cache (optional, paraphrase-tolerant) ──────────────────────
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92         # min cosine similarity for a hit
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 500
+    SEMANTIC_CACHE_TTL_SECONDS: int = 3600
+
+    # ── Batch Chat (/chat/batch) ─────────────────────────────────────────────
+    BATCH_MAX_QUESTIONS: int = 500
+    BATCH_LLM_CONCURRENCY: int = 8                # LLM calls in flight per batch
+    BATCH_LLM_MAX_RETRIES: int = 3
+    BATCH_RETRY_BACKOFF_SECONDS: float = 1.0      # doubles per retry, with jitter
+
+    # ── Conversation Sessions (server-side history) ─────────────────────────
+    SESSION_MAX_SESSIONS: int = 10000             # LRU bound for sessions held in memory
+    SESSION_TTL_SECONDS: int = 7 * 24 * 3600      # idle sessions are forgotten after this
+    SESSION_RECENT_MESSAGES: int = 6              # turns kept verbatim; older ones are summarized
+    SESSION_SUMMARY_MAX_TOKENS: int = 300
+    SESSION_MAX_MESSAGES: int = 40                # hard cap on unsummarized turns if summarizing fails
+    SESSION_PERSIST: bool = False                 # write sessions through to SQLite
+    SESSION_DB_PATH: str = "./data/sessions.sqlite"
+
+    # ── Observability ───────────────────────────────────────────────────────
+    METRICS_ENABLED: bool = True                  # per-stage timings + /api/v1/metrics
+
     # ── Pinecone (Optional — for cloud-scale deployments) ───────────────────
     USE_PINECONE: bool = False
     PINECONE_API_KEY: str = ""
@@ -0,0 +1,235 @@
+"""
+Metrics
+───────
+Per-stage latency histograms, counters and gauges in Prometheus text format
+(served at /api/v1/metrics), plus an optional per-request trace of the same
+stage timings for the chat response.
+
+No client library: the hot path is one perf_counter pair, a bisect into the
+bucket bounds and a few increments under a lock (≈1 µs per stage). Values
+the services already count — cache hits, LLM retries, index size — are not
+re-counted; they are read by callbacks when /metrics is scraped.
+
+    with metrics.stage("chat", "search"):
+        ...
+
+A request that wants its timings calls `start_trace()` first; every stage
+finished in that context (including threadpool work started from it) is
+added to the returned dict, in milliseconds.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from app.core.config import settings
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_INF = 'le="+Inf"'
+
+LabelValues = Tuple[str, ...]
+Samples = Union[float, Dict[LabelValues, float]]
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *labels: str):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelValues, list] = {}   # labels → [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1       # larger values only show up in +Inf (the count)
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        bounds = [f'le="{_number(bound)}"' for bound in self.buckets]
+        for labels, values in series:
+            cumulative = 0
+            for le, count in zip(bounds, values):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, _INF)} {values[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {values[-2]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {values[-1]}")
+        return lines
+
+
+class Collected:
+    """Counter or gauge whose samples come from a callback at scrape time."""
+
+    def __init__(self, name: str, help: str, kind: str, fn: Callable[[], Samples], labels: Sequence[str] = ()):
+        self.name, self.help, self.kind, self.fn, self.label_names = name, help, kind, fn, tuple(labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        samples = self.fn()
+        if not isinstance(samples, dict):
+            samples = {(): samples}
+        for labels, value in sorted(samples.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def collect(self, name: str, help: str, kind: str, fn: Callable[[], Samples], labels: Sequence[str] = ()):
+        """Register a callback-backed `counter` or `gauge` (replaces one of the same name)."""
+        self._metrics[name] = Collected(name, help, kind, fn, labels)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "rag_stage_duration_seconds", "Time spent per pipeline stage.", ("pipeline", "stage"),
+)
+HTTP_SECONDS = registry.histogram(
+    "rag_http_request_duration_seconds", "HTTP request latency, until the last body byte.", ("method", "route"),
+)
+HTTP_REQUESTS = registry.counter(
+    "rag_http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"),
+)
+LLM_TOKENS = registry.counter(
+    "rag_llm_tokens_total", "LLM tokens by kind, as reported by the provider.", ("kind",),
+)
+
+
+# ── Stage timing + request traces ─────────────────────────────────────────────
+
+_trace: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("rag_trace", default=None)
+
+
+def start_trace() -> Dict[str, float]:
+    """Collect stage timings (ms) for the current request into the returned dict."""
+    trace: Dict[str, float] = {}
+    _trace.set(trace)
+    return trace
+
+
+@contextmanager
+def stage(pipeline: str, name: str) -> Iterator[None]:
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(pipeline, name, time.perf_counter() - start)
+
+
+def record_stage(pipeline: str, name: str, seconds: float):
+    """Add a stage timing measured elsewhere (e.g. in a worker process)."""
+    if not settings.METRICS_ENABLED:
+        return
+    STAGE_SECONDS.observe(seconds, pipeline, name)
+    trace = _trace.get()
+    if trace is not None:
+        trace[name] = round(trace.get(name, 0.0) + seconds * 1000, 2)
+
+
+def count_tokens(usage: Optional[Dict[str, int]]):
+    """Count LLM usage ({"input_tokens", "output_tokens"} as in langchain's usage_metadata)."""
+    if not usage or not settings.METRICS_ENABLED:
+        return
+    LLM_TOKENS.inc(usage.get("input_tokens", 0), "prompt")
+    LLM_TOKENS.inc(usage.get("output_tokens", 0), "completion")
+
+
+# ── HTTP middleware ───────────────────────────────────────────────────────────
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware buffering): latency + status per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_SECONDS.observe(time.perf_counter() - start, scope["method"], path)
+            HTTP_REQUESTS.inc(1, scope["method"], path, str(status))
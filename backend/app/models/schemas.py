@@ -3,7 +3,7 @@ Pydantic models for API request/response schemas.
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Annotated, Any, Dict, List, Optional
 from datetime import datetime
 
 
@@ -18,6 +18,10 @@ class DocumentMetadata(BaseModel):
     size_bytes: int
 
 
+class UploadResponse(DocumentMetadata):
+    duplicate: bool = False         # same content was already indexed; nothing new was created
+
+
 class DocumentListResponse(BaseModel):
     documents: List[DocumentMetadata]
     total: int
@@ -28,6 +32,26 @@ class DeleteDocumentResponse(BaseModel):
     doc_id: str
 
 
+class BulkIngestPathRequest(BaseModel):
+    path: str = Field(..., description="Directory or .zip under BULK_INGEST_ROOT")
+
+
+class BulkJobStatus(BaseModel):
+    job_id: str
+    status: str
+    total_files: int
+    processed_files: int
+    failed_files: int
+    skipped_files: int
+    total_chunks: int
+    doc_ids: List[str]
+    errors: List[str]
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    elapsed_seconds: float
+    files_per_second: Optional[float] = None
+
+
 # ── Chat Models ───────────────────────────────────────────────────────────────
 
 class ChatMessage(BaseModel):
@@ -43,11 +67,42 @@ class SourceChunk(BaseModel):
     relevance_score: float
 
 
+SESSION_ID_PATTERN = "^[A-Za-z0-9_-]{8,64}$"
+
+
+class RetrievalFilter(BaseModel):
+    """Restrict retrieval to matching documents (any listed value per field; all given fields must match)."""
+    doc_ids: Optional[List[str]] = None
+    filenames: Optional[List[str]] = None
+    file_types: Optional[List[str]] = None
+
+
 class ChatRequest(BaseModel):
     question: str = Field(..., min_length=1, max_length=2000)
     conversation_history: Optional[List[ChatMessage]] = []
     top_k: Optional[int] = Field(default=5, ge=1, le=20)
+    hybrid_weight: Optional[float] = Field(default=None, ge=0.0, le=1.0)   # BM25 share; None = HYBRID_WEIGHT
+    filters: Optional[RetrievalFilter] = None
     use_streaming: Optional[bool] = False
+    # Server-side history (see /chat/sessions); when set, conversation_history only seeds an unknown session
+    session_id: Optional[str] = Field(default=None, pattern=SESSION_ID_PATTERN)
+    include_timings: Optional[bool] = False   # per-stage timings_ms in the response
+
+
+class BatchChatRequest(BaseModel):
+    questions: List[Annotated[str, Field(min_length=1, max_length=2000)]] = Field(..., min_length=1)
+    top_k: Optional[int] = Field(default=5, ge=1, le=20)
+    hybrid_weight: Optional[float] = Field(default=None, ge=0.0, le=1.0)
+    filters: Optional[RetrievalFilter] = None
+
+
+class RerankReport(BaseModel):
+    candidates: int                  # chunks rescored by the cross-encoder
+    kept: int                        # best of those passed to the prompt
+    cache_hits: int                  # (question, chunk) scores served from the cache
+    rerank_ms: float
+    context_tokens: int              # context sent to the LLM
+    context_tokens_saved: int        # vs packing the top_k chunks in retrieval order
 
 
 class ChatResponse(BaseModel):
@@ -56,6 +111,17 @@ class ChatResponse(BaseModel):
     model_used: str
     tokens_used: Optional[int] = None
     response_time_ms: int
+    session_id: Optional[str] = None
+    timings_ms: Optional[Dict[str, float]] = None   # stage → ms, when include_timings was set
+    rerank: Optional[RerankReport] = None           # when RERANK_ENABLED reranked this question
+
+
+class SessionResponse(BaseModel):
+    session_id: str
+    summary: str
+    summarized_messages: int          # turns folded into the summary so far
+    recent_messages: List[ChatMessage]
+    updated_at: datetime
 
 
 # ── Health Model ─────────────────────────────────────────────────────────────
@@ -63,8 +129,13 @@ class ChatResponse(BaseModel):
 class HealthResponse(BaseModel):
     status: str
     version: str
+    ready: bool                      # startup warm-up (index restore + model load) finished
+    startup_state: str
     vector_store_ready: bool
     num_indexed_documents: int
     num_total_chunks: int
     embedding_model: str
+    embedding_backend: str
     llm_model: str
+    cache_stats: Dict[str, Dict[str, int]] = {}
+    llm_stats: Dict[str, Any] = {}   # provider, circuit state, retries, timeouts, hedges
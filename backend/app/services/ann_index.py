@@ -0,0 +1,149 @@
+"""
+ANN Index Factory
+─────────────────
+Builds the FAISS index behind the vector store from settings.FAISS_INDEX_TYPE:
+
+  flat   exact search — IndexIDMap2 over IndexFlatL2 (default)
+  ivf    IndexIVFFlat: FAISS_IVF_NLIST inverted lists, FAISS_IVF_NPROBE probed per query
+  hnsw   IndexHNSWFlat graph wrapped in IndexIDMap2
+  ivfpq  IndexIVFPQ: IVF + product-quantized codes (FAISS_PQ_M bytes per vector at 8 bits)
+
+Every type is addressed by our own int64 vector IDs and supports
+reconstruct(id). IVF indexes carry their IDs natively (hashtable direct map);
+HNSW cannot remove vectors in place, so the vector store tombstones them
+and filters them out at search time until the next rebuild.
+
+Trained indexes need data to train on, so the store stays flat until the
+corpus reaches FAISS_ANN_MIN_VECTORS (see target_kind).
+
+With INDEX_SHARDS > 1 the store keeps its base as several indexes of one
+kind (build_shards) and searches them side by side.
+"""
+
+import math
+from typing import List, Optional
+
+import faiss
+import numpy as np
+
+from app.core.config import settings
+
+# Memory-mapping flat codes needs IO_FLAG_MMAP_IFC (faiss ≥ 1.9); older wheels,
+# like the pinned faiss-cpu 1.8.0, lack it and load snapshots into RAM instead
+MMAP_FLAG: Optional[int] = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+
+
+def target_kind(num_vectors: int) -> str:
+    """Index type the store should use at this corpus size."""
+    if num_vectors < settings.FAISS_ANN_MIN_VECTORS:
+        return "flat"
+    return settings.FAISS_INDEX_TYPE
+
+
+def index_kind(index: faiss.Index) -> str:
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    if isinstance(index, faiss.IndexIDMap2) and isinstance(faiss.downcast_index(index.index), faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def supports_remove(kind: str) -> bool:
+    return kind != "hnsw"
+
+
+def can_mmap(kind: str) -> bool:
+    """Bulk of the index is flat codes, which FAISS can memory-map read-only (IO_FLAG_MMAP_IFC)."""
+    return MMAP_FLAG is not None and kind in ("flat", "hnsw")
+
+
+def is_lossy(kind: str) -> bool:
+    """reconstruct() returns an approximation (PQ codes), not the original vector."""
+    return kind == "ivfpq"
+
+
+def nlist_for(num_vectors: int) -> int:
+    if settings.FAISS_IVF_NLIST:
+        return settings.FAISS_IVF_NLIST
+    # ≈4·√N lists, but keep ≥39 training points per centroid
+    return max(1, min(int(4 * math.sqrt(num_vectors)), num_vectors // 39))
+
+
+def pq_m_for(dim: int) -> int:
+    """Largest sub-quantizer count ≤ FAISS_PQ_M that divides the dimension."""
+    m = max(1, min(settings.FAISS_PQ_M, dim))
+    while dim % m:
+        m -= 1
+    return m
+
+
+def build_index(kind: str, vectors: np.ndarray, ids: np.ndarray) -> faiss.Index:
+    """Build (and train, for IVF types) an index of `kind` holding vectors under ids."""
+    index = _empty_index(kind, vectors)
+    if len(vectors):
+        index.add_with_ids(vectors, ids)
+    return index
+
+
+def build_shards(kind: str, vectors: np.ndarray, ids: np.ndarray, owner: np.ndarray, count: int) -> List[faiss.Index]:
+    """
+    `count` indexes of `kind`, shard i holding the vectors where owner == i.
+    IVF shards share one quantizer trained on all the vectors, so each shard
+    scans ~1/count of what one index would per probed list and recall
+    matches the unsharded index.
+    """
+    template = _empty_index(kind, vectors)
+    shards = []
+    for shard in range(count):
+        index = faiss.clone_index(template)
+        configure(index)
+        rows = owner == shard
+        if rows.any():
+            index.add_with_ids(vectors[rows], ids[rows])
+        shards.append(index)
+    return shards
+
+
+def _empty_index(kind: str, vectors: np.ndarray) -> faiss.Index:
+    """An empty index of `kind`, trained on vectors when the type needs it."""
+    dim = vectors.shape[1]
+    if kind == "flat":
+        index = faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+    elif kind == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, settings.FAISS_HNSW_M)
+        hnsw.hnsw.efConstruction = settings.FAISS_HNSW_EF_CONSTRUCTION
+        index = faiss.IndexIDMap2(hnsw)
+    elif kind in ("ivf", "ivfpq"):
+        quantizer = faiss.IndexFlatL2(dim)
+        nlist = nlist_for(len(vectors))
+        if kind == "ivf":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m_for(dim), settings.FAISS_PQ_NBITS)
+        index.train(vectors)
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+    else:
+        raise ValueError(f"Unknown FAISS index type: {kind}")
+    configure(index)
+    return index
+
+
+def configure(index: faiss.Index):
+    """Apply query-time knobs (nprobe / efSearch) from settings — also after loading."""
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(settings.FAISS_IVF_NPROBE, index.nlist)
+    elif index_kind(index) == "hnsw":
+        faiss.downcast_index(index.index).hnsw.efSearch = settings.FAISS_HNSW_EF_SEARCH
+
+
+def search_params(index: faiss.Index, selector: Optional[faiss.IDSelector]) -> Optional[faiss.SearchParameters]:
+    """Per-query parameters restricting results to `selector` (tombstones hidden, or a filter), or None."""
+    if selector is None:
+        return None
+    if index_kind(index) == "hnsw":
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=settings.FAISS_HNSW_EF_SEARCH)
+    if isinstance(index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+    return faiss.SearchParameters(sel=selector)
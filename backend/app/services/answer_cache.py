@@ -0,0 +1,155 @@
+"""
+Answer Cache
+────────────
+Exact-match cache for generated answers, sitting between retrieval and the LLM.
+
+Key = hash of
+  • the normalized question (case / whitespace / trailing punctuation folded)
+  • the retrieved chunk set, as (doc_id, chunk_index) pairs
+  • the LLM settings (model, temperature, max_tokens)
+  • the conversation history window sent to the LLM
+
+Because the retrieved chunk set is part of the key, a new upload that changes
+what gets retrieved simply misses. Entries are dropped explicitly when a
+document they cite is re-indexed or deleted (see `invalidate_doc`).
+"""
+
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from langchain.schema import Document
+
+from app.core.config import settings
+from app.models.schemas import ChatMessage, SourceChunk
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    return _WHITESPACE.sub(" ", question).strip().rstrip("?!. ").lower()
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    sources: List[SourceChunk]
+    doc_ids: Set[str]
+    expires_at: float
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+class AnswerCache:
+    """
+    Bounded LRU + TTL cache. Thread-safe: the sync pipeline runs in the
+    threadpool while the async one runs on the event loop.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._by_doc: Dict[str, Set[str]] = {}   # doc_id → keys citing it
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    @staticmethod
+    def make_key(
+        question: str,
+        retrieved: List[Tuple[Document, float]],
+        history_window: List[ChatMessage],
+    ) -> str:
+        payload = {
+            "q": normalize_question(question),
+            "chunks": [(d.metadata.get("doc_id", ""), d.metadata.get("chunk_index", -1)) for d, _ in retrieved],
+            "llm": (settings.OPENAI_MODEL, settings.OPENAI_TEMPERATURE, settings.OPENAI_MAX_TOKENS),
+            "history": [(m.role, m.content) for m in history_window],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedAnswer]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            if entry.expires_at < time.monotonic():
+                self._drop(key)
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry
+
+    def put(self, key: str, answer: str, sources: List[SourceChunk]):
+        doc_ids = {s.doc_id for s in sources}
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = CachedAnswer(
+                answer=answer,
+                sources=sources,
+                doc_ids=doc_ids,
+                expires_at=time.monotonic() + self.ttl_seconds,
+            )
+            for doc_id in doc_ids:
+                self._by_doc.setdefault(doc_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.stats.evictions += 1
+
+    def invalidate_doc(self, doc_id: str) -> int:
+        """Drop every entry whose sources cite doc_id. Returns entries removed."""
+        with self._lock:
+            keys = self._by_doc.pop(doc_id, set())
+            for key in keys:
+                self._drop(key)
+            self.stats.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_doc.clear()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.stats.hits,
+                "misses": self.stats.misses,
+                "evictions": self.stats.evictions,
+                "invalidations": self.stats.invalidations,
+            }
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for doc_id in entry.doc_ids:
+            keys = self._by_doc.get(doc_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_doc[doc_id]
+
+
+# Singleton
+answer_cache = AnswerCache(
+    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+)
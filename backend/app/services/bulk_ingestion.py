@@ -0,0 +1,179 @@
+"""
+Bulk Ingestion Jobs
+───────────────────
+Background ingestion of many files at once (multi-file upload, a server-side
+directory, or a zip archive):
+
+  • Files are parsed concurrently through the ingestion pipeline's process pool
+  • Parsed chunks from many files are pooled and embedded together once
+    BULK_FLUSH_CHUNKS have accumulated
+  • The index is persisted once per job, not once per file
+  • Files whose content is already indexed (or repeated in the job) are skipped
+
+Jobs live in memory; progress is polled via GET /documents/jobs/{job_id}.
+"""
+
+import asyncio
+import time
+import uuid
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from langchain.schema import Document
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.document_processor import DocumentProcessor
+from app.services.ingestion import ingestion_pipeline
+from app.services.vector_store import vector_store_service
+
+
+@dataclass
+class BulkJob:
+    job_id: str
+    total_files: int
+    status: str = "queued"          # queued → running → completed | failed
+    processed_files: int = 0
+    failed_files: int = 0
+    skipped_files: int = 0          # content already indexed (or repeated within the job)
+    total_chunks: int = 0
+    doc_ids: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    elapsed_seconds: float = 0.0
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+def collect_files(path: Path, extract_dir: Path) -> List[Path]:
+    """
+    Expand a directory (recursively) or zip archive into ingestible files.
+    Zip members are extracted under `extract_dir`; entries escaping it are skipped.
+    """
+    if path.is_file() and path.suffix.lower() == ".zip":
+        extract_dir.mkdir(parents=True, exist_ok=True)
+        root = extract_dir.resolve()
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.infolist():
+                target = (extract_dir / member.filename).resolve()
+                if member.is_dir() or not target.is_relative_to(root):
+                    continue
+                archive.extract(member, extract_dir)
+        path = extract_dir
+
+    if path.is_file():
+        candidates = [path]
+    else:
+        candidates = sorted(p for p in path.rglob("*") if p.is_file())
+    return [p for p in candidates if p.suffix.lstrip(".").lower() in settings.ALLOWED_EXTENSIONS]
+
+
+class BulkIngestionService:
+    """
+    Creates, runs and tracks bulk ingestion jobs.
+    """
+
+    def __init__(self):
+        self._jobs: "OrderedDict[str, BulkJob]" = OrderedDict()
+
+    def start_job(self, filepaths: List[Path], job_id: Optional[str] = None) -> BulkJob:
+        job = BulkJob(job_id=job_id or self.new_job_id(), total_files=len(filepaths))
+        self._jobs[job.job_id] = job
+        self._prune()
+        job.task = asyncio.create_task(self._run(job, [str(p) for p in filepaths]))
+        logger.info(f"Bulk job {job.job_id} queued: {len(filepaths)} files")
+        return job
+
+    def get_job(self, job_id: str) -> Optional[BulkJob]:
+        return self._jobs.get(job_id)
+
+    @staticmethod
+    def new_job_id() -> str:
+        return uuid.uuid4().hex[:12]
+
+    # ─────────────────────────── Job Execution ───────────────────────────────
+
+    async def _run(self, job: BulkJob, filepaths: List[str]):
+        job.status = "running"
+        start = time.time()
+        in_flight = asyncio.Semaphore(max(1, settings.INGEST_PARSE_WORKERS * 2))
+
+        seen_doc_ids = set()
+
+        async def parse(filepath: str):
+            async with in_flight:
+                try:
+                    doc_id = await run_in_threadpool(DocumentProcessor.generate_doc_id, filepath)
+                    if doc_id in seen_doc_ids or vector_store_service.has_document(doc_id):
+                        return filepath, None, None
+                    seen_doc_ids.add(doc_id)
+                    return filepath, await ingestion_pipeline.parse(filepath), None
+                except Exception as e:
+                    return filepath, None, e
+
+        try:
+            pending: List[Tuple[List[Document], Dict]] = []
+            pending_chunks = 0
+            for next_parsed in asyncio.as_completed([parse(p) for p in filepaths]):
+                filepath, parsed, error = await next_parsed
+                if error is not None:
+                    job.failed_files += 1
+                    job.errors.append(f"{Path(filepath).name}: {error}")
+                    continue
+                if parsed is None:
+                    job.skipped_files += 1
+                    continue
+                pending.append(parsed)
+                pending_chunks += len(parsed[0])
+                if pending_chunks >= settings.BULK_FLUSH_CHUNKS:
+                    await self._flush(job, pending)
+                    pending, pending_chunks = [], 0
+                job.elapsed_seconds = time.time() - start
+
+            await self._flush(job, pending)
+            await vector_store_service.persist()
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"Bulk job {job.job_id} failed: {e}", exc_info=True)
+            job.status = "failed"
+            job.errors.append(str(e))
+        finally:
+            job.finished_at = datetime.utcnow()
+            job.elapsed_seconds = time.time() - start
+            logger.info(
+                f"  ✓ Bulk job {job.job_id} {job.status}: {job.processed_files} files, "
+                f"{job.total_chunks} chunks, {job.skipped_files} duplicates skipped, {job.failed_files} failed in {job.elapsed_seconds:.1f}s"
+            )
+
+    async def _flush(self, job: BulkJob, parsed: List[Tuple[List[Document], Dict]]):
+        """Embed the pooled chunks of several files in one go, then index each file."""
+        if not parsed:
+            return
+        all_chunks = [chunk for chunks, _ in parsed for chunk in chunks]
+        vectors = await ingestion_pipeline.embed_chunks(all_chunks)
+
+        offset = 0
+        for chunks, metadata in parsed:
+            doc_vectors = vectors[offset:offset + len(chunks)]
+            offset += len(chunks)
+            await vector_store_service.add_documents(chunks, metadata, vectors=doc_vectors, persist=False)
+            job.processed_files += 1
+            job.total_chunks += len(chunks)
+            job.doc_ids.append(metadata["doc_id"])
+
+    def _prune(self):
+        """Keep at most BULK_MAX_JOBS jobs, dropping the oldest finished ones."""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= settings.BULK_MAX_JOBS:
+                break
+            if self._jobs[job_id].finished_at is not None:
+                del self._jobs[job_id]
+
+
+# Singleton
+bulk_ingestion_service = BulkIngestionService()
@@ -0,0 +1,212 @@
+"""
+Chunk Store
+───────────
+On-disk chunk text + metadata keyed by FAISS vector ID, replacing the
+pickled in-memory langchain docstore. Search fetches only the top-k hits,
+so resident memory no longer grows with the corpus, and every uvicorn
+worker reads the same file.
+
+Layout: FAISS_INDEX_PATH/chunks.sqlite
+  chunks(vector_id PRIMARY KEY, doc_id, content_hash, text, metadata JSON)
+  with indexes on doc_id (deletes) and content_hash (dedup lookups).
+
+Lookups by vector ID (the search path) go through a per-thread read
+connection: in WAL mode readers see the last commit without waiting for
+the writer's lock or transaction, so ingestion never stalls a search.
+
+The store is updated in place, ahead of the snapshot + WAL: writes are
+idempotent (INSERT OR REPLACE by vector ID), so WAL replay converges on
+the same rows, and rows past the last replayed vector ID are dropped as
+leftovers of a WAL tail that never reached disk.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+from app.services.document_processor import chunk_content_hash
+
+
+BATCH = 500   # SQLite host-parameter limit headroom
+
+
+class ChunkStore:
+    """
+    Thread-safe vector ID → Document store backed by SQLite.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._local = threading.local()                 # per-thread read connection
+        self._readers: List[sqlite3.Connection] = []
+
+    def add(self, vector_ids: List[int], chunks: List[Document]):
+        rows = [
+            (
+                int(vid),
+                chunk.metadata.get("doc_id", ""),
+                chunk.metadata.get("content_hash") or chunk_content_hash(chunk.page_content),
+                chunk.page_content,
+                json.dumps(chunk.metadata, default=str),
+            )
+            for vid, chunk in zip(vector_ids, chunks)
+        ]
+        with self._lock:
+            self._open()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO chunks (vector_id, doc_id, content_hash, text, metadata) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+
+    def get_many(self, vector_ids: List[int]) -> Dict[int, Document]:
+        found: Dict[int, Document] = {}
+        db = self._reader()
+        for batch in _batches([int(v) for v in vector_ids]):
+            for vid, text, metadata in db.execute(
+                f"SELECT vector_id, text, metadata FROM chunks WHERE vector_id IN ({_params(batch)})", batch
+            ):
+                found[vid] = Document(page_content=text, metadata=json.loads(metadata))
+        return found
+
+    def set_total_chunks(self, doc_id: str, total: int):
+        """Write a doc's final chunk count into every one of its chunks' metadata."""
+        with self._lock:
+            self._open()
+            self._db.execute("UPDATE chunks SET metadata = json_set(metadata, '$.total_chunks', ?) WHERE doc_id = ?",
+                             (total, doc_id))
+            self._db.commit()
+
+    def delete(self, vector_ids: List[int]):
+        with self._lock:
+            self._open()
+            self._db.executemany("DELETE FROM chunks WHERE vector_id = ?", [(int(v),) for v in vector_ids])
+            self._db.commit()
+
+    def delete_from(self, first_vector_id: int) -> int:
+        """Drop rows with vector_id ≥ first_vector_id. Returns the number removed."""
+        with self._lock:
+            self._open()
+            removed = self._db.execute("DELETE FROM chunks WHERE vector_id >= ?", (first_vector_id,)).rowcount
+            self._db.commit()
+            return removed
+
+    def ids_for_doc(self, doc_id: str) -> List[int]:
+        with self._lock:
+            self._open()
+            return [row[0] for row in self._db.execute(
+                "SELECT vector_id FROM chunks WHERE doc_id = ? ORDER BY vector_id", (doc_id,)
+            )]
+
+    def doc_ranges(self) -> Dict[str, List[Tuple[int, int]]]:
+        """doc_id → runs of consecutive vector IDs as [(start, stop), ...]."""
+        ranges: Dict[str, List[Tuple[int, int]]] = {}
+        with self._lock:
+            self._open()
+            rows = self._db.execute(
+                "SELECT doc_id, MIN(vector_id), MAX(vector_id) + 1 FROM ("
+                "  SELECT doc_id, vector_id,"
+                "         vector_id - ROW_NUMBER() OVER (PARTITION BY doc_id ORDER BY vector_id) AS run"
+                "  FROM chunks"
+                ") GROUP BY doc_id, run ORDER BY doc_id, 2"
+            ).fetchall()
+        for doc_id, start, stop in rows:
+            ranges.setdefault(doc_id, []).append((start, stop))
+        return ranges
+
+    def ids_for_hashes(self, content_hashes: List[str]) -> Dict[str, int]:
+        """One live vector ID per known content hash (read connection: never waits on a write)."""
+        found: Dict[str, int] = {}
+        db = self._reader()
+        for batch in _batches(list(set(content_hashes))):
+            found.update(db.execute(
+                f"SELECT content_hash, MIN(vector_id) FROM chunks WHERE content_hash IN ({_params(batch)}) "
+                "GROUP BY content_hash",
+                batch,
+            ).fetchall())
+        return found
+
+    def all_ids(self) -> np.ndarray:
+        with self._lock:
+            self._open()
+            rows = self._db.execute("SELECT vector_id FROM chunks ORDER BY vector_id").fetchall()
+        return np.array([row[0] for row in rows], dtype=np.int64)
+
+    def iter_texts(self) -> Iterator[Tuple[int, str]]:
+        """(vector_id, text) for every chunk, in ID order."""
+        with self._lock:
+            self._open()
+            rows = self._db.execute("SELECT vector_id, text FROM chunks ORDER BY vector_id").fetchall()
+        yield from rows
+
+    def iter_documents(self) -> Iterator[Document]:
+        with self._lock:
+            self._open()
+            rows = self._db.execute("SELECT text, metadata FROM chunks ORDER BY vector_id").fetchall()
+        for text, metadata in rows:
+            yield Document(page_content=text, metadata=json.loads(metadata))
+
+    def count(self) -> int:
+        with self._lock:
+            self._open()
+            return self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._open()
+            self._db.execute("DELETE FROM chunks")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            for reader in self._readers:
+                reader.close()
+            self._readers = []
+
+    # ─────────────────────────── Storage ─────────────────────────────────────
+
+    def _open(self):
+        if self._db is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "vector_id INTEGER PRIMARY KEY, doc_id TEXT NOT NULL, content_hash TEXT NOT NULL, "
+            "text TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS chunks_doc_id ON chunks (doc_id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS chunks_content_hash ON chunks (content_hash)")
+        self._db.commit()
+
+    def _reader(self) -> sqlite3.Connection:
+        reader = getattr(self._local, "db", None)
+        if reader is None or reader not in self._readers:   # first use on this thread, or closed since
+            with self._lock:
+                self._open()
+                reader = sqlite3.connect(str(self.path), check_same_thread=False)
+                self._readers.append(reader)
+            self._local.db = reader
+        return reader
+
+
+def _batches(values: list) -> Iterator[list]:
+    for start in range(0, len(values), BATCH):
+        yield values[start:start + BATCH]
+
+
+def _params(batch: list) -> str:
+    return ",".join("?" * len(batch))
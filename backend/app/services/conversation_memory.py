@@ -0,0 +1,247 @@
+"""
+Conversation Memory
+───────────────────
+Server-side chat sessions, so clients send a session ID instead of the
+whole conversation with every question.
+
+A session holds a running summary plus the turns not yet folded into it.
+Once more than SESSION_RECENT_MESSAGES turns pile up, the overflow is
+summarized in the background (one LLM call, off the request path) and
+merged into the summary, capped at SESSION_SUMMARY_MAX_TOKENS. The prompt
+therefore carries the summary and the last few turns however long the chat
+gets. If summarizing keeps failing, turns past SESSION_MAX_MESSAGES are
+dropped instead so memory stays bounded.
+
+Sessions live in a bounded LRU. With SESSION_PERSIST=true every change is
+also written through to SQLite (SESSION_DB_PATH): sessions evicted from
+memory, or from before a restart, are reloaded on their next request.
+Sessions idle for longer than SESSION_TTL_SECONDS are forgotten. Without
+persistence a session is lost on restart or on another worker, so clients
+also send their last few turns: a session the server doesn't know starts
+from those instead of empty.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Set
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.models.schemas import ChatMessage
+from app.services import token_counter
+from app.services.rag_pipeline import rag_pipeline
+
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+
+@dataclass
+class Session:
+    session_id: str
+    summary: str = ""
+    turns: List[ChatMessage] = field(default_factory=list)   # not yet folded into the summary
+    summarized_messages: int = 0
+    updated_at: float = field(default_factory=time.time)
+    summarizing: bool = False
+
+
+class SessionStore:
+    """
+    Bounded LRU of sessions with optional SQLite write-through. Thread-safe;
+    summarization tasks run on the event loop that recorded the turn.
+    """
+
+    def __init__(self):
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    def create(self) -> Session:
+        return self.get_or_create(uuid.uuid4().hex)
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None and settings.SESSION_PERSIST:
+                session = self._load(session_id)
+                if session is not None:
+                    self._insert(session)
+            if session is None or session.updated_at < time.time() - settings.SESSION_TTL_SECONDS:
+                return None
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def get_or_create(self, session_id: str, history: Optional[List[ChatMessage]] = None) -> Session:
+        """
+        A session ID the server doesn't know (new, expired, or never persisted)
+        starts from `history`, the client's copy of its recent turns, if any.
+        """
+        session = self.get(session_id)
+        if session is None:
+            turns = [m for m in history or [] if m.role != "system"]
+            session = Session(session_id=session_id, turns=turns[-settings.SESSION_MAX_MESSAGES:])
+            with self._lock:
+                self._insert(session)
+                self._save(session)
+        return session
+
+    def history(self, session: Session) -> List[ChatMessage]:
+        """Conversation history for the prompt: the running summary, then the recent turns."""
+        with self._lock:
+            messages = list(session.turns)
+            if session.summary:
+                messages.insert(0, ChatMessage(role="system", content=SUMMARY_PREFIX + session.summary))
+            return messages
+
+    def record(self, session: Session, question: str, answer: str):
+        """Append one question/answer exchange; schedules summarization once turns overflow."""
+        if not answer:
+            return
+        with self._lock:
+            session.turns.append(ChatMessage(role="user", content=question))
+            session.turns.append(ChatMessage(role="assistant", content=answer))
+            session.updated_at = time.time()
+            overflow = len(session.turns) > settings.SESSION_RECENT_MESSAGES and not session.summarizing
+            if overflow:
+                session.summarizing = True
+            self._save(session)
+        if overflow:
+            task = asyncio.get_running_loop().create_task(self._summarize(session))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            found = self._sessions.pop(session_id, None) is not None
+            if settings.SESSION_PERSIST:
+                self._open()
+                deleted = self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount
+                self._db.commit()
+                found = found or deleted > 0
+            return found
+
+    def __len__(self) -> int:
+        """Sessions held in memory (persisted ones are loaded on demand)."""
+        return len(self._sessions)
+
+    async def drain(self):
+        """Wait for in-flight summaries (shutdown, benchmarks)."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    # ── Summarization ────────────────────────────────────────────────────────
+
+    async def _summarize(self, session: Session):
+        with self._lock:
+            folded = session.turns[:len(session.turns) - settings.SESSION_RECENT_MESSAGES]
+            previous = session.summary
+        try:
+            summary = await rag_pipeline.asummarize(previous, folded)
+            summary = token_counter.truncate(summary.strip(), settings.SESSION_SUMMARY_MAX_TOKENS)
+        except Exception as e:
+            logger.warning(f"Session {session.session_id}: summarizing {len(folded)} turns failed ({e})")
+            with self._lock:
+                if self._live(session) is not session:
+                    return   # a reloaded copy caps its own turns
+                excess = len(session.turns) - settings.SESSION_MAX_MESSAGES
+                if excess > 0:
+                    del session.turns[:excess]
+                session.summarizing = False
+                self._save(session)
+            return
+
+        with self._lock:
+            live = self._live(session)
+            if live is None or live.summary != previous or live.turns[:len(folded)] != folded:
+                return   # evicted or deleted meanwhile, or a reloaded copy already folded these turns
+            session = live
+            # Turns recorded while the LLM call ran are after `folded`, so slicing from the front is safe
+            del session.turns[:len(folded)]
+            session.summary = summary
+            session.summarized_messages += len(folded)
+            again = session.summarizing = len(session.turns) > settings.SESSION_RECENT_MESSAGES
+            self._save(session)
+        logger.info(f"Session {session.session_id}: folded {len(folded)} turns into a "
+                    f"{token_counter.count_tokens(summary)}-token summary")
+        if again:
+            await self._summarize(session)
+
+    # ── LRU + SQLite (call with the lock held) ───────────────────────────────
+
+    def _live(self, session: Session) -> Optional[Session]:
+        """
+        The current copy of `session`: it may have been evicted (and reloaded
+        from SQLite as a new object) or deleted while a summary was running.
+        """
+        live = self._sessions.get(session.session_id)
+        if live is None and settings.SESSION_PERSIST:
+            live = self._load(session.session_id)
+            if live is not None:
+                self._insert(live)
+        return live
+
+    def _insert(self, session: Session):
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        while len(self._sessions) > settings.SESSION_MAX_SESSIONS:
+            self._sessions.popitem(last=False)
+
+    def _save(self, session: Session):
+        if not settings.SESSION_PERSIST:
+            return
+        self._open()
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, summary, turns, summarized_messages, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (session.session_id, session.summary, json.dumps([m.model_dump() for m in session.turns]),
+             session.summarized_messages, session.updated_at),
+        )
+        self._db.commit()
+
+    def _load(self, session_id: str) -> Optional[Session]:
+        self._open()
+        row = self._db.execute(
+            "SELECT summary, turns, summarized_messages, updated_at FROM sessions WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        summary, turns, summarized_messages, updated_at = row
+        return Session(
+            session_id=session_id,
+            summary=summary,
+            turns=[ChatMessage(**m) for m in json.loads(turns)],
+            summarized_messages=summarized_messages,
+            updated_at=updated_at,
+        )
+
+    def _open(self):
+        if self._db is not None:
+            return
+        path = Path(settings.SESSION_DB_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, summary TEXT NOT NULL, turns TEXT NOT NULL, "
+            "summarized_messages INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+        self._db.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - settings.SESSION_TTL_SECONDS,))
+        self._db.commit()
+
+
+# Singleton
+conversation_memory = SessionStore()
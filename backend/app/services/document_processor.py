@@ -2,42 +2,61 @@
 Document Processor
 Handles ingestion of PDF, TXT, Markdown, and DOCX files.
 Splits documents into semantic chunks with overlap.
+
+With INGEST_STREAMING, files are read a page at a time (PDF pages, or
+TEXT_BLOCK_CHARS blocks of a .txt) and chunked as they arrive, so only the
+current page and the chunks not yet handed on are held in memory.
 """
 
 import os
 import uuid
 import hashlib
+import importlib
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import List, Tuple, Dict
+from typing import Iterator, List, Tuple, Dict, Optional
 
 from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    UnstructuredMarkdownLoader,
-    Docx2txtLoader,
-)
 
 from app.core.config import settings
 from app.core.logger import logger
+from app.services import token_counter
 
 
+# Loader classes are imported on first use: they pull in pypdf / unstructured,
+# which the API process never needs now that parsing runs in worker processes.
 LOADERS = {
-    "pdf":  PyPDFLoader,
-    "txt":  TextLoader,
-    "md":   UnstructuredMarkdownLoader,
-    "docx": Docx2txtLoader,
+    "pdf":  "PyPDFLoader",
+    "txt":  "TextLoader",
+    "md":   "UnstructuredMarkdownLoader",
+    "docx": "Docx2txtLoader",
 }
 
 
+TEXT_BLOCK_CHARS = 64 * 1024   # a .txt "page" when streaming
+
+
+def _loader_class(ext: str):
+    name = LOADERS.get(ext)
+    if name is None:
+        return None
+    return getattr(importlib.import_module("langchain_community.document_loaders"), name)
+
+
+def chunk_content_hash(text: str) -> str:
+    """Content hash used to spot identical chunks (boilerplate) across documents."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
 class DocumentProcessor:
     """
     Loads, validates, and chunks documents for vector indexing.
     """
 
     def __init__(self):
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
         self.splitter = RecursiveCharacterTextSplitter(
             chunk_size=settings.CHUNK_SIZE,
             chunk_overlap=settings.CHUNK_OVERLAP,
@@ -62,7 +81,7 @@ class DocumentProcessor:
     def load_document(self, filepath: str) -> List[Document]:
         """Load a file and return list of LangChain Document objects."""
         ext = Path(filepath).suffix.lstrip(".").lower()
-        loader_cls = LOADERS.get(ext)
+        loader_cls = _loader_class(ext)
 
         if not loader_cls:
             raise ValueError(f"No loader available for .{ext}")
@@ -72,6 +91,89 @@ class DocumentProcessor:
         logger.info(f"Loaded {len(documents)} page(s) from '{Path(filepath).name}'")
         return documents
 
+    def iter_pages(self, filepath: str) -> Iterator[Document]:
+        """Yield a file's pages one at a time (whole-document formats yield once)."""
+        ext = Path(filepath).suffix.lstrip(".").lower()
+        if ext == "txt":
+            with open(filepath) as f:
+                for block in iter(lambda: f.read(TEXT_BLOCK_CHARS), ""):
+                    yield Document(page_content=block, metadata={"source": filepath})
+            return
+
+        loader_cls = _loader_class(ext)
+        if not loader_cls:
+            raise ValueError(f"No loader available for .{ext}")
+        yield from loader_cls(filepath).lazy_load()
+
+    def iter_chunks(
+        self,
+        filepath: str,
+        doc_id: str,
+        filename: str,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Iterator[Document]:
+        """
+        Chunk a file page by page. The last chunk of each page is held back
+        and re-split together with the next page, so chunks — and their
+        overlap — run across page boundaries; a chunk takes the metadata of
+        the page it starts on. `total_chunks` is only known at the end: it
+        is left None for the caller to fill in (see `set_total_chunks`).
+        If `timings` is given, "parse" and "chunk" seconds accumulate in it.
+        """
+        # .txt blocks are cut mid-text, so they rejoin as-is; real pages get a paragraph break
+        joiner = "" if Path(filepath).suffix.lower() == ".txt" else "\n\n"
+        tail, tail_metadata = "", {}
+        index = 0
+        pages = self.iter_pages(filepath)
+        while True:
+            start = time.perf_counter()
+            page = next(pages, None)
+            loaded = time.perf_counter()
+            if timings is not None:
+                timings["parse"] = timings.get("parse", 0.0) + loaded - start
+            if page is None:
+                break
+            if not page.page_content.strip():
+                continue
+
+            boundary = len(tail) + len(joiner) if tail else 0
+            text = tail + joiner + page.page_content if tail else page.page_content
+            pieces = self.splitter.split_text(text)
+            starts = _piece_starts(text, pieces, settings.CHUNK_OVERLAP)
+            done = []
+            for piece, offset in zip(pieces[:-1], starts[:-1]):
+                done.append(self._make_chunk(piece, tail_metadata if offset < boundary else page.metadata,
+                                             doc_id, filename, index))
+                index += 1
+            if pieces:
+                tail_metadata = tail_metadata if starts[-1] < boundary else page.metadata
+                tail = text[starts[-1]:]
+            if timings is not None:
+                timings["chunk"] = timings.get("chunk", 0.0) + time.perf_counter() - loaded
+            yield from done
+
+        # Flush the held-back tail
+        for piece in self.splitter.split_text(tail) if tail.strip() else []:
+            yield self._make_chunk(piece, tail_metadata, doc_id, filename, index)
+            index += 1
+
+    @staticmethod
+    def set_total_chunks(chunks: List[Document]):
+        for chunk in chunks:
+            chunk.metadata["total_chunks"] = len(chunks)
+
+    def _make_chunk(self, text: str, page_metadata: Dict, doc_id: str, filename: str, index: int) -> Document:
+        chunk = Document(page_content=text, metadata={
+            **page_metadata,
+            "doc_id": doc_id,
+            "filename": filename,
+            "chunk_index": index,
+            "total_chunks": None,
+            "content_hash": chunk_content_hash(text),
+        })
+        token_counter.annotate(chunk)
+        return chunk
+
     def chunk_documents(
         self,
         documents: List[Document],
@@ -87,42 +189,70 @@ class DocumentProcessor:
                 "filename": filename,
                 "chunk_index": i,
                 "total_chunks": len(chunks),
+                "content_hash": chunk_content_hash(chunk.page_content),
             })
+            token_counter.annotate(chunk)
 
         logger.info(f"  → {len(chunks)} chunks (size={settings.CHUNK_SIZE}, overlap={settings.CHUNK_OVERLAP})")
         return chunks
 
-    def process_file(self, filepath: str) -> Tuple[List[Document], Dict]:
+    def process_file(self, filepath: str, timings: Optional[Dict[str, float]] = None) -> Tuple[List[Document], Dict]:
         """
         Full pipeline: validate → load → chunk → return chunks + metadata.
-        Returns (chunks, metadata_dict)
+        Returns (chunks, metadata_dict). If `timings` is given, the load
+        ("parse") and "chunk" durations are written into it, in seconds.
         """
+        metadata = self.file_metadata(filepath)
+        doc_id, filename = metadata["doc_id"], metadata["filename"]
+
+        if settings.INGEST_STREAMING:
+            chunks = list(self.iter_chunks(filepath, doc_id, filename, timings))
+            self.set_total_chunks(chunks)
+            logger.info(f"Loaded + chunked '{filename}' page by page → {len(chunks)} chunks")
+        else:
+            start = time.perf_counter()
+            documents = self.load_document(filepath)
+            loaded = time.perf_counter()
+            chunks = self.chunk_documents(documents, doc_id, filename)
+            if timings is not None:
+                timings["parse"] = loaded - start
+                timings["chunk"] = time.perf_counter() - loaded
+
+        metadata["num_chunks"] = len(chunks)
+        return chunks, metadata
+
+    def file_metadata(self, filepath: str) -> Dict:
+        """Validate a file and describe it; `num_chunks` is filled in once it has been chunked."""
         valid, msg = self.validate_file(filepath)
         if not valid:
             raise ValueError(msg)
 
         path = Path(filepath)
-        doc_id = self._generate_doc_id(filepath)
-        filename = path.name
-
-        documents = self.load_document(filepath)
-        chunks = self.chunk_documents(documents, doc_id, filename)
-
-        metadata = {
-            "doc_id": doc_id,
-            "filename": filename,
+        return {
+            "doc_id": self.generate_doc_id(filepath),
+            "filename": path.name,
             "file_type": path.suffix.lstrip(".").lower(),
-            "num_chunks": len(chunks),
+            "num_chunks": 0,
             "upload_time": datetime.utcnow(),
             "size_bytes": path.stat().st_size,
         }
 
-        return chunks, metadata
-
-    def _generate_doc_id(self, filepath: str) -> str:
+    @staticmethod
+    def generate_doc_id(filepath: str) -> str:
         """Generate a deterministic doc ID from file content hash."""
         h = hashlib.md5()
         with open(filepath, "rb") as f:
             for block in iter(lambda: f.read(65536), b""):
                 h.update(block)
         return h.hexdigest()[:12]
+
+
+def _piece_starts(text: str, pieces: List[str], overlap: int) -> List[int]:
+    """Offset of each split piece in `text` (pieces are stripped, so found by search, as add_start_index does)."""
+    starts, offset = [], 0
+    for piece in pieces:
+        start = text.find(piece, offset)
+        start = offset if start < 0 else start
+        starts.append(start)
+        offset = max(0, start + len(piece) - overlap)
+    return starts
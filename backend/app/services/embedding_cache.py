@@ -0,0 +1,188 @@
+"""
+Embedding Cache
+───────────────
+Persistent on-disk cache of chunk embeddings, so re-chunking, rebuilding an
+index after a crash, or re-uploading never re-embeds text seen before.
+
+Layout under FAISS_INDEX_PATH/embedding_cache/<model>/:
+  vectors.f32   — memory-mapped float32 matrix, one row per slot
+  index.sqlite  — content hash → slot, with a last-used counter for LRU
+
+The model name (and ONNX variant) is part of the path, so switching
+EMBEDDING_MODEL or EMBEDDING_BACKEND never serves another model's vectors.
+When the matrix reaches EMBEDDING_CACHE_MAX_MB the least-recently-used
+slots are recycled.
+"""
+
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import logger
+
+
+INITIAL_SLOTS = 1024
+
+
+class EmbeddingCache:
+    """
+    Thread-safe hash → vector store backed by a growable memmap + SQLite.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._vectors: Optional[np.memmap] = None
+        self._dim: Optional[int] = None
+        self._capacity = 0
+        self._free_slots: List[int] = []
+        self._clock = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, content_hashes: List[str]) -> Dict[str, List[float]]:
+        with self._lock:
+            self._open()
+            unique = list(dict.fromkeys(content_hashes))
+            slots = self._select_slots(unique) if self._vectors is not None else {}
+            found = {h: self._vectors[slot].tolist() for h, slot in slots.items()}
+            if found:
+                self._clock += 1
+                self._db.executemany(
+                    "UPDATE entries SET last_used = ? WHERE hash = ?",
+                    [(self._clock, h) for h in found],
+                )
+                self._db.commit()
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+            return found
+
+    def put_many(self, content_hashes: List[str], vectors: List[List[float]]):
+        if not content_hashes:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            self._open()
+            if self._dim is None:
+                self._init_storage(matrix.shape[1])
+            new = {}
+            for content_hash, vector in zip(content_hashes, matrix):
+                new.setdefault(content_hash, vector)
+            for content_hash in self._select_slots(list(new)):
+                del new[content_hash]
+
+            self._clock += 1
+            for content_hash, vector in new.items():
+                slot = self._allocate_slot()
+                self._vectors[slot] = vector
+                self._db.execute(
+                    "INSERT INTO entries (hash, slot, last_used) VALUES (?, ?, ?)",
+                    (content_hash, slot, self._clock),
+                )
+            self._vectors.flush()
+            self._db.commit()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] if self._db else 0
+            return {
+                "size": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bytes": self._capacity * (self._dim or 0) * 4,
+            }
+
+    # ─────────────────────────── Storage ─────────────────────────────────────
+
+    def _open(self):
+        if self._db is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.directory / "index.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (hash TEXT PRIMARY KEY, slot INTEGER NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._db.commit()
+        meta = dict(self._db.execute("SELECT key, value FROM meta").fetchall())
+        if "dim" in meta:
+            self._dim, self._capacity = meta["dim"], meta["capacity"]
+            self._map(self._capacity)
+            used = {row[0] for row in self._db.execute("SELECT slot FROM entries")}
+            self._free_slots = [s for s in range(self._capacity - 1, -1, -1) if s not in used]
+            self._clock = self._db.execute("SELECT COALESCE(MAX(last_used), 0) FROM entries").fetchone()[0]
+            logger.info(f"Embedding cache: {len(used)} vectors at {self.directory}")
+
+    def _select_slots(self, content_hashes: List[str]) -> Dict[str, int]:
+        slots: Dict[str, int] = {}
+        for start in range(0, len(content_hashes), 500):
+            batch = content_hashes[start:start + 500]
+            slots.update(self._db.execute(
+                f"SELECT hash, slot FROM entries WHERE hash IN ({','.join('?' * len(batch))})", batch
+            ).fetchall())
+        return slots
+
+    def _init_storage(self, dim: int):
+        self._dim = dim
+        self._grow(min(INITIAL_SLOTS, self._max_slots()))
+
+    def _max_slots(self) -> int:
+        return max(1, self.max_bytes // (self._dim * 4))
+
+    def _map(self, capacity: int):
+        path = self.directory / "vectors.f32"
+        with open(path, "ab") as f:
+            f.truncate(capacity * self._dim * 4)
+        self._vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self._dim))
+
+    def _grow(self, capacity: int):
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        self._free_slots = list(range(capacity - 1, self._capacity - 1, -1)) + self._free_slots
+        self._capacity = capacity
+        self._map(capacity)
+        self._db.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [("dim", self._dim), ("capacity", capacity)],
+        )
+
+    def _allocate_slot(self) -> int:
+        if not self._free_slots:
+            if self._capacity < self._max_slots():
+                self._grow(min(self._capacity * 2, self._max_slots()))
+            else:
+                self._evict(max(1, self._capacity // 10))
+        return self._free_slots.pop()
+
+    def _evict(self, count: int):
+        """Free the `count` least-recently-used slots."""
+        rows = self._db.execute(
+            "SELECT hash, slot FROM entries ORDER BY last_used LIMIT ?", (count,)
+        ).fetchall()
+        self._db.executemany("DELETE FROM entries WHERE hash = ?", [(h,) for h, _ in rows])
+        self._free_slots.extend(slot for _, slot in rows)
+        self.evictions += len(rows)
+
+
+def _model_slug(model_name: str) -> str:
+    if settings.EMBEDDING_BACKEND == "onnx":
+        model_name += "-onnx-int8" if settings.EMBEDDING_ONNX_INT8 else "-onnx"
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+
+
+# Singleton
+embedding_cache = EmbeddingCache(
+    directory=Path(settings.FAISS_INDEX_PATH) / "embedding_cache" / _model_slug(settings.EMBEDDING_MODEL),
+    max_bytes=settings.EMBEDDING_CACHE_MAX_MB * 1024 * 1024,
+)
@@ -0,0 +1,150 @@
+"""
+Fake LLM
+────────
+Deterministic local chat model for LLM_PROVIDER=fake: load tests and demos
+with no API key, network or cost.
+
+Latency is drawn from a log-normal distribution around LLM_FAKE_LATENCY_MS
+(LLM_FAKE_LATENCY_SIGMA sets the tail: p99 ≈ median · e^(2.33·σ)), then the
+reply streams one word every LLM_FAKE_TOKEN_MS. A fraction
+LLM_FAKE_ERROR_RATE of calls fail with a 503-style error. Draws come from
+one seeded generator, so a given sequence of calls always sees the same
+latencies and failures.
+
+The reply quotes the first source in the prompt's context (or echoes the
+question), so answers look grounded and differ per question.
+"""
+
+import asyncio
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.pydantic_v1 import PrivateAttr
+
+from app.core.config import settings
+from app.services import token_counter
+
+
+_SOURCE = re.compile(r"Source 1 \(([^)]*)\): (.*?)(?:\n\nSource 2 |$)", re.S)
+
+
+class FakeProviderError(RuntimeError):
+    """Simulated upstream failure; carries a status code like openai.APIStatusError."""
+
+    def __init__(self, message: str, status_code: int = 503):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeChatModel(BaseChatModel):
+    """Seeded stand-in for ChatOpenAI with a configurable latency distribution."""
+
+    latency_ms: float = 800.0          # median time to first token
+    latency_sigma: float = 0.5
+    token_ms: float = 10.0
+    error_rate: float = 0.0
+    seed: int = 0
+    max_words: int = 80
+
+    _rng: random.Random = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr()
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    # ── Simulation ───────────────────────────────────────────────────────────
+
+    def _draw(self) -> Tuple[float, bool]:
+        """(seconds to first token, whether the call fails once that time is up) for one call."""
+        with self._lock:
+            delay = self._rng.lognormvariate(math.log(max(self.latency_ms, 1e-3)), self.latency_sigma) / 1000
+            return delay, self._rng.random() < self.error_rate
+
+    @staticmethod
+    def _check(failed: bool):
+        if failed:
+            raise FakeProviderError("503 Service Unavailable (simulated)")
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        system = next((m.content for m in messages if isinstance(m, SystemMessage)), "")
+        match = _SOURCE.search(system)
+        if match:
+            text = f"According to {match.group(1)}: {match.group(2)}"
+        else:
+            text = f"You asked: {messages[-1].content}" if messages else ""
+        return " ".join(text.split()[:self.max_words])
+
+    def _usage(self, messages: List[BaseMessage], reply: str) -> dict:
+        prompt = sum(token_counter.count_tokens(m.content) for m in messages)
+        completion = token_counter.count_tokens(reply)
+        return {"input_tokens": prompt, "output_tokens": completion, "total_tokens": prompt + completion}
+
+    def _result(self, messages: List[BaseMessage], reply: str) -> ChatResult:
+        usage = self._usage(messages, reply)
+        message = AIMessage(
+            content=reply,
+            response_metadata={"token_usage": {"total_tokens": usage["total_tokens"]}},
+            usage_metadata=usage,
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    # ── BaseChatModel ────────────────────────────────────────────────────────
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        reply = self._reply(messages)
+        delay, failed = self._draw()
+        time.sleep(delay)
+        self._check(failed)
+        time.sleep(self.token_ms * len(reply.split()) / 1000)
+        return self._result(messages, reply)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        reply = self._reply(messages)
+        delay, failed = self._draw()
+        await asyncio.sleep(delay)
+        self._check(failed)
+        await asyncio.sleep(self.token_ms * len(reply.split()) / 1000)
+        return self._result(messages, reply)
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        reply = self._reply(messages)
+        delay, failed = self._draw()
+        time.sleep(delay)
+        self._check(failed)
+        for word in reply.split():
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            time.sleep(self.token_ms / 1000)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, reply)))
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        reply = self._reply(messages)
+        delay, failed = self._draw()
+        await asyncio.sleep(delay)
+        self._check(failed)
+        for word in reply.split():
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            await asyncio.sleep(self.token_ms / 1000)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, reply)))
+
+
+def from_settings(seed: Optional[int] = None) -> FakeChatModel:
+    return FakeChatModel(
+        latency_ms=settings.LLM_FAKE_LATENCY_MS,
+        latency_sigma=settings.LLM_FAKE_LATENCY_SIGMA,
+        token_ms=settings.LLM_FAKE_TOKEN_MS,
+        error_rate=settings.LLM_FAKE_ERROR_RATE,
+        seed=settings.LLM_FAKE_SEED if seed is None else seed,
+    )
@@ -0,0 +1,169 @@
+"""
+Index Persistence
+─────────────────
+Crash-safe, append-only persistence for the vector store.
+
+Layout under FAISS_INDEX_PATH:
+  CURRENT             — sequence number of the live snapshot (replaced atomically)
+  snapshot-<seq>/     — full state: index.faiss, index_meta.json, manifest.json
+                        (chunk text lives in chunks.sqlite — see chunk_store)
+  wal-<seq>.log       — changes made since snapshot-<seq>, one framed record each
+
+Every add / delete appends a small record (new vectors + chunks, or the IDs
+removed) instead of rewriting the whole index. When the WAL outgrows
+INDEX_WAL_MAX_MB it is compacted into snapshot-<seq+1>: the snapshot is
+written to a temp dir, renamed into place, then CURRENT is swapped with
+os.replace. A crash at any point leaves either the old snapshot + WAL or
+the new snapshot live — never a half-written index.
+
+Records are framed as [length:u32][crc32:u32][pickle payload]; replay stops
+at the first torn or corrupt record and truncates the log there.
+"""
+
+import os
+import pickle
+import shutil
+import struct
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+from app.core.logger import logger
+
+
+HEADER = struct.Struct(">II")
+
+
+def _fsync_dir(path: Path):
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Write a file via temp file + fsync + rename."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path.parent)
+
+
+class IndexPersistence:
+    """
+    Snapshot + write-ahead-log storage. Not thread-safe; the vector store
+    serialises writers.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._wal = None
+        self.bytes_written = 0          # for write-amplification stats
+
+    # ─────────────────────────── Snapshots ───────────────────────────────────
+
+    def current_seq(self) -> Optional[int]:
+        current = self.root / "CURRENT"
+        if not current.exists():
+            return None
+        return int(current.read_text().strip())
+
+    def snapshot_dir(self, seq: int) -> Path:
+        return self.root / f"snapshot-{seq}"
+
+    def wal_path(self, seq: int) -> Path:
+        return self.root / f"wal-{seq}.log"
+
+    def write_snapshot(self, write_fn: Callable[[Path], None]) -> int:
+        """
+        Write a full snapshot via write_fn(directory), make it live atomically,
+        start an empty WAL, and delete the previous snapshot + WAL.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        old_seq = self.current_seq()
+        seq = (old_seq or 0) + 1
+
+        tmp = self.root / f"snapshot-{seq}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        write_fn(tmp)
+        for f in tmp.iterdir():
+            with open(f, "rb") as fh:
+                os.fsync(fh.fileno())
+            self.bytes_written += f.stat().st_size
+        final = self.snapshot_dir(seq)
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+
+        self.close()
+        self.wal_path(seq).touch()
+        atomic_write_bytes(self.root / "CURRENT", str(seq).encode())
+
+        if old_seq is not None:
+            shutil.rmtree(self.snapshot_dir(old_seq), ignore_errors=True)
+            self.wal_path(old_seq).unlink(missing_ok=True)
+        return seq
+
+    # ─────────────────────────── WAL ─────────────────────────────────────────
+
+    def append(self, record: Dict, sync: bool = True):
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        frame = HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        wal = self._open_wal()
+        wal.write(frame)
+        wal.flush()
+        if sync:
+            os.fsync(wal.fileno())
+        self.bytes_written += len(frame)
+
+    def sync(self):
+        if self._wal is not None:
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+
+    def replay(self) -> Iterator[Dict]:
+        """Yield WAL records for the live snapshot, truncating any torn tail."""
+        seq = self.current_seq()
+        if seq is None or not self.wal_path(seq).exists():
+            return
+        path = self.wal_path(seq)
+        good_until = 0
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    break
+                length, crc = HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                good_until = f.tell()
+                yield pickle.loads(payload)
+        if good_until < path.stat().st_size:
+            logger.warning(f"WAL {path.name}: discarding {path.stat().st_size - good_until} bytes of torn records")
+            with open(path, "r+b") as f:
+                f.truncate(good_until)
+
+    @property
+    def wal_bytes(self) -> int:
+        seq = self.current_seq()
+        if seq is None or not self.wal_path(seq).exists():
+            return 0
+        return self.wal_path(seq).stat().st_size
+
+    def close(self):
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+
+    def _open_wal(self):
+        if self._wal is None:
+            seq = self.current_seq()
+            if seq is None:
+                raise RuntimeError("No snapshot yet — call write_snapshot() before appending")
+            self._wal = open(self.wal_path(seq), "ab")
+        return self._wal
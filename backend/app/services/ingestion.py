@@ -0,0 +1,316 @@
+"""
+Ingestion Pipeline
+──────────────────
+Staged, parallel document ingestion, kept off the event loop:
+
+  Parse + chunk ──▶ [bounded queue of chunk batches] ──▶ Embed ──▶ Index
+  (process pool)                                      (thread pool)
+
+  • Parsing / chunking runs in a process pool, so PyPDF and unstructured
+    never hold the API process's GIL.
+  • Chunks are embedded in INGEST_EMBED_BATCH_SIZE batches by
+    INGEST_EMBED_WORKERS threads — a dedicated pool, so uploads don't
+    starve the default threadpool that serves chat retrieval.
+  • The bounded queue applies backpressure: a huge document can only get
+    INGEST_QUEUE_SIZE batches ahead of the embedders.
+  • With INGEST_STREAMING, uploads don't wait for the whole file: the parse
+    worker loads and chunks page by page and hands each batch across a
+    bounded inter-process queue, where it is embedded and indexed straight
+    away (in order, appended to the doc), then a final record sets the
+    doc's chunk count. Memory stays flat however many pages the file has,
+    in the worker and here alike: only the batches in flight are held.
+"""
+
+import asyncio
+import multiprocessing
+import queue as queue_module
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from langchain.schema import Document
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.document_processor import DocumentProcessor, chunk_content_hash
+from app.services.vector_store import vector_store_service
+
+
+_worker_processor = None
+
+
+def _get_worker_processor() -> DocumentProcessor:
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = DocumentProcessor()
+    return _worker_processor
+
+
+def _parse_and_chunk(filepath: str) -> Tuple[List[Document], Dict, Dict[str, float]]:
+    """Process-pool entry point: one DocumentProcessor per worker process. Also returns stage timings."""
+    timings: Dict[str, float] = {}
+    chunks, metadata = _get_worker_processor().process_file(filepath, timings)
+    return chunks, metadata, timings
+
+
+def _stream_chunks(filepath: str, batches) -> Tuple[Dict, Dict[str, float]]:
+    """
+    Process-pool entry point for streaming ingestion: puts the file's metadata
+    on `batches`, then INGEST_EMBED_BATCH_SIZE chunk lists (blocking while it
+    is full), then None. Returns the metadata, with `num_chunks`, and stage timings.
+    """
+    processor = _get_worker_processor()
+    timings: Dict[str, float] = {}
+    metadata = processor.file_metadata(filepath)
+    batches.put(metadata)
+    batch: List[Document] = []
+    for chunk in processor.iter_chunks(filepath, metadata["doc_id"], metadata["filename"], timings):
+        batch.append(chunk)
+        metadata["num_chunks"] += 1
+        if len(batch) >= settings.INGEST_EMBED_BATCH_SIZE:
+            batches.put(batch)
+            batch = []
+    if batch:
+        batches.put(batch)
+    batches.put(None)
+    return metadata, timings
+
+
+class IngestionPipeline:
+    """
+    Owns the parse process pool and the embed thread pool.
+    Both are created lazily on first use and torn down by `shutdown()`.
+    """
+
+    def __init__(self):
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self._embed_pool: Optional[ThreadPoolExecutor] = None
+        self._manager = None
+
+    async def ingest_file(self, filepath: str) -> Dict:
+        """
+        Parse, chunk, embed and index one file. Returns its metadata.
+        A file whose content hash is already indexed is not processed again.
+        """
+        start = time.time()
+        doc_id = await self.known_doc_id(filepath)
+        if doc_id is not None:
+            logger.info(f"  ✓ '{Path(filepath).name}' already indexed as doc_id={doc_id} — skipped")
+            return vector_store_service.get_document_metadata(doc_id)
+
+        if settings.INGEST_STREAMING:
+            metadata = await self.stream(filepath)
+            stages = f"parse + embed + index {int((time.time() - start) * 1000)}ms"
+        else:
+            chunks, metadata = await self.parse(filepath)
+            parsed = time.time()
+            vectors = await self.embed_chunks(chunks)
+            embedded = time.time()
+            await vector_store_service.add_documents(chunks, metadata, vectors=vectors)
+            stages = (f"parse {int((parsed - start) * 1000)}ms, embed {int((embedded - parsed) * 1000)}ms, "
+                      f"index {int((time.time() - embedded) * 1000)}ms")
+
+        logger.info(f"  ✓ Ingested '{metadata['filename']}': {metadata['num_chunks']} chunks | {stages}")
+        return metadata
+
+    async def known_doc_id(self, filepath: str) -> Optional[str]:
+        """The file's doc_id if identical content is already indexed, else None."""
+        doc_id = await run_in_threadpool(DocumentProcessor.generate_doc_id, filepath)
+        return doc_id if vector_store_service.has_document(doc_id) else None
+
+    async def parse(self, filepath: str) -> Tuple[List[Document], Dict]:
+        """Load + chunk a file in the process pool (recreated once if a worker died)."""
+        loop = asyncio.get_running_loop()
+        try:
+            chunks, metadata, timings = await loop.run_in_executor(self._get_parse_pool(), _parse_and_chunk, filepath)
+        except BrokenProcessPool:
+            self._reset_parse_pool()
+            chunks, metadata, timings = await loop.run_in_executor(self._get_parse_pool(), _parse_and_chunk, filepath)
+        for name, seconds in timings.items():
+            metrics.record_stage("ingest", name, seconds)
+        return chunks, metadata
+
+    async def stream(self, filepath: str) -> Dict:
+        """
+        Parse a file in the process pool while embedding and indexing its
+        chunk batches as they arrive, then record its chunk count (each
+        chunk's `total_chunks`). Returns its metadata. On failure, whatever
+        was already indexed is removed again.
+        """
+        try:
+            metadata, timings = await self._stream_once(filepath)
+        except BrokenProcessPool:
+            self._reset_parse_pool()
+            metadata, timings = await self._stream_once(filepath)
+        for name, seconds in timings.items():
+            metrics.record_stage("ingest", name, seconds)
+        return metadata
+
+    async def _stream_once(self, filepath: str) -> Tuple[Dict, Dict[str, float]]:
+        loop = asyncio.get_running_loop()
+        batches = self._get_manager().Queue(maxsize=settings.INGEST_QUEUE_SIZE)
+        parsing = loop.run_in_executor(self._get_parse_pool(), _stream_chunks, filepath, batches)
+        # Taking a slot before reading the next batch is the backpressure: with every
+        # embedder busy the queue fills up and the parse worker blocks on put()
+        slots = asyncio.Semaphore(max(1, settings.INGEST_EMBED_WORKERS))
+        metadata: Optional[Dict] = None
+        indexing: List[asyncio.Task] = []
+        indexed = 0
+
+        async def embed_and_index(batch: List[Document], previous: Optional[asyncio.Task]):
+            nonlocal indexed
+            try:
+                vectors = await self.embed_chunks(batch)
+                if previous is not None:
+                    # Index in order: the first batch replaces any earlier copy of the doc, the rest extend it
+                    await previous
+                indexed += len(batch)
+                await vector_store_service.add_documents(batch, {**metadata, "num_chunks": indexed},
+                                                         vectors=vectors, persist=False, append=previous is not None)
+            finally:
+                slots.release()
+
+        try:
+            metadata = await self._next_batch(batches, parsing)
+            while True:
+                await slots.acquire()
+                batch = await self._next_batch(batches, parsing)
+                if batch is None:
+                    slots.release()
+                    break
+                indexing.append(asyncio.create_task(embed_and_index(batch, indexing[-1] if indexing else None)))
+            metadata, timings = await parsing
+            if indexing:
+                await indexing[-1]
+            await vector_store_service.finalize_document(metadata)
+        except BaseException:
+            # Keep draining so a worker blocked on a full queue can finish and free its slot
+            loop.run_in_executor(None, _drain, batches, parsing)
+            # Let the batches in flight settle, so none is mid-add, then drop the partial doc
+            await asyncio.gather(*indexing, return_exceptions=True)
+            if metadata is not None:
+                await asyncio.shield(vector_store_service.delete_document(metadata["doc_id"]))
+            raise
+        return metadata, timings
+
+    @staticmethod
+    async def _next_batch(batches, parsing: asyncio.Future):
+        """Next item off the worker's queue (None at the end); raises the worker's error if it failed."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # Default executor, not the request threadpool: this waits on the worker
+                return await loop.run_in_executor(None, batches.get, True, 0.5)
+            except queue_module.Empty:
+                if parsing.done():
+                    parsing.result()   # the worker's error; after a clean exit the rest is queued
+
+    async def embed_chunks(self, chunks: List[Document]) -> List[List[float]]:
+        """
+        Embed chunks in fixed-size batches on the embed pool, feeding the
+        workers through a bounded queue. Output order matches `chunks`.
+
+        Chunks are deduplicated by content hash first: text repeated within
+        the batch is embedded once, and text already in the index reuses its
+        stored vector (each chunk is still indexed under its own id). The lookup (SQLite + FAISS reconstruct) runs on the
+        threadpool, off the event loop.
+        """
+        hashes = [c.metadata.get("content_hash") or chunk_content_hash(c.page_content) for c in chunks]
+        known = await run_in_threadpool(vector_store_service.lookup_vectors, hashes)
+        texts_by_hash = {}
+        for content_hash, chunk in zip(hashes, chunks):
+            if content_hash not in known:
+                texts_by_hash.setdefault(content_hash, chunk.page_content)
+
+        new_hashes = list(texts_by_hash)
+        with metrics.stage("ingest", "embed"):
+            new_vectors = await self._embed_texts([texts_by_hash[h] for h in new_hashes])
+        known.update(zip(new_hashes, new_vectors))
+
+        if len(new_hashes) < len(chunks):
+            logger.info(f"  ↺ Reused vectors for {len(chunks) - len(new_hashes)}/{len(chunks)} duplicate chunks")
+        return [known[h] for h in hashes]
+
+    async def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        batch_size = settings.INGEST_EMBED_BATCH_SIZE
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        results: List[Optional[List[List[float]]]] = [None] * len(batches)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.INGEST_QUEUE_SIZE)
+        loop = asyncio.get_running_loop()
+        pool = self._get_embed_pool()
+
+        async def producer():
+            for i, batch in enumerate(batches):
+                await queue.put((i, batch))
+            for _ in range(num_workers):
+                await queue.put(None)
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                i, texts = item
+                results[i] = await loop.run_in_executor(pool, vector_store_service.embed_documents, texts)
+
+        num_workers = max(1, min(settings.INGEST_EMBED_WORKERS, len(batches)))
+        await asyncio.gather(producer(), *(worker() for _ in range(num_workers)))
+        return [vector for batch in results for vector in batch]
+
+    def shutdown(self):
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+            self._parse_pool = None
+        if self._embed_pool is not None:
+            self._embed_pool.shutdown(wait=False, cancel_futures=True)
+            self._embed_pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def _reset_parse_pool(self):
+        logger.warning("Parse worker died — restarting the process pool")
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+            self._parse_pool = None
+
+    def _get_parse_pool(self) -> ProcessPoolExecutor:
+        if self._parse_pool is None:
+            # spawn, not fork: the parent may already hold torch / FAISS threads
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=settings.INGEST_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._parse_pool
+
+    def _get_manager(self):
+        if self._manager is None:
+            # Serves the inter-process chunk queues of streaming ingestion
+            self._manager = multiprocessing.get_context("spawn").Manager()
+        return self._manager
+
+    def _get_embed_pool(self) -> ThreadPoolExecutor:
+        if self._embed_pool is None:
+            self._embed_pool = ThreadPoolExecutor(
+                max_workers=settings.INGEST_EMBED_WORKERS,
+                thread_name_prefix="ingest-embed",
+            )
+        return self._embed_pool
+
+
+def _drain(batches, parsing: asyncio.Future):
+    while not parsing.done():
+        try:
+            batches.get(timeout=0.5)
+        except queue_module.Empty:
+            pass
+
+
+# Singleton
+ingestion_pipeline = IngestionPipeline()
@@ -0,0 +1,333 @@
+"""
+Lexical Index (BM25)
+────────────────────
+In-process inverted index over chunk text, keyed by FAISS vector ID, so
+exact identifiers — error codes, part numbers, config keys — are found
+even when dense retrieval ranks them poorly. The vector store keeps it in
+sync with adds / deletes and fuses its hits with the dense ones (RRF).
+
+Postings live in immutable CSR segments — one array of vector IDs and one
+of term frequencies (6 bytes per posting) plus per-term offsets — and
+document lengths in one uint32 array indexed by vector ID. Like the FAISS
+side (see IndexGeneration in vector_store), readers never take a lock: a
+search reads the published LexicalView once and uses only that, while a
+writer builds the next view beside it — a new segment per add, a
+copied length array per delete — and publishes it with one reference
+swap. Deletes zero the doc length; dead postings are skipped at query
+time and dropped when segments merge. Past MAX_SEGMENTS segments the
+smaller ones are merged, and once deleted chunks pass 20% of those
+indexed everything is compacted into one. Both happen on the writer's
+thread; searches keep reading the view they started with.
+
+Tokens are lower-cased alphanumeric runs; compound identifiers such as
+"ERR-4021" or "net.ipv4.tcp_syn_retries" are indexed whole and by part.
+"""
+
+import math
+import pickle
+import re
+import threading
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_./:][a-z0-9]+)*")
+_SEPARATORS = re.compile(r"[-_./:]")
+MAX_TF = 65535
+MAX_SEGMENTS = 8
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token)
+        if _SEPARATORS.search(token):
+            tokens.extend(part for part in _SEPARATORS.split(token) if part)
+    return tokens
+
+
+@dataclass(frozen=True)
+class _Segment:
+    """Postings in CSR form: term row r holds ids[offsets[r]:offsets[r + 1]] (and the same tf slice)."""
+
+    terms: Dict[str, int]
+    offsets: np.ndarray     # int64, one more than there are terms
+    ids: np.ndarray         # uint32 vector IDs
+    tf: np.ndarray          # uint16 term frequencies
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        row = self.terms.get(term)
+        if row is None:
+            return None
+        start, stop = self.offsets[row], self.offsets[row + 1]
+        return self.ids[start:stop], self.tf[start:stop]
+
+
+@dataclass(frozen=True)
+class LexicalView:
+    """One published state of the BM25 index. Never mutated after publishing."""
+
+    segments: Tuple[_Segment, ...] = ()
+    doc_len: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.uint32))   # 0 = absent / deleted
+    num_docs: int = 0
+    total_len: int = 0
+    deleted_since_compact: int = 0
+    indexed_since_compact: int = 0
+
+
+class LexicalIndex:
+    """
+    Thread-safe BM25 index. Searches read the published view without a
+    lock; writers are serialised on the lock and swap in the next view.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()   # writers only
+        self._view = LexicalView()
+        self._lengths = self._view.doc_len   # writer-owned buffer behind view.doc_len, with room to grow
+
+    def add(self, vector_ids: Iterable[int], texts: Iterable[str]):
+        # Tokenize before taking the lock, so other writers only wait for the segment build
+        docs = []
+        for vid, text in zip(vector_ids, texts):
+            counts: Dict[str, int] = {}
+            for token in tokenize(text):
+                counts[token] = counts.get(token, 0) + 1
+            if counts:
+                docs.append((int(vid), counts, sum(counts.values())))
+        if not docs:
+            return
+        with self._lock:
+            view = self._view
+            known = len(view.doc_len)
+            # Slots past the published length are invisible to readers and can be filled in place
+            rewrites = any(vid < known and not view.doc_len[vid] for vid, _, _ in docs)
+            doc_len = self._writable_lengths(max(vid for vid, _, _ in docs) + 1, copy=rewrites)
+            postings: Dict[str, Tuple[List[int], List[int]]] = {}
+            added = added_len = 0
+            for vid, counts, length in docs:
+                if doc_len[vid]:
+                    continue   # already indexed (WAL replay over a snapshot)
+                for token, tf in counts.items():
+                    entry = postings.setdefault(token, ([], []))
+                    entry[0].append(vid)
+                    entry[1].append(min(tf, MAX_TF))
+                doc_len[vid] = length
+                added += 1
+                added_len += length
+            if not added:
+                return
+            self._view = replace(
+                view,
+                segments=view.segments + (_segment(postings),),
+                doc_len=doc_len,
+                num_docs=view.num_docs + added,
+                total_len=view.total_len + added_len,
+                indexed_since_compact=view.indexed_since_compact + added,
+            )
+            if self._churned():
+                self._compact()
+            elif len(self._view.segments) > MAX_SEGMENTS:
+                self._merge_segments()
+
+    def remove(self, vector_ids: Iterable[int]):
+        ids = np.unique(np.fromiter((int(v) for v in vector_ids), dtype=np.int64))
+        with self._lock:
+            view = self._view
+            ids = ids[ids < len(view.doc_len)]
+            lengths = view.doc_len[ids]
+            ids = ids[lengths > 0]
+            if not len(ids):
+                return
+            doc_len = self._writable_lengths(len(view.doc_len), copy=True)
+            doc_len[ids] = 0
+            self._view = replace(
+                view,
+                doc_len=doc_len,
+                num_docs=view.num_docs - len(ids),
+                total_len=view.total_len - int(lengths.sum()),
+                deleted_since_compact=view.deleted_since_compact + len(ids),
+            )
+            if self._churned():
+                self._compact()
+
+    def search(self, query: str, k: int, allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top-k (vector ID, BM25 score), best first; only IDs in `allowed` (sorted) when given."""
+        terms = {t for t in tokenize(query)}
+        return _search(self._view, terms, k, allowed)   # one published view, however writers move on
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def clear(self):
+        with self._lock:
+            self._view = LexicalView()
+            self._lengths = self._view.doc_len
+
+    @property
+    def num_docs(self) -> int:
+        return self._view.num_docs
+
+    @property
+    def num_terms(self) -> int:
+        return len({term for segment in self._view.segments for term in segment.terms})
+
+    def save(self, path: Path):
+        """Write the index; only the compaction runs under the lock, the dump reads the immutable view."""
+        with self._lock:
+            if self._view.deleted_since_compact:
+                self._compact()
+            view = self._view
+        with open(path, "wb") as f:
+            pickle.dump(view, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: Path) -> "LexicalIndex":
+        index = cls()
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        # Snapshots written before the segmented layout hold the array-backed attributes
+        index._view = state if isinstance(state, LexicalView) else _from_arrays(state)
+        index._lengths = index._view.doc_len
+        return index
+
+    # ─────────────────────────── Internals ───────────────────────────────────
+
+    def _writable_lengths(self, size: int, copy: bool) -> np.ndarray:
+        """
+        The next view's doc-length array, at least `size` long. The published
+        one is a prefix of the writer's buffer: new slots past its end are
+        filled in place while the buffer has room, anything else (`copy`)
+        gets a fresh buffer so readers of the current view see no change.
+        """
+        current = self._view.doc_len
+        size = max(size, len(current))
+        if copy or size > len(self._lengths):
+            capacity = len(self._lengths) if size <= len(self._lengths) else max(size, 2 * len(self._lengths), 1024)
+            buffer = np.zeros(capacity, dtype=np.uint32)
+            buffer[:len(current)] = current
+            self._lengths = buffer
+        return self._lengths[:size]
+
+    def _churned(self) -> bool:
+        view = self._view
+        return view.deleted_since_compact > 0.2 * max(view.indexed_since_compact, 1)
+
+    def _merge_segments(self):
+        """
+        Merge segments so a search stays a few lookups per term. A first
+        segment larger than all the others together is kept as is, so
+        segment sizes grow geometrically and each posting is copied
+        O(log n) times, not once per merge.
+        """
+        view = self._view
+        segments = view.segments
+        keep = 1 if segments[0].size > sum(segment.size for segment in segments[1:]) else 0
+        merged = _merge(segments[keep:], view.doc_len)
+        self._view = replace(view, segments=segments[:keep] + (merged,))
+
+    def _compact(self):
+        """Merge every segment into one without the postings of deleted chunks."""
+        view = self._view
+        if not view.segments:
+            return
+        self._view = replace(view, segments=(_merge(view.segments, view.doc_len),),
+                             deleted_since_compact=0, indexed_since_compact=view.num_docs)
+
+
+def _segment(postings: Dict[str, Tuple[Iterable[int], Iterable[int]]]) -> _Segment:
+    terms: Dict[str, int] = {}
+    offsets = [0]
+    id_parts, tf_parts = [], []
+    for term, (ids, tf) in postings.items():
+        ids = np.asarray(ids, dtype=np.uint32)
+        if not len(ids):
+            continue
+        terms[term] = len(terms)
+        id_parts.append(ids)
+        tf_parts.append(np.asarray(tf, dtype=np.uint16))
+        offsets.append(offsets[-1] + len(ids))
+    return _Segment(
+        terms=terms,
+        offsets=np.asarray(offsets, dtype=np.int64),
+        ids=np.concatenate(id_parts) if id_parts else np.zeros(0, dtype=np.uint32),
+        tf=np.concatenate(tf_parts) if tf_parts else np.zeros(0, dtype=np.uint16),
+    )
+
+
+def _merge(segments: Tuple[_Segment, ...], doc_len: np.ndarray) -> _Segment:
+    """One segment with the live postings of `segments`, in segment order."""
+    parts: Dict[str, Tuple[List[np.ndarray], List[np.ndarray]]] = {}
+    for segment in segments:
+        live = doc_len[segment.ids] > 0
+        offsets = segment.offsets.tolist()
+        for term, row in segment.terms.items():
+            start, stop = offsets[row], offsets[row + 1]
+            keep = live[start:stop]
+            entry = parts.setdefault(term, ([], []))
+            entry[0].append(segment.ids[start:stop][keep])
+            entry[1].append(segment.tf[start:stop][keep])
+    return _segment({
+        term: (np.concatenate(ids) if len(ids) > 1 else ids[0], np.concatenate(tf) if len(tf) > 1 else tf[0])
+        for term, (ids, tf) in parts.items()
+    })
+
+
+def _from_arrays(state: Dict) -> LexicalView:
+    postings = {
+        term: (np.frombuffer(state["_post_ids"][tid], dtype=np.uint32),
+               np.frombuffer(state["_post_tf"][tid], dtype=np.uint16))
+        for term, tid in state["_term_ids"].items()
+    }
+    return LexicalView(
+        segments=(_segment(postings),),
+        doc_len=np.frombuffer(state["_doc_len"], dtype=np.uint32).copy(),
+        num_docs=state["_num_docs"],
+        total_len=state["_total_len"],
+        deleted_since_compact=state["_deleted_since_compact"],
+        indexed_since_compact=state["_indexed_since_compact"],
+    )
+
+
+def _search(view: LexicalView, terms: set, k: int, allowed: Optional[np.ndarray]) -> List[Tuple[int, float]]:
+    if view.num_docs == 0:
+        return []
+    k1, b = settings.BM25_K1, settings.BM25_B
+    avg_len = view.total_len / view.num_docs
+
+    id_parts, score_parts = [], []
+    for term in terms:
+        found = [p for p in (segment.postings(term) for segment in view.segments) if p is not None]
+        if not found:
+            continue
+        ids = np.concatenate([ids for ids, _ in found]) if len(found) > 1 else found[0][0]
+        tf = (np.concatenate([tf for _, tf in found]) if len(found) > 1 else found[0][1]).astype(np.float32)
+        lengths = view.doc_len[ids]
+        live = lengths > 0
+        df = int(live.sum())
+        if df == 0:
+            continue
+        idf = math.log(1 + (view.num_docs - df + 0.5) / (df + 0.5))
+        scores = idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths / avg_len))
+        if allowed is not None:
+            live &= np.isin(ids, allowed)
+        id_parts.append(ids[live])
+        score_parts.append(scores[live])
+    if not id_parts:
+        return []
+
+    unique, inverse = np.unique(np.concatenate(id_parts), return_inverse=True)
+    totals = np.bincount(inverse, weights=np.concatenate(score_parts))
+    top = np.argsort(-totals)[:k] if len(totals) <= k else np.argpartition(-totals, k)[:k]
+    top = top[np.argsort(-totals[top])]
+    return [(int(unique[i]), float(totals[i])) for i in top]
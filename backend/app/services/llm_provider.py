@@ -0,0 +1,344 @@
+"""
+LLM Provider
+────────────
+Owns the chat model and how calls to it behave when the upstream is slow
+or failing, so one bad minute at the provider doesn't pile up requests.
+
+  • Connection pool  one shared httpx client per side (sync / async) with
+                     LLM_MAX_CONNECTIONS, reused across requests. The
+                     OpenAI SDK's own retries are off; they happen here.
+  • Timeouts         LLM_CONNECT_TIMEOUT_SECONDS to connect, and a
+                     deadline of LLM_TIMEOUT_SECONDS per attempt (per chunk
+                     when streaming); httpx's read timeout alone only
+                     bounds the gap between bytes.
+  • Retries          LLM_MAX_RETRIES on transient errors only (timeouts,
+                     connection / transport errors, 408, 409, 429, 5xx),
+                     exponential backoff + jitter.
+                     A stream is only retried before its first chunk.
+  • Circuit breaker  after LLM_CIRCUIT_FAILURES consecutive failed attempts,
+                     calls fail fast with LLMUnavailableError for
+                     LLM_CIRCUIT_RESET_SECONDS; then one trial call decides
+                     whether to close it again. A trial that is cancelled
+                     (client gone, hedge lost) hands the slot to the next call.
+  • Hedging          with LLM_HEDGE_AFTER_MS > 0, a non-streaming call that
+                     hasn't returned by then gets a second, identical
+                     request; the first response wins, the other is
+                     cancelled. Trims tail latency at the cost of the extra
+                     (slow-call-only) requests.
+
+LLM_PROVIDER selects the model: "openai" (ChatOpenAI) or "fake" — the
+seeded local model in fake_llm, for offline load tests.
+"""
+
+import asyncio
+import random
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.logger import logger
+
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
+
+
+class LLMUnavailableError(RuntimeError):
+    """The circuit is open: the provider has been failing and calls are short-circuited."""
+
+
+class LLMTimeoutError(TimeoutError):
+    """An LLM call exceeded LLM_TIMEOUT_SECONDS on every attempt."""
+
+
+@dataclass
+class LLMStats:
+    calls: int = 0
+    failures: int = 0            # calls that failed after their retries
+    retries: int = 0
+    timeouts: int = 0            # attempts past the deadline
+    short_circuited: int = 0     # calls refused while the circuit was open
+    circuit_opens: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0          # hedged requests that answered first
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Worth retrying, and counted by the breaker: timeouts, connection and
+    transport errors, and 408 / 409 / 429 / 5xx responses. Anything else —
+    bad requests, auth, or a bug on our side (TypeError, validation and
+    parser errors) — is raised at once.
+    """
+    if isinstance(error, LLMUnavailableError):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):   # incl. LLMTimeoutError, asyncio.TimeoutError
+        return True
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    # Only look at clients that are loaded: an error can't come from one that isn't
+    httpx = sys.modules.get("httpx")
+    if httpx is not None and isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(error, openai.APIConnectionError)   # incl. APITimeoutError
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed → open → half-open (one trial) → closed."""
+
+    def __init__(self):
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < settings.LLM_CIRCUIT_RESET_SECONDS:
+            return "open"
+        return "half_open"
+
+    def before_call(self) -> bool:
+        """Admit a call, or raise LLMUnavailableError. True if it is the half-open trial."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return False
+            if state == "open" or self._trial_in_flight:
+                raise LLMUnavailableError("LLM provider is failing; try again shortly.")
+            self._trial_in_flight = True
+            return True
+
+    def release_trial(self):
+        """The trial ended without a verdict (cancelled, client gone): let the next call try."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Count a failed attempt; True if this opened (or re-opened) the circuit."""
+        with self._lock:
+            self._failures += 1
+            half_open = self._trial_in_flight
+            self._trial_in_flight = False
+            threshold = settings.LLM_CIRCUIT_FAILURES
+            if half_open or (threshold > 0 and self._failures >= threshold and self._opened_at is None):
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+
+class LLMProvider:
+    """
+    Resilient access to the configured chat model. The model (and its HTTP
+    pools) is built on first use, so importing this module costs nothing.
+    """
+
+    def __init__(self):
+        self._model: Optional["BaseChatModel"] = None
+        self._breaker = CircuitBreaker()
+        self.stats = LLMStats()
+
+    @property
+    def model(self) -> "BaseChatModel":
+        if self._model is None:
+            self._model = self._build_model()
+        return self._model
+
+    def use(self, model: "BaseChatModel"):
+        """Swap in a chat model (tests, benchmarks) and reset the breaker."""
+        self._model = model
+        self._breaker = CircuitBreaker()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"provider": settings.LLM_PROVIDER, "circuit": self._breaker.state, **asdict(self.stats)}
+
+    # ── Calls ────────────────────────────────────────────────────────────────
+
+    def invoke(self, messages: List[BaseMessage]):
+        """Blocking call (sync pipeline): retries and breaker; the deadline is httpx's."""
+        self.stats.calls += 1
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            trial = self._before_attempt()
+            try:
+                response = self.model.invoke(messages)
+            except Exception as e:
+                self._after_failure(e, attempt, settings.LLM_MAX_RETRIES)
+                time.sleep(self._backoff(attempt, settings.LLM_RETRY_BACKOFF_SECONDS))
+                continue
+            except BaseException:
+                self._abandon_attempt(trial)
+                raise
+            self._breaker.record_success()
+            metrics.count_tokens(getattr(response, "usage_metadata", None))
+            return response
+
+    async def ainvoke(
+        self,
+        messages: List[BaseMessage],
+        max_retries: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+    ):
+        """Async call with deadline, retries, breaker and (if enabled) hedging."""
+        max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+        backoff_seconds = settings.LLM_RETRY_BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+        self.stats.calls += 1
+        for attempt in range(max_retries + 1):
+            trial = self._before_attempt()
+            try:
+                response = await self._hedged(messages)
+            except Exception as e:
+                self._after_failure(e, attempt, max_retries)
+                await asyncio.sleep(self._backoff(attempt, backoff_seconds))
+                continue
+            except BaseException:   # cancelled: abatch_answer, wait_for, a client that went away
+                self._abandon_attempt(trial)
+                raise
+            self._breaker.record_success()
+            metrics.count_tokens(getattr(response, "usage_metadata", None))
+            return response
+
+    async def astream(self, messages: List[BaseMessage]) -> AsyncIterator[Any]:
+        """Streamed call. Retried only until the first chunk; each chunk must arrive within the deadline."""
+        self.stats.calls += 1
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            trial = self._before_attempt()
+            stream = self.model.astream(messages).__aiter__()
+            started = False
+            try:
+                while True:
+                    try:
+                        chunk = await self._deadline(stream.__anext__())
+                    except StopAsyncIteration:
+                        break
+                    started = True
+                    metrics.count_tokens(getattr(chunk, "usage_metadata", None))
+                    yield chunk
+            except Exception as e:
+                if started:   # chunks already went out: record it, but never retry
+                    self._after_failure(e, settings.LLM_MAX_RETRIES, settings.LLM_MAX_RETRIES)
+                self._after_failure(e, attempt, settings.LLM_MAX_RETRIES)
+                await asyncio.sleep(self._backoff(attempt, settings.LLM_RETRY_BACKOFF_SECONDS))
+                continue
+            except BaseException:   # cancelled, or GeneratorExit when the SSE client disconnects
+                self._abandon_attempt(trial)
+                raise
+            finally:
+                try:
+                    await stream.aclose()
+                except Exception:
+                    pass
+            self._breaker.record_success()
+            return
+
+    # ── Internals ────────────────────────────────────────────────────────────
+
+    async def _hedged(self, messages: List[BaseMessage]):
+        hedge_after = settings.LLM_HEDGE_AFTER_MS / 1000
+        primary = asyncio.ensure_future(self._deadline(self.model.ainvoke(messages)))
+        if hedge_after <= 0 or self._breaker.state != "closed":
+            return await primary
+
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_after)
+            if not done:
+                self.stats.hedges += 1
+                pending.add(asyncio.ensure_future(self._deadline(self.model.ainvoke(messages))))
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.stats.hedge_wins += task is not primary
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _deadline(self, awaitable):
+        try:
+            return await asyncio.wait_for(awaitable, settings.LLM_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            self.stats.timeouts += 1
+            raise LLMTimeoutError(f"LLM call exceeded {settings.LLM_TIMEOUT_SECONDS:g}s")
+
+    def _before_attempt(self) -> bool:
+        try:
+            return self._breaker.before_call()
+        except LLMUnavailableError:
+            self.stats.short_circuited += 1
+            raise
+
+    def _abandon_attempt(self, trial: bool):
+        """An attempt that neither succeeded nor failed; a half-open trial must not stay claimed."""
+        if trial:
+            self._breaker.release_trial()
+
+    def _after_failure(self, error: Exception, attempt: int, max_retries: int):
+        """Record a failed attempt; re-raise unless another attempt is worthwhile."""
+        transient = is_transient(error)
+        if not transient:
+            self._breaker.record_success()   # the provider answered (e.g. 400) or was never reached
+        elif self._breaker.record_failure():
+            self.stats.circuit_opens += 1
+            logger.error(f"LLM circuit opened for {settings.LLM_CIRCUIT_RESET_SECONDS:g}s after: {error}")
+        if not transient or attempt == max_retries:
+            self.stats.failures += 1
+            raise error
+        self.stats.retries += 1
+        logger.warning(f"LLM call failed ({error.__class__.__name__}: {error}); retry {attempt + 1}")
+
+    @staticmethod
+    def _backoff(attempt: int, base_seconds: float) -> float:
+        return base_seconds * 2 ** attempt * random.uniform(0.5, 1.5)
+
+    def _build_model(self) -> "BaseChatModel":
+        if settings.LLM_PROVIDER == "fake":
+            from app.services import fake_llm
+            logger.info("Using the local fake LLM provider")
+            return fake_llm.from_settings()
+
+        if not settings.OPENAI_API_KEY:
+            raise ValueError(
+                "OPENAI_API_KEY is not set. Please add it to your .env file."
+            )
+        import httpx
+        from langchain_openai import ChatOpenAI   # deferred: ~0.5s of openai/httpx imports
+
+        limits = httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        )
+        timeout = httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS)
+        return ChatOpenAI(
+            model=settings.OPENAI_MODEL,
+            temperature=settings.OPENAI_TEMPERATURE,
+            max_tokens=settings.OPENAI_MAX_TOKENS,
+            openai_api_key=settings.OPENAI_API_KEY,
+            stream_usage=True,
+            timeout=timeout,
+            max_retries=0,
+            http_client=httpx.Client(limits=limits, timeout=timeout),
+            http_async_client=httpx.AsyncClient(limits=limits, timeout=timeout),
+        )
+
+
+# Singleton
+llm_provider = LLMProvider()
@@ -0,0 +1,158 @@
+"""
+ONNX Embeddings
+───────────────
+CPU embedding backend (EMBEDDING_BACKEND=onnx): EMBEDDING_MODEL exported to
+ONNX, its weights dynamically quantized to int8 (EMBEDDING_ONNX_INT8), and
+run on ONNX Runtime with the Rust `tokenizers` — serving never imports torch.
+
+  • Texts are ordered by token count and cut into EMBEDDING_BATCH_SIZE
+    batches, each padded only to its own longest text
+  • EMBEDDING_THREADS sets ONNX Runtime's intra-op threads (0 = all cores)
+  • Mean pooling over the attention mask + L2 normalisation, the same head
+    sentence-transformers puts on MiniLM, and the same max_seq_length
+    truncation — so vectors are interchangeable with the torch backend's
+    (benchmarks/bench_embeddings checks the cosine agreement)
+
+Exporting needs torch + sentence-transformers once; it runs on first use if
+EMBEDDING_ONNX_DIR/<model>/ is missing, or ahead of time (e.g. in the image
+build) so the server never loads them:
+
+    python -m app.services.onnx_embeddings
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+from app.core.logger import logger
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model-int8.onnx"
+CONFIG_FILE = "embedding_config.json"
+
+
+def model_dir(model_name: str) -> Path:
+    return Path(settings.EMBEDDING_ONNX_DIR) / model_name.replace("/", "__")
+
+
+class OnnxEmbeddings(Embeddings):
+    """LangChain Embeddings over an exported sentence-transformer. Thread-safe."""
+
+    def __init__(self, model_name: str, int8: bool = True, threads: int = 0, batch_size: int = 32):
+        # Deferred: only this backend needs them
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        directory = model_dir(model_name)
+        if not (directory / CONFIG_FILE).exists():
+            export_model(model_name, directory)
+        config = json.loads((directory / CONFIG_FILE).read_text())
+
+        self.batch_size = max(1, batch_size)
+        self.max_length = config["max_seq_length"]
+        self._tokenizer = Tokenizer.from_file(str(directory / "tokenizer.json"))
+        self._tokenizer.no_padding()
+        self._tokenizer.enable_truncation(max_length=self.max_length)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self._session = ort.InferenceSession(str(directory / (INT8_FILE if int8 else FP32_FILE)),
+                                             sess_options=options, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self._session.get_inputs()}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        encodings = self._tokenizer.encode_batch(list(texts))
+        order = sorted(range(len(texts)), key=lambda i: len(encodings[i].ids))
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            pooled = self._encode([encodings[i] for i in batch])
+            if vectors.shape[1] == 0:
+                vectors = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            vectors[batch] = pooled
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    # ─────────────────────────── Helpers ─────────────────────────────────────
+
+    def _encode(self, encodings) -> np.ndarray:
+        input_ids, attention_mask, type_ids = _pad(encodings)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask, "token_type_ids": type_ids}
+        hidden = self._session.run(None, {name: feeds[name] for name in self._inputs})[0]
+        return _mean_pool(hidden, attention_mask)
+
+
+def _pad(encodings) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Right-pad a batch to its longest member."""
+    width = max(len(e.ids) for e in encodings)
+    input_ids = np.zeros((len(encodings), width), dtype=np.int64)
+    attention_mask = np.zeros_like(input_ids)
+    type_ids = np.zeros_like(input_ids)
+    for row, e in enumerate(encodings):
+        input_ids[row, :len(e.ids)] = e.ids
+        attention_mask[row, :len(e.ids)] = e.attention_mask
+        type_ids[row, :len(e.ids)] = e.type_ids
+    return input_ids, attention_mask, type_ids
+
+
+def _mean_pool(hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    mask = attention_mask[..., None].astype(np.float32)
+    pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+    return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+
+def export_model(model_name: str, directory: Path):
+    """Export `model_name` to `directory` (ONNX fp32 + int8, tokenizer, config), atomically."""
+    # Deferred: export-time only
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    logger.info(f"Exporting {model_name} to ONNX under {directory} ...")
+    model = SentenceTransformer(model_name, device="cpu")
+    pooling = model[1].get_pooling_mode_str() if len(model) > 1 else "none"
+    if pooling != "mean":
+        raise ValueError(f"{model_name}: ONNX backend supports mean-pooling models only, not {pooling!r}")
+
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{directory.name}-", dir=directory.parent))
+    try:
+        transformer = model[0].auto_model.eval()
+        transformer.config.return_dict = False   # plain tuple out, last_hidden_state first
+        sample = model.tokenizer(["warm-up"], return_tensors="pt")
+        names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+        axes = {n: {0: "batch", 1: "sequence"} for n in names + ["last_hidden_state"]}
+        with torch.no_grad():
+            torch.onnx.export(transformer, ({n: sample[n] for n in names},), str(tmp / FP32_FILE),
+                              input_names=names, output_names=["last_hidden_state"],
+                              dynamic_axes=axes, opset_version=14)
+        quantize_dynamic(str(tmp / FP32_FILE), str(tmp / INT8_FILE), weight_type=QuantType.QInt8)
+        model.tokenizer.save_pretrained(str(tmp))
+        (tmp / CONFIG_FILE).write_text(json.dumps({
+            "model": model_name,
+            "max_seq_length": model.max_seq_length,
+            "dimension": model.get_sentence_embedding_dimension(),
+        }))
+        if directory.exists():
+            shutil.rmtree(directory)
+        os.replace(tmp, directory)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    logger.info(f"  ✓ Exported {model_name} ({FP32_FILE}, {INT8_FILE})")
+
+
+if __name__ == "__main__":
+    export_model(settings.EMBEDDING_MODEL, model_dir(settings.EMBEDDING_MODEL))
@@ -0,0 +1,152 @@
+"""
+Query Embedder
+──────────────
+Front-end for embedding user queries (not document chunks):
+
+  • LRU cache of query → vector, so repeated / cached-path questions skip
+    the sentence-transformer entirely
+  • Micro-batcher: queries arriving within QUERY_BATCH_WAIT_MS of each other
+    are embedded together in one batched `encode` call (up to
+    QUERY_BATCH_MAX_SIZE), instead of one forward pass per request
+
+Callers are threadpool workers (retrieval is sync), so batching is done by a
+single daemon thread draining a queue; callers block on a Future.
+"""
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.logger import logger
+
+
+class QueryEmbedder:
+    """
+    Thread-safe cached + micro-batched wrapper around an `embed_batch(texts)` callable.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], List[List[float]]],
+        cache_size: int,
+        batch_max_size: int,
+        batch_wait_ms: float,
+    ):
+        self._embed_batch = embed_batch
+        self.cache_size = cache_size
+        self.batch_max_size = batch_max_size
+        self.batch_wait_ms = batch_wait_ms
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self.batched_queries = 0
+
+    def embed(self, text: str) -> List[float]:
+        cached = self._cache_get(text)
+        if cached is not None:
+            return cached
+
+        if self.batch_wait_ms <= 0 or self.batch_max_size <= 1:
+            vector = self._embed_batch([text])[0]
+        else:
+            self._ensure_worker()
+            future: Future = Future()
+            self._queue.put((text, future))
+            vector = future.result()
+
+        self._cache_put(text, vector)
+        return vector
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Cache hits, plus one direct `embed_batch` call for the misses (no micro-batch wait)."""
+        vectors: Dict[str, List[float]] = {}
+        for text in texts:
+            cached = self._cache_get(text)
+            if cached is not None:
+                vectors[text] = cached
+        missing = [text for text in dict.fromkeys(texts) if text not in vectors]
+        if missing:
+            for text, vector in zip(missing, self._embed_batch(missing)):
+                vectors[text] = vector
+                self._cache_put(text, vector)
+            self.batches += 1
+            self.batched_queries += len(missing)
+        return [vectors[text] for text in texts]
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._cache_lock:
+            return {
+                "size": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "batches": self.batches,
+                "batched_queries": self.batched_queries,
+            }
+
+    # ─────────────────────────── Cache ───────────────────────────────────────
+
+    def _cache_get(self, text: str) -> Optional[List[float]]:
+        with self._cache_lock:
+            vector = self._cache.get(text)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(text)
+            self.hits += 1
+            return vector
+
+    def _cache_put(self, text: str, vector: List[float]):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[text] = vector
+            self._cache.move_to_end(text)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # ─────────────────────────── Micro-batching ──────────────────────────────
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="query-embedder", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait_ms / 1000
+            while len(batch) < self.batch_max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[str, Future]]):
+        # Identical concurrent queries share one slot in the batch
+        unique = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = dict(zip(unique, self._embed_batch(unique)))
+        except Exception as e:
+            logger.error(f"Query embedding batch failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.batched_queries += len(batch)
+        for text, future in batch:
+            future.set_result(vectors[text])
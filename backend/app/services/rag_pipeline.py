@@ -4,6 +4,7 @@ RAG Pipeline
 Orchestrates the full Retrieval-Augmented Generation pipeline:
 
   1. Retrieve relevant chunks via FAISS similarity search
+     (optionally a wider set, rescored by a cross-encoder — see reranker)
   2. Build a context-rich prompt with conversation history
   3. Call OpenAI GPT-4 for generation
   4. Return answer + source attribution
@@ -16,17 +17,27 @@ Architecture:
                                                     GPT-4 Prompt ──▶ Answer + Sources
 """
 
+import asyncio
+import contextvars
 import time
-from typing import List, Tuple, Optional
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Tuple, Optional
 
-from langchain_openai import ChatOpenAI
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
 from langchain.schema import Document, HumanMessage, AIMessage, SystemMessage
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 
+from app.core import metrics
 from app.core.config import settings
 from app.core.logger import logger
-from app.models.schemas import ChatMessage, SourceChunk
+from app.models.schemas import ChatMessage, RetrievalFilter, SourceChunk
 from app.services.vector_store import vector_store_service
+from app.services.answer_cache import CachedAnswer, answer_cache
+from app.services.semantic_cache import semantic_cache
+from app.services.llm_provider import llm_provider
+from app.services.reranker import reranker
+from app.services import token_counter
 
 
 # ─────────────────────────── System Prompt ───────────────────────────────────
@@ -46,6 +57,49 @@ CONTEXT FROM DOCUMENTS:
 {context}
 """
 
+NO_DOCUMENTS_ANSWER = (
+    "No documents have been uploaded yet. "
+    "Please upload a PDF, TXT, Markdown, or DOCX file to get started."
+)
+
+NO_MATCHING_DOCUMENTS_ANSWER = "None of the uploaded documents match the requested filters."
+
+SUMMARY_PROMPT = """Maintain a running summary of a conversation between a user and an assistant that answers questions about the user's documents.
+
+Merge the new messages into the current summary. Keep what later questions may refer back to: the topics asked about, facts and figures given, document names, and anything left unresolved. Drop greetings and repetition. Reply with the updated summary only, in at most {max_words} words.
+
+CURRENT SUMMARY:
+{summary}
+
+NEW MESSAGES:
+{messages}
+"""
+
+MESSAGE_OVERHEAD_TOKENS = 4     # chat-format framing per message
+SEPARATOR_TOKENS = 2            # "\n\n" between context sources
+
+
+_rerank_report: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "rag_rerank_report", default=None
+)
+
+
+def start_rerank_report() -> Dict[str, Any]:
+    """Collect the current request's rerank report (see RerankReport) into the returned dict."""
+    report: Dict[str, Any] = {}
+    _rerank_report.set(report)
+    return report
+
+
+@dataclass
+class PreparedQuery:
+    """Result of the pre-LLM stages for one question."""
+    ready: Optional[CachedAnswer] = None          # set → skip the LLM entirely
+    inputs: Dict[str, Any] = field(default_factory=dict)
+    sources: List[SourceChunk] = field(default_factory=list)
+    cache_key: Optional[str] = None
+    question_vector: Optional[np.ndarray] = None
+
 
 class RAGPipeline:
     """
@@ -53,27 +107,23 @@ class RAGPipeline:
     """
 
     def __init__(self):
-        self._llm: Optional[ChatOpenAI] = None
-
-    def _get_llm(self) -> ChatOpenAI:
-        if self._llm is None:
-            if not settings.OPENAI_API_KEY:
-                raise ValueError(
-                    "OPENAI_API_KEY is not set. Please add it to your .env file."
-                )
-            self._llm = ChatOpenAI(
-                model=settings.OPENAI_MODEL,
-                temperature=settings.OPENAI_TEMPERATURE,
-                max_tokens=settings.OPENAI_MAX_TOKENS,
-                openai_api_key=settings.OPENAI_API_KEY,
-            )
-        return self._llm
+        self._system_tokens: Optional[int] = None
+        self._prompt = ChatPromptTemplate.from_messages([
+            ("system", SYSTEM_PROMPT),
+            MessagesPlaceholder(variable_name="history"),
+            ("human", "{question}"),
+        ])
+        self._summary_prompt = ChatPromptTemplate.from_messages([("human", SUMMARY_PROMPT)])
+        vector_store_service.add_change_listener(answer_cache.invalidate_doc)
+        vector_store_service.add_change_listener(semantic_cache.invalidate_doc)
 
     def answer(
         self,
         question: str,
         conversation_history: List[ChatMessage] = None,
         top_k: int = None,
+        hybrid_weight: float = None,
+        filters: RetrievalFilter = None,
     ) -> Tuple[str, List[SourceChunk], int, int]:
         """
         Full RAG answer pipeline.
@@ -82,31 +132,405 @@ class RAGPipeline:
             (answer_text, source_chunks, tokens_used, response_time_ms)
         """
         start_time = time.time()
-        top_k = top_k or settings.TOP_K
+
+        # ── Steps 1-3: Caches, retrieval, context + messages ─────────────────
+        prepared = self._prepare(question, conversation_history, top_k, hybrid_weight, filters)
+        if prepared.ready is not None:
+            return prepared.ready.answer, prepared.ready.sources, 0, int((time.time() - start_time) * 1000)
+
+        # ── Step 4: LLM Call ──────────────────────────────────────────────────
+        with metrics.stage("chat", "llm"):
+            response = llm_provider.invoke(self._prompt.format_messages(**prepared.inputs))
+
+        answer_text = response.content
+        tokens_used = self._tokens_used(response)
+        response_time_ms = int((time.time() - start_time) * 1000)
+        self._remember(prepared, answer_text)
+
+        logger.info(f"  ✓ Response in {response_time_ms}ms | tokens={tokens_used}")
+
+        return answer_text, prepared.sources, tokens_used, response_time_ms
+
+    async def aanswer(
+        self,
+        question: str,
+        conversation_history: List[ChatMessage] = None,
+        top_k: int = None,
+        hybrid_weight: float = None,
+        filters: RetrievalFilter = None,
+    ) -> Tuple[str, List[SourceChunk], int, int]:
+        """
+        Async variant of `answer`: retrieval runs in the threadpool and the
+        LLM is awaited, so the event loop is free for other requests.
+        """
+        start_time = time.time()
+
+        prepared = await run_in_threadpool(self._prepare, question, conversation_history, top_k, hybrid_weight, filters)
+        if prepared.ready is not None:
+            return prepared.ready.answer, prepared.ready.sources, 0, int((time.time() - start_time) * 1000)
+
+        with metrics.stage("chat", "llm"):
+            response = await llm_provider.ainvoke(self._prompt.format_messages(**prepared.inputs))
+
+        answer_text = response.content
+        tokens_used = self._tokens_used(response)
+        response_time_ms = int((time.time() - start_time) * 1000)
+        self._remember(prepared, answer_text)
+
+        logger.info(f"  ✓ Response in {response_time_ms}ms | tokens={tokens_used}")
+
+        return answer_text, prepared.sources, tokens_used, response_time_ms
+
+    async def astream_answer(
+        self,
+        question: str,
+        conversation_history: List[ChatMessage] = None,
+        top_k: int = None,
+        hybrid_weight: float = None,
+        filters: RetrievalFilter = None,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming RAG pipeline. Yields (event, payload) pairs:
+
+            ("sources", [SourceChunk, ...])   — once, before any tokens
+            ("token",   "text delta")         — per LLM chunk
+            ("done",    {"tokens_used", "response_time_ms"})
+        """
+        start_time = time.time()
+
+        prepared = await run_in_threadpool(self._prepare, question, conversation_history, top_k, hybrid_weight, filters)
+        if prepared.ready is not None:
+            yield "sources", prepared.ready.sources
+            yield "token", prepared.ready.answer
+            yield "done", {"tokens_used": 0, "response_time_ms": int((time.time() - start_time) * 1000)}
+            return
+
+        yield "sources", prepared.sources
+
+        tokens_used = 0
+        first_token_ms = None
+        parts: List[str] = []
+        llm_start = time.perf_counter()
+        async for chunk in llm_provider.astream(self._prompt.format_messages(**prepared.inputs)):
+            usage = getattr(chunk, "usage_metadata", None)
+            if usage:
+                tokens_used = usage.get("total_tokens", tokens_used)
+            if chunk.content:
+                if first_token_ms is None:
+                    first_token_ms = int((time.time() - start_time) * 1000)
+                    metrics.record_stage("chat", "llm_first_token", time.perf_counter() - llm_start)
+                parts.append(chunk.content)
+                yield "token", chunk.content
+
+        metrics.record_stage("chat", "llm", time.perf_counter() - llm_start)
+        response_time_ms = int((time.time() - start_time) * 1000)
+        self._remember(prepared, "".join(parts))
+        logger.info(f"  ✓ Streamed in {response_time_ms}ms (first token {first_token_ms}ms) | tokens={tokens_used}")
+        yield "done", {"tokens_used": tokens_used, "response_time_ms": response_time_ms}
+
+    async def abatch_answer(
+        self,
+        questions: List[str],
+        top_k: int = None,
+        hybrid_weight: float = None,
+        filters: RetrievalFilter = None,
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        Answer many stand-alone questions. Retrieval for the whole batch is one
+        embed call and one multi-query index search; LLM calls then fan out,
+        at most BATCH_LLM_CONCURRENCY at a time, each retried up to
+        BATCH_LLM_MAX_RETRIES times (see llm_provider).
+
+        Yields (index, (answer_text, source_chunks, tokens_used, response_time_ms))
+        in completion order — or (index, exception) for a question that failed
+        after its retries. Repeated questions share one LLM call.
+        """
+        start_time = time.time()
+        unique = list(dict.fromkeys(questions))
+        positions: Dict[str, List[int]] = {}
+        for i, question in enumerate(questions):
+            positions.setdefault(question, []).append(i)
+
+        prepared_all = await run_in_threadpool(self._prepare_batch, unique, top_k, hybrid_weight, filters)
+        semaphore = asyncio.Semaphore(settings.BATCH_LLM_CONCURRENCY)
+
+        async def run(question: str, prepared: PreparedQuery):
+            try:
+                if prepared.ready is not None:
+                    return question, (prepared.ready.answer, prepared.ready.sources, 0,
+                                      int((time.time() - start_time) * 1000))
+                async with semaphore:
+                    with metrics.stage("chat", "llm"):
+                        response = await llm_provider.ainvoke(
+                            self._prompt.format_messages(**prepared.inputs),
+                            max_retries=settings.BATCH_LLM_MAX_RETRIES,
+                            backoff_seconds=settings.BATCH_RETRY_BACKOFF_SECONDS,
+                        )
+                self._remember(prepared, response.content)
+                return question, (response.content, prepared.sources, self._tokens_used(response),
+                                  int((time.time() - start_time) * 1000))
+            except Exception as e:
+                logger.error(f"Batch question failed: {e}")
+                return question, e
+
+        tasks = [asyncio.ensure_future(run(q, p)) for q, p in zip(unique, prepared_all)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                question, result = await next_done
+                for i in positions[question]:
+                    yield i, result
+        finally:
+            for task in tasks:
+                task.cancel()
+        logger.info(f"  ✓ Batch of {len(questions)} answered in {int((time.time() - start_time) * 1000)}ms")
+
+    # ─────────────────────────── Pipeline Steps ──────────────────────────────
+
+    def _prepare(
+        self,
+        question: str,
+        conversation_history: Optional[List[ChatMessage]],
+        top_k: Optional[int],
+        hybrid_weight: Optional[float] = None,
+        filters: Optional[RetrievalFilter] = None,
+    ) -> PreparedQuery:
+        """
+        Everything before the LLM call (CPU-bound; the async paths run it in
+        the threadpool). Short-circuits with `ready` set on a cache hit or an
+        empty store.
+        """
         conversation_history = conversation_history or []
+        prepared = PreparedQuery()
+
+        # Semantic cache: stand-alone questions over the whole corpus only
+        if settings.SEMANTIC_CACHE_ENABLED and not conversation_history and filters is None:
+            prepared.question_vector = semantic_cache.embed(question)
+            prepared.ready = semantic_cache.lookup(prepared.question_vector)
+            if prepared.ready is not None:
+                return prepared
 
         # ── Step 1: Retrieve relevant chunks ─────────────────────────────────
-        retrieved: List[Tuple[Document, float]] = vector_store_service.similarity_search(
-            query=question,
-            k=top_k,
-        )
+        retrieved = self._retrieve(question, top_k, hybrid_weight, filters)
+        return self._prepare_retrieved(prepared, question, conversation_history, retrieved, filters, top_k)
+
+    def _prepare_retrieved(
+        self,
+        prepared: PreparedQuery,
+        question: str,
+        conversation_history: List[ChatMessage],
+        retrieved: List[Tuple[Document, float]],
+        filters: Optional[RetrievalFilter],
+        top_k: Optional[int],
+    ) -> PreparedQuery:
+        """The post-retrieval half of `_prepare`: answer cache, reranking, then prompt inputs."""
+        if self._lookup_ready(prepared, question, conversation_history, retrieved, filters):
+            return prepared
+
+        kept, reranked = retrieved, None
+        if settings.RERANK_ENABLED:
+            start = time.perf_counter()
+            with metrics.stage("chat", "rerank"):
+                kept, cache_hits = reranker.rerank(question, retrieved, self._rerank_keep(top_k))
+            reranked = (len(retrieved), cache_hits, (time.perf_counter() - start) * 1000)
 
+        # ── Steps 2-3: Build context + messages ──────────────────────────────
+        with metrics.stage("chat", "context"):
+            prepared.inputs, prepared.sources = self._build_inputs(question, conversation_history, kept)
+        if reranked is not None:
+            self._report_rerank(question, conversation_history, retrieved[:top_k or settings.TOP_K],
+                                prepared, *reranked)
+        return prepared
+
+    def _lookup_ready(
+        self,
+        prepared: PreparedQuery,
+        question: str,
+        conversation_history: List[ChatMessage],
+        retrieved: List[Tuple[Document, float]],
+        filters: Optional[RetrievalFilter],
+    ) -> bool:
+        """Set `prepared.ready` for an empty result or an answer cache hit; True if it was set."""
         if not retrieved:
-            answer = (
-                "No documents have been uploaded yet. "
-                "Please upload a PDF, TXT, Markdown, or DOCX file to get started."
+            answer = NO_DOCUMENTS_ANSWER if filters is None else NO_MATCHING_DOCUMENTS_ANSWER
+            prepared.ready = CachedAnswer(answer=answer, sources=[], doc_ids=set(), expires_at=0)
+            return True
+
+        if settings.ANSWER_CACHE_ENABLED:
+            # Keyed on the candidates, so a hit skips reranking too
+            prepared.cache_key = answer_cache.make_key(question, retrieved, self._history_window(conversation_history))
+            prepared.ready = answer_cache.get(prepared.cache_key)
+            if prepared.ready is not None:
+                logger.info("  ✓ Answer cache hit")
+                return True
+        return False
+
+    def _prepare_batch(
+        self,
+        questions: List[str],
+        top_k: Optional[int],
+        hybrid_weight: Optional[float],
+        filters: Optional[RetrievalFilter],
+    ) -> List[PreparedQuery]:
+        """
+        `_prepare` for many stand-alone questions, sharing one embed call, one
+        index search and (with reranking on) one cross-encoder predict call.
+        """
+        prepared = [PreparedQuery() for _ in questions]
+        # One batched encode; it also fills the query LRU that semantic_cache.embed reads
+        vectors = vector_store_service.embed_queries(questions)
+
+        if settings.SEMANTIC_CACHE_ENABLED and filters is None:
+            for item, question in zip(prepared, questions):
+                item.question_vector = semantic_cache.embed(question)
+                item.ready = semantic_cache.lookup(item.question_vector)
+
+        pending = [i for i, item in enumerate(prepared) if item.ready is None]
+        if pending:
+            retrieved = vector_store_service.similarity_search_batch(
+                [questions[i] for i in pending],
+                k=self._retrieve_k(top_k),
+                hybrid_weight=hybrid_weight,
+                filters=filters,
+                embeddings=[vectors[i] for i in pending],
             )
-            return answer, [], 0, int((time.time() - start_time) * 1000)
+            todo = [(i, hits) for i, hits in zip(pending, retrieved)
+                    if not self._lookup_ready(prepared[i], questions[i], [], hits, filters)]
+            if settings.RERANK_ENABLED and todo:
+                with metrics.stage("chat", "rerank"):
+                    kept, _ = reranker.rerank_many([questions[i] for i, _ in todo], [hits for _, hits in todo],
+                                                   self._rerank_keep(top_k))
+                todo = [(i, hits) for (i, _), hits in zip(todo, kept)]
+            for i, hits in todo:
+                with metrics.stage("chat", "context"):
+                    prepared[i].inputs, prepared[i].sources = self._build_inputs(questions[i], [], hits)
+        logger.info(f"Prepared batch of {len(questions)} questions ({len(pending)} retrieved)")
+        return prepared
+
+    async def asummarize(self, summary: str, messages: List[ChatMessage]) -> str:
+        """Fold `messages` into a conversation's running `summary` (see conversation_memory)."""
+        transcript = "\n".join(f"{m.role.capitalize()}: {m.content}" for m in messages)
+        response = await llm_provider.ainvoke(self._summary_prompt.format_messages(
+            summary=summary or "(none yet)",
+            messages=transcript,
+            max_words=settings.SESSION_SUMMARY_MAX_TOKENS * 3 // 4,
+        ))
+        return response.content
+
+    def _remember(self, prepared: PreparedQuery, answer_text: str):
+        """Store a freshly generated answer in whichever caches were consulted."""
+        if not answer_text:
+            return
+        if prepared.cache_key is not None:
+            answer_cache.put(prepared.cache_key, answer_text, prepared.sources)
+        if prepared.question_vector is not None:
+            semantic_cache.put(prepared.question_vector, answer_text, prepared.sources)
+
+    def _retrieve(
+        self,
+        question: str,
+        top_k: Optional[int],
+        hybrid_weight: Optional[float] = None,
+        filters: Optional[RetrievalFilter] = None,
+    ) -> List[Tuple[Document, float]]:
+        return vector_store_service.similarity_search(
+            query=question,
+            k=self._retrieve_k(top_k),
+            hybrid_weight=hybrid_weight,
+            filters=filters,
+        )
+
+    @staticmethod
+    def _retrieve_k(top_k: Optional[int]) -> int:
+        """Chunks to retrieve: top_k, or the wider candidate set when reranking."""
+        k = top_k or settings.TOP_K
+        return max(k, settings.RERANK_CANDIDATES) if settings.RERANK_ENABLED else k
+
+    @staticmethod
+    def _rerank_keep(top_k: Optional[int]) -> int:
+        return min(top_k or settings.TOP_K, settings.RERANK_TOP_N)
+
+    def _report_rerank(
+        self,
+        question: str,
+        conversation_history: List[ChatMessage],
+        unranked: List[Tuple[Document, float]],
+        prepared: PreparedQuery,
+        candidates: int,
+        cache_hits: int,
+        rerank_ms: float,
+    ):
+        """
+        Log what reranking cost and saved, and fill the request's rerank report
+        if one was started. The saving is measured against the prompt the
+        top_k chunks in retrieval order would have produced.
+        """
+        unranked_inputs, _ = self._build_inputs(question, conversation_history, unranked, log=False)
+        context_tokens = token_counter.count_tokens(prepared.inputs["context"])
+        saved = token_counter.count_tokens(unranked_inputs["context"]) - context_tokens
+        logger.info(f"  ✓ Reranked {candidates} → {len(prepared.sources)} chunks in {rerank_ms:.0f}ms "
+                    f"({cache_hits} cached); context {context_tokens} tokens, {saved} saved")
+        report = _rerank_report.get()
+        if report is not None:
+            report.update(candidates=candidates, kept=len(prepared.sources), cache_hits=cache_hits,
+                          rerank_ms=round(rerank_ms, 2), context_tokens=context_tokens,
+                          context_tokens_saved=saved)
+
+    def _build_inputs(
+        self,
+        question: str,
+        conversation_history: List[ChatMessage],
+        retrieved: List[Tuple[Document, float]],
+        log: bool = True,
+    ) -> Tuple[Dict[str, Any], List[SourceChunk]]:
+        """
+        Build the prompt variables (context, history, question) and source
+        citations within PROMPT_TOKEN_BUDGET: system prompt, question and
+        history are counted first, then retrieved chunks are packed best
+        first. A chunk that no longer fits is shortened at a sentence
+        boundary if at least CONTEXT_MIN_CHUNK_TOKENS remain, else skipped.
+        Only chunks that made it into the context are cited.
+        """
+        if self._system_tokens is None:
+            self._system_tokens = token_counter.count_tokens(SYSTEM_PROMPT.format(context=""))
+
+        # History: system notes (a session's running summary) first, then the
+        # last 6 turns, dropping the oldest past HISTORY_TOKEN_BUDGET
+        window = self._history_window(conversation_history)
+        notes = [m for m in window if m.role == "system"]
+        notes_messages, history_messages, history_tokens = [], [], 0
+        for msg in notes:
+            content = token_counter.truncate(msg.content, settings.HISTORY_TOKEN_BUDGET // 2)
+            history_tokens += token_counter.count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+            notes_messages.append(SystemMessage(content=content))
+        for msg in reversed(window[len(notes):]):
+            tokens = token_counter.count_tokens(msg.content) + MESSAGE_OVERHEAD_TOKENS
+            if history_tokens + tokens > settings.HISTORY_TOKEN_BUDGET:
+                break
+            history_tokens += tokens
+            history_messages.insert(0, HumanMessage(content=msg.content) if msg.role == "user"
+                                    else AIMessage(content=msg.content))
+        history_messages = notes_messages + history_messages
+
+        used = (self._system_tokens + token_counter.count_tokens(question)
+                + 2 * MESSAGE_OVERHEAD_TOKENS + history_tokens)
+        remaining = settings.PROMPT_TOKEN_BUDGET - used
 
-        # ── Step 2: Build context string ──────────────────────────────────────
         sources: List[SourceChunk] = []
         context_parts = []
-
         for i, (doc, score) in enumerate(retrieved):
             meta = doc.metadata
-            content_snippet = doc.page_content.replace("\n", " ")
-            context_parts.append(f"Source {i+1} ({meta.get('filename', 'unknown')}): {content_snippet}")
-            
+            header = f"Source {len(context_parts) + 1} ({meta.get('filename', 'unknown')}): "
+            cost = token_counter.count_tokens(header) + token_counter.chunk_tokens(doc) + SEPARATOR_TOKENS
+            text = doc.page_content
+            if cost > remaining:
+                room = remaining - (cost - token_counter.chunk_tokens(doc)) - 2
+                if room < settings.CONTEXT_MIN_CHUNK_TOKENS:
+                    continue
+                text = token_counter.truncate(text, room)
+                cost = remaining
+            remaining -= cost
+            context_parts.append(header + text.replace("\n", " "))
+
             sources.append(SourceChunk(
                 doc_id=meta.get("doc_id", ""),
                 filename=meta.get("filename", "unknown"),
@@ -115,47 +539,28 @@ class RAGPipeline:
                 relevance_score=round(float(score), 4),
             ))
 
-        context = "\n\n".join(context_parts)
-
-        # ── Step 3: Build messages with ChatPromptTemplate ────────────────────
-        
-        # Guard against huge context
-        if len(context) > 40000: # Approx 10k tokens safe limit for standard use, adjust as needed
-             logger.warning(f"Context too large ({len(context)} chars), truncating...")
-             context = context[:40000] + "...(truncated)"
+        prompt_tokens = settings.PROMPT_TOKEN_BUDGET - remaining
+        if log:
+            logger.info(f"Calling {settings.OPENAI_MODEL} with {len(history_messages)} history msgs, "
+                        f"{len(context_parts)}/{len(retrieved)} chunks, ~{prompt_tokens} prompt tokens...")
 
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", SYSTEM_PROMPT),
-            MessagesPlaceholder(variable_name="history"),
-            ("human", "{question}"),
-        ])
-
-        # Prepare history
-        history_messages = []
-        for msg in conversation_history[-6:]:
-            if msg.role == "user":
-                history_messages.append(HumanMessage(content=msg.content))
-            elif msg.role == "assistant":
-                history_messages.append(AIMessage(content=msg.content))
-        
-        chain = prompt_template | self._get_llm()
-
-        # ── Step 4: LLM Call ──────────────────────────────────────────────────
-        logger.info(f"Calling {settings.OPENAI_MODEL} with {len(history_messages)} history msgs, {len(retrieved)} chunks...")
-        
-        response = chain.invoke({
-            "context": context,
+        inputs = {
+            "context": "\n\n".join(context_parts),
             "history": history_messages,
-            "question": question
-        })
+            "question": question,
+        }
+        return inputs, sources
 
-        answer_text = response.content
-        tokens_used = response.response_metadata.get("token_usage", {}).get("total_tokens", 0)
-        response_time_ms = int((time.time() - start_time) * 1000)
-
-        logger.info(f"  ✓ Response in {response_time_ms}ms | tokens={tokens_used}")
+    @staticmethod
+    def _history_window(conversation_history: List[ChatMessage]) -> List[ChatMessage]:
+        """The history the prompt draws on: system notes, then the last 6 user/assistant turns."""
+        notes = [m for m in conversation_history if m.role == "system"]
+        turns = [m for m in conversation_history if m.role in ("user", "assistant")]
+        return notes + turns[-6:]
 
-        return answer_text, sources, tokens_used, response_time_ms
+    @staticmethod
+    def _tokens_used(response) -> int:
+        return response.response_metadata.get("token_usage", {}).get("total_tokens", 0)
 
 
 # Singleton
@@ -0,0 +1,147 @@
+"""
+Reranker
+────────
+Optional second retrieval stage (RERANK_ENABLED): the vector store returns
+RERANK_CANDIDATES chunks cheaply, a cross-encoder (RERANK_MODEL) reads each
+(question, chunk) pair together and rescores it, and only the best
+RERANK_TOP_N go into the prompt.
+
+  • CPU inference, RERANK_BATCH_SIZE pairs per forward pass; a /chat/batch
+    request scores every question's candidates in one predict call
+  • LRU cache of (question, chunk content hash) → score, so a repeated
+    question, or one whose candidates overlap an earlier one, only scores
+    the pairs it hasn't seen
+  • Pairs are truncated to RERANK_MAX_LENGTH tokens for scoring only; the
+    prompt still gets the full chunk
+
+Scores are cross-encoder logits, used for ordering only: sources keep the
+dense relevance score they were retrieved with.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain.schema import Document
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.document_processor import chunk_content_hash
+
+
+class Reranker:
+    """Cross-encoder scoring with a (question, chunk) score cache. Thread-safe."""
+
+    def __init__(self, cache_size: int):
+        self.cache_size = cache_size
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+
+    def use(self, model):
+        """Swap in a scoring model with CrossEncoder's `predict(pairs, batch_size=...)` (tests, benchmarks)."""
+        self._model = model
+        with self._cache_lock:
+            self._cache.clear()
+
+    def rerank(
+        self, question: str, retrieved: List[Tuple[Document, float]], keep: int
+    ) -> Tuple[List[Tuple[Document, float]], int]:
+        """The `keep` best of `retrieved` by cross-encoder score, plus how many scores came from the cache."""
+        ranked, hits = self.rerank_many([question], [retrieved], keep)
+        return ranked[0], hits[0]
+
+    def rerank_many(
+        self, questions: Sequence[str], retrieved: Sequence[List[Tuple[Document, float]]], keep: int
+    ) -> Tuple[List[List[Tuple[Document, float]]], List[int]]:
+        """`rerank` per question, scoring every uncached pair of the batch in one predict call."""
+        keys = [[(question.strip(), self._content_hash(doc)) for doc, _ in hits]
+                for question, hits in zip(questions, retrieved)]
+        scores: Dict[Tuple[str, str], float] = {}
+        cache_hits = []
+        for question_keys in keys:
+            found = self._cache_get_many(question_keys)
+            cache_hits.append(len(found))
+            scores.update(found)
+
+        missing: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        for question, hits, question_keys in zip(questions, retrieved, keys):
+            for (doc, _), key in zip(hits, question_keys):
+                if key not in scores and key not in missing:
+                    missing[key] = (question, doc.page_content)
+        if missing:
+            fresh = self._get_model().predict(list(missing.values()), batch_size=settings.RERANK_BATCH_SIZE,
+                                              show_progress_bar=False)
+            new_scores = dict(zip(missing, (float(s) for s in fresh)))
+            self._cache_put_many(new_scores)
+            scores.update(new_scores)
+            self.batches += 1
+
+        ranked = []
+        for hits, question_keys in zip(retrieved, keys):
+            order = sorted(range(len(hits)), key=lambda i: scores[question_keys[i]], reverse=True)
+            ranked.append([hits[i] for i in order[:keep]])
+        return ranked, cache_hits
+
+    def warm_up(self):
+        """Load the model and score one pair, so the first reranked request doesn't pay for it."""
+        try:
+            start = time.perf_counter()
+            self._get_model().predict([("warm-up", "warm-up")], show_progress_bar=False)
+            logger.info(f"  ✓ Reranker {settings.RERANK_MODEL} ready in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            logger.error(f"Reranker warm-up failed: {e}")
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._cache_lock:
+            return {"size": len(self._cache), "hits": self.hits, "misses": self.misses, "batches": self.batches}
+
+    # ─────────────────────────── Helpers ─────────────────────────────────────
+
+    def _get_model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    # Deferred: pulls in torch + sentence-transformers
+                    from sentence_transformers import CrossEncoder
+
+                    logger.info(f"Loading reranker: {settings.RERANK_MODEL}")
+                    self._model = CrossEncoder(settings.RERANK_MODEL, device="cpu",
+                                               max_length=settings.RERANK_MAX_LENGTH)
+        return self._model
+
+    @staticmethod
+    def _content_hash(doc: Document) -> str:
+        return doc.metadata.get("content_hash") or chunk_content_hash(doc.page_content)
+
+    def _cache_get_many(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], float]:
+        found = {}
+        with self._cache_lock:
+            for key in keys:
+                score = self._cache.get(key)
+                if score is None:
+                    self.misses += 1
+                    continue
+                self._cache.move_to_end(key)
+                self.hits += 1
+                found[key] = score
+        return found
+
+    def _cache_put_many(self, scores: Dict[Tuple[str, str], float]):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            for key, score in scores.items():
+                self._cache[key] = score
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+# Singleton
+reranker = Reranker(cache_size=settings.RERANK_CACHE_SIZE)
@@ -0,0 +1,129 @@
+"""
+Semantic Cache
+──────────────
+Optional paraphrase-tolerant answer cache in front of retrieval + LLM.
+
+Incoming questions are embedded with the same sentence-transformer the
+vector store uses and looked up in a small, separate in-memory FAISS
+inner-product index. If the nearest past question has cosine similarity
+≥ SEMANTIC_CACHE_THRESHOLD, its answer and sources are returned as-is.
+
+Only stand-alone questions (no conversation history) are cached: follow-ups
+like "tell me more" are meaningless without their context.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+import faiss
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.models.schemas import SourceChunk
+from app.services.answer_cache import CachedAnswer, CacheStats
+from app.services.vector_store import vector_store_service
+
+
+class SemanticCache:
+    """
+    Bounded LRU + TTL cache whose keys are question embeddings.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, threshold: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._index: Optional[faiss.IndexIDMap2] = None
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()   # vector id → entry
+        self._by_doc: Dict[str, Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def embed(self, question: str) -> np.ndarray:
+        vector = vector_store_service.embed_query(question)
+        vector = np.array([vector], dtype=np.float32)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def lookup(self, vector: np.ndarray) -> Optional[CachedAnswer]:
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                self.stats.misses += 1
+                return None
+            scores, ids = self._index.search(vector, 1)
+            score, entry_id = float(scores[0][0]), int(ids[0][0])
+            entry = self._entries.get(entry_id)
+            if entry is None or score < self.threshold:
+                self.stats.misses += 1
+                return None
+            if entry.expires_at < time.monotonic():
+                self._drop(entry_id)
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(entry_id)
+            self.stats.hits += 1
+            logger.info(f"  ✓ Semantic cache hit (similarity={score:.3f})")
+            return entry
+
+    def put(self, vector: np.ndarray, answer: str, sources: List[SourceChunk]):
+        doc_ids = {s.doc_id for s in sources}
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+            self._entries[entry_id] = CachedAnswer(
+                answer=answer,
+                sources=sources,
+                doc_ids=doc_ids,
+                expires_at=time.monotonic() + self.ttl_seconds,
+            )
+            for doc_id in doc_ids:
+                self._by_doc.setdefault(doc_id, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.stats.evictions += 1
+
+    def invalidate_doc(self, doc_id: str) -> int:
+        """Drop every entry whose sources cite doc_id. Returns entries removed."""
+        with self._lock:
+            entry_ids = self._by_doc.pop(doc_id, set())
+            for entry_id in list(entry_ids):
+                self._drop(entry_id)
+            self.stats.invalidations += len(entry_ids)
+            return len(entry_ids)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.stats.hits,
+                "misses": self.stats.misses,
+                "evictions": self.stats.evictions,
+                "invalidations": self.stats.invalidations,
+            }
+
+    def _drop(self, entry_id: int):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        self._index.remove_ids(np.array([entry_id], dtype=np.int64))
+        for doc_id in entry.doc_ids:
+            ids = self._by_doc.get(doc_id)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self._by_doc[doc_id]
+
+
+# Singleton
+semantic_cache = SemanticCache(
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+)
@@ -0,0 +1,95 @@
+"""
+Token Counter
+─────────────
+tiktoken counts for the prompt budget (see RAGPipeline._build_inputs).
+
+The encoding follows OPENAI_MODEL and is loaded on first use. tiktoken
+fetches its BPE file once and caches it (TIKTOKEN_CACHE_DIR); if that is
+impossible — offline host, package missing — counts fall back to a
+≈4-characters-per-token estimate rather than failing requests.
+
+Chunk counts are computed once at ingestion and stored in the chunk's
+metadata with the encoding name, so retrieval never re-tokenizes them
+unless the model's encoding changed.
+"""
+
+import threading
+from typing import Optional
+
+from langchain.schema import Document
+
+from app.core.config import settings
+from app.core.logger import logger
+
+
+APPROX_ENCODING = "approx"      # name recorded when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_name: Optional[str] = None
+_lock = threading.Lock()
+
+
+def _load():
+    global _encoding, _encoding_name
+    if _encoding_name is not None:
+        return
+    with _lock:
+        if _encoding_name is not None:
+            return
+        try:
+            import tiktoken
+            try:
+                encoding = tiktoken.encoding_for_model(settings.OPENAI_MODEL)
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+            _encoding, _encoding_name = encoding, encoding.name
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable ({e.__class__.__name__}); estimating tokens from length")
+            _encoding, _encoding_name = None, APPROX_ENCODING
+
+
+def encoding_name() -> str:
+    _load()
+    return _encoding_name
+
+
+def count_tokens(text: str) -> int:
+    _load()
+    if _encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(_encoding.encode(text, disallowed_special=()))
+
+
+def chunk_tokens(chunk: Document) -> int:
+    """Token count stored at ingestion, if it was made with the current encoding."""
+    meta = chunk.metadata
+    if meta.get("token_encoding") == encoding_name() and "token_count" in meta:
+        return meta["token_count"]
+    return count_tokens(chunk.page_content)
+
+
+def annotate(chunk: Document):
+    """Record the chunk's token count in its metadata (ingestion)."""
+    chunk.metadata["token_count"] = count_tokens(chunk.page_content)
+    chunk.metadata["token_encoding"] = encoding_name()
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """
+    First ≤ max_tokens tokens of text, cut back to the last sentence or line
+    end when one falls in the second half, so a chunk is never sliced mid-word.
+    """
+    _load()
+    if _encoding is None:
+        head = text[:max_tokens * CHARS_PER_TOKEN]
+    else:
+        head = _encoding.decode(_encoding.encode(text, disallowed_special=())[:max_tokens])
+    if len(head) >= len(text):
+        return text
+    cut = max(head.rfind(". "), head.rfind("\n"), head.rfind("? "), head.rfind("! "))
+    if cut >= len(head) // 2:
+        head = head[:cut + 1]
+    else:
+        head = head[:head.rfind(" ")] if " " in head else head
+    return head.rstrip() + " …"
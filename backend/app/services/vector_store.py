@@ -6,28 +6,158 @@ Optional: Pinecone (cloud-scale, set USE_PINECONE=true in .env)
 
 Responsibilities:
   • Embed and index document chunks
-  • Similarity search for retrieval
-  • Persist / load FAISS index from disk
+  • Similarity search for retrieval (dense, fused with BM25 — see lexical_index)
+  • Persist / load FAISS index from disk (snapshot + write-ahead log)
   • Track indexed documents in a JSON manifest
+  • Keep chunk text + metadata in an on-disk chunk store, fetched per hit
+  • Switch to an ANN index (IVF / HNSW / IVF-PQ) as the corpus grows — see ann_index
+
+Vectors live in two segments: the base index from the latest snapshot —
+memory-mapped read-only when INDEX_MMAP is on, so uvicorn workers share one
+copy through the page cache — and an in-RAM delta holding vectors added
+since, as a few small flat segments (one per add, merged past
+DELTA_MAX_SEGMENTS). Deletes are tombstoned and hidden at search time;
+past INDEX_DELTA_MAX_VECTORS (or 25% tombstones), and at each snapshot,
+delta and tombstones are merged into a new base.
+
+With INDEX_SHARDS > 1 the base is split into that many shards (by vector
+ID round-robin, or by a hash of the doc_id). A query searches every shard
+on its own thread — FAISS releases the GIL, so shards run on separate
+cores — and a heap merges the per-shard top-k. Changing the shard count
+rebuilds the base into the new layout.
+
+Reads never take a lock. Base, delta segments, tombstones and per-doc ID
+runs form an immutable IndexGeneration: a search reads `self._gen` once and
+uses only that, while the writer (one at a time, queued on `_write_lock`)
+builds the next generation beside it — a new segment, a new tombstone set,
+a merged base — and publishes it with one reference swap. FAISS never sees
+an add or remove on an index a search may be using. The BM25 side works
+the same way (LexicalView in lexical_index), so hybrid searches don't wait
+for a snapshot's save either.
 """
 
 import os
 import json
-import pickle
+import math
+import heapq
+import zlib
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, FrozenSet, List, Dict, Tuple, Optional
 from datetime import datetime
 
+import faiss
+import numpy as np
 from langchain.schema import Document
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
 
+from app.core import metrics
 from app.core.config import settings
 from app.core.logger import logger
+from app.models.schemas import RetrievalFilter
+from app.services import ann_index
+from app.services.chunk_store import ChunkStore
+from app.services.document_processor import chunk_content_hash
+from app.services.embedding_cache import embedding_cache
+from app.services.index_persistence import IndexPersistence, atomic_write_bytes
+from app.services.lexical_index import LexicalIndex
+from app.services.query_embedder import QueryEmbedder
+
+
+DELTA_MAX_SEGMENTS = 8   # delta segments searched one by one; more are merged into one
+
+
+def _relevance(distance: float) -> float:
+    """Squared-L2 distance of unit vectors → relevance (langchain's euclidean score)."""
+    return 1.0 - distance / math.sqrt(2)
+
+
+def _doc_shard(doc_id: str, count: int) -> int:
+    return zlib.crc32(doc_id.encode()) % count
+
+
+def _shard_owner(ids: np.ndarray, count: int, shard_by: str,
+                 routes: Optional[Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+    """Shard of each live vector ID: ID mod count, or via `routes` (see _doc_routes)."""
+    if count == 1:
+        return np.zeros(len(ids), dtype=np.int64)
+    if shard_by == "round_robin":
+        return ids % count
+    starts, owners = routes
+    return owners[np.searchsorted(starts, ids, side="right") - 1]
 
 
-MANIFEST_PATH = Path(settings.FAISS_INDEX_PATH) / "manifest.json"
-INDEX_PATH    = Path(settings.FAISS_INDEX_PATH) / "index"
+def _doc_routes(doc_ranges: Dict[str, List[Tuple[int, int]]], count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """For doc sharding: sorted ID run starts and the shard of each run's document."""
+    runs = sorted((start, _doc_shard(doc_id, count)) for doc_id, doc_runs in doc_ranges.items()
+                  for start, _ in doc_runs)
+    return (np.array([start for start, _ in runs], dtype=np.int64),
+            np.array([shard for _, shard in runs], dtype=np.int64))
+
+
+def _shard_files(directory: Path, count: int) -> Tuple[Path, ...]:
+    """Snapshot files holding the base: index.faiss unsharded, index-<i>.faiss per shard."""
+    if count == 1:
+        return (directory / "index.faiss",)
+    return tuple(directory / f"index-{i}.faiss" for i in range(count))
+
+
+def _manifest_entry(doc_metadata: Dict) -> Dict:
+    upload_time = doc_metadata["upload_time"]
+    return {**doc_metadata, "upload_time": upload_time.isoformat() if isinstance(upload_time, datetime) else upload_time}
+
+
+def _id_runs(ids: List[int]) -> List[Tuple[int, int]]:
+    """Sorted IDs → runs of consecutive IDs as [(start, stop), ...]."""
+    runs: List[Tuple[int, int]] = []
+    for vid in sorted(ids):
+        if runs and runs[-1][1] == vid:
+            runs[-1] = (runs[-1][0], vid + 1)
+        else:
+            runs.append((vid, vid + 1))
+    return runs
+
+
+@dataclass
+class IndexGeneration:
+    """
+    One published state of the dense index. Never mutated after publishing:
+    writers derive the next generation with `dataclasses.replace`.
+    """
+
+    shards: Tuple[faiss.Index, ...] = ()        # the base index: one per shard, all of one kind
+    shard_by: str = "round_robin"               # how base vectors were assigned to shards
+    base_mmapped: bool = False                  # opened read-only from a snapshot
+    base_paths: Tuple[Path, ...] = ()           # snapshot files a memory-mapped base was opened from
+    delta: Tuple[faiss.Index, ...] = ()         # flat segments holding the IDs ≥ delta_from, in ID order
+    delta_starts: Tuple[int, ...] = ()          # smallest ID in each segment
+    delta_from: int = 0
+    id_limit: int = 0                           # every ID below this was assigned when published
+    tombstones: FrozenSet[int] = frozenset()    # deleted IDs still physically in base or delta
+    selector: Optional[faiss.IDSelector] = None   # hides the tombstones at search time
+    doc_ranges: Dict[str, List[Tuple[int, int]]] = field(default_factory=dict)   # doc_id → vector ID runs
+    routes: Optional[Tuple[np.ndarray, np.ndarray]] = None   # doc sharding lookup, built on first use
+
+    @property
+    def delta_size(self) -> int:
+        return sum(segment.ntotal for segment in self.delta)
+
+    @property
+    def total(self) -> int:
+        return sum(shard.ntotal for shard in self.shards) + self.delta_size - len(self.tombstones)
+
+    @property
+    def kind(self) -> str:
+        return ann_index.index_kind(self.shards[0]) if self.shards else "flat"
+
+    def shard_of(self, ids: np.ndarray) -> np.ndarray:
+        """Shard holding each of `ids` (live IDs; a tombstoned one may not be routable)."""
+        if self.shard_by == "doc" and len(self.shards) > 1 and self.routes is None:
+            self.routes = _doc_routes(self.doc_ranges, len(self.shards))   # readers racing here build the same table
+        return _shard_owner(ids, len(self.shards), self.shard_by, self.routes)
 
 
 class VectorStoreService:
@@ -35,100 +165,307 @@ class VectorStoreService:
     Manages FAISS vector store lifecycle: init, add, search, persist.
     """
 
-    def __init__(self):
+    def __init__(self, index_path: Optional[str] = None):
+        self._root = Path(index_path or settings.FAISS_INDEX_PATH)
         self._embedding_model = None
-        self._vector_store: Optional[FAISS] = None
+        self._gen = IndexGeneration()                 # what searches read; swapped whole by the writer
+        self._chunks = ChunkStore(self._root / "chunks.sqlite")   # vector ID → chunk text + metadata
+        self._lexical: Optional[LexicalIndex] = LexicalIndex() if settings.HYBRID_ENABLED else None
         self._manifest: Dict = {}   # doc_id → metadata
+        self._next_vector_id: int = 0
+        self._trained_size: int = 0                   # live vectors when the index was last (re)built
+        self._needs_snapshot = False                  # base rebuilt in RAM; next change compacts
+        self._change_listeners: List[Callable[[str], None]] = []
+        self._persistence = IndexPersistence(self._root)
+        self._write_lock = asyncio.Lock()
+        self._shard_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="faiss-shard")
+        self.startup_state = "starting"              # starting → ready | failed
+        self.query_embedder = QueryEmbedder(
+            embed_batch=lambda texts: self._get_embeddings().embed_documents(texts),
+            cache_size=settings.QUERY_EMBEDDING_CACHE_SIZE,
+            batch_max_size=settings.QUERY_BATCH_MAX_SIZE,
+            batch_wait_ms=settings.QUERY_BATCH_WAIT_MS,
+        )
         self._load_manifest()
 
     # ─────────────────────────── Public API ──────────────────────────────────
 
-    async def add_documents(self, chunks: List[Document], doc_metadata: Dict) -> int:
-        """Embed and add chunks to the vector store. Returns chunk count."""
+    def add_change_listener(self, callback: Callable[[str], None]):
+        """Register callback(doc_id), fired whenever a doc's chunks are added or removed."""
+        self._change_listeners.append(callback)
+
+    async def add_documents(
+        self,
+        chunks: List[Document],
+        doc_metadata: Dict,
+        vectors: Optional[List[List[float]]] = None,
+        persist: bool = True,
+        append: bool = False,
+    ) -> int:
+        """
+        Embed and add chunks to the vector store. Returns chunk count.
+        Pass `vectors` when the chunks were already embedded (ingestion pipeline),
+        and `persist=False` to defer the disk write (bulk jobs call `persist()` once).
+        A doc's chunks replace any it already has, unless `append` (streaming
+        ingestion indexes a doc batch by batch, then calls `finalize_document`).
+        """
         if not chunks:
             return 0
 
-        embeddings = self._get_embeddings()
         doc_id = doc_metadata["doc_id"]
 
-        logger.info(f"Embedding {len(chunks)} chunks for doc_id={doc_id}...")
+        from fastapi.concurrency import run_in_threadpool
+        if vectors is None:
+            logger.info(f"Embedding {len(chunks)} chunks for doc_id={doc_id}...")
+            vectors = await run_in_threadpool(self.embed_documents, [c.page_content for c in chunks])
 
-        if self._vector_store is None:
-            # First time initialization might be fast enough, but safer to thread it
-            from fastapi.concurrency import run_in_threadpool
-            self._vector_store = await run_in_threadpool(FAISS.from_documents, chunks, embeddings)
-        else:
-            from fastapi.concurrency import run_in_threadpool
-            await run_in_threadpool(self._vector_store.add_documents, chunks)
+        manifest_entry = _manifest_entry(doc_metadata)
 
-        self._manifest[doc_id] = {
-            **doc_metadata,
-            "upload_time": doc_metadata["upload_time"].isoformat()
-                           if isinstance(doc_metadata["upload_time"], datetime)
-                           else doc_metadata["upload_time"],
-        }
+        with metrics.stage("ingest", "persist"):
+            async with self._write_lock:
+                ids = list(range(self._next_vector_id, self._next_vector_id + len(chunks)))
+                replaced = [] if append else await run_in_threadpool(self._previous_ids, doc_id, ids)
+                record = {
+                    "op": "add",
+                    "doc_id": doc_id,
+                    "ids": ids,
+                    "replaces": replaced,
+                    "append": append,
+                    "vectors": np.asarray(vectors, dtype=np.float32),
+                    "chunks": chunks,
+                    "manifest": manifest_entry,
+                }
+                # WAL first, then the chunk rows: after a crash in between, replay
+                # redoes the add instead of keeping vectors whose rows are gone
+                logged = self._persistence.current_seq() is not None and not self._needs_snapshot
+                if logged:
+                    await run_in_threadpool(self._persistence.append, record, persist)
+                # Off the event loop: crossing a size threshold (re)trains the ANN index
+                await run_in_threadpool(self._apply_add, doc_id, chunks, vectors, ids, manifest_entry,
+                                        replaces=replaced, append=append)
+                if logged and not self._needs_snapshot:
+                    await self._maybe_compact()
+                else:
+                    await self._log(record, sync=persist)   # snapshots the state after the add
+        self._notify_change(doc_id)
 
-        await self._persist()
         logger.info(f"  ✓ Indexed. Total chunks in store: {self.total_chunks}")
         return len(chunks)
 
+    async def finalize_document(self, doc_metadata: Dict, persist: bool = True):
+        """
+        Record the final chunk count of a doc indexed with `append`: sets
+        `total_chunks` on each of its chunks and its manifest entry.
+        """
+        doc_id = doc_metadata["doc_id"]
+        if doc_id not in self._manifest:
+            return
+
+        from fastapi.concurrency import run_in_threadpool
+        manifest_entry = _manifest_entry(doc_metadata)
+        with metrics.stage("ingest", "persist"):
+            async with self._write_lock:
+                await run_in_threadpool(self._apply_finalize, doc_id, manifest_entry)
+                await self._log({"op": "finalize", "doc_id": doc_id, "manifest": manifest_entry}, sync=persist)
+        self._notify_change(doc_id)
+
     def similarity_search(
         self,
         query: str,
         k: int = None,
+        hybrid_weight: Optional[float] = None,
+        filters: Optional[RetrievalFilter] = None,
     ) -> List[Tuple[Document, float]]:
         """
         Returns list of (Document, relevance_score) sorted by relevance.
         Score is cosine similarity (higher = more relevant).
+
+        With hybrid retrieval on, dense and BM25 hits are merged by reciprocal
+        rank fusion; `hybrid_weight` (default HYBRID_WEIGHT) is the lexical
+        share, 0 = dense only. Order follows the fused rank, while the
+        reported score stays the dense relevance of each chunk.
+
+        `filters` restricts both retrievers to the matching documents' vectors
+        up front (see _filtered_ids) rather than discarding hits afterwards.
         """
-        if self._vector_store is None:
+        results = self.similarity_search_batch([query], k, hybrid_weight, filters)[0]
+        logger.info(f"Retrieved {len(results)} chunks for query='{query[:60]}...'")
+        return results
+
+    def similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = None,
+        hybrid_weight: Optional[float] = None,
+        filters: Optional[RetrievalFilter] = None,
+        embeddings: Optional[List[List[float]]] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        `similarity_search` for many queries at once: one embedding call, one
+        multi-query FAISS search and one chunk-store fetch for the whole batch.
+        """
+        gen = self._gen   # one consistent view for the whole search, however the writer moves on
+        if not gen.shards:
             logger.warning("Vector store is empty — no documents indexed yet.")
-            return []
+            return [[] for _ in queries]
+
+        allowed = self._filtered_ids(gen, filters)
+        if allowed is not None and len(allowed) == 0:
+            logger.info(f"No documents match filters {filters.model_dump(exclude_none=True)}")
+            return [[] for _ in queries]
 
         k = k or settings.TOP_K
-        results = self._vector_store.similarity_search_with_relevance_scores(query, k=k)
-        logger.info(f"Retrieved {len(results)} chunks for query='{query[:60]}...'")
+        weight = settings.HYBRID_WEIGHT if hybrid_weight is None else hybrid_weight
+        if self._lexical is None:
+            weight = 0.0
+        matrix = np.asarray(embeddings if embeddings is not None else self.embed_queries(queries), dtype=np.float32)
+
+        with metrics.stage("chat", "search"):
+            # Over-fetch a little so identical boilerplate chunks from different
+            # documents collapse to one hit without shrinking the result set
+            fetch_k = k * 2
+            hits = self._dense_hits(gen, matrix, fetch_k, allowed) if weight < 1 else [[] for _ in queries]
+            if weight > 0:
+                hits = [
+                    self._fuse(gen, matrix[i], hits[i], self._lexical_hits(gen, query, fetch_k, allowed),
+                               weight)[:fetch_k]
+                    for i, query in enumerate(queries)
+                ]
+            docs = self._chunks.get_many([vid for query_hits in hits for vid, _ in query_hits])
+
+            results = []
+            for query_hits in hits:
+                found, seen = [], set()
+                for vid, distance in query_hits:
+                    doc = docs.get(vid)
+                    if doc is None:
+                        continue
+                    content_hash = doc.metadata.get("content_hash") or chunk_content_hash(doc.page_content)
+                    if content_hash in seen:
+                        continue
+                    seen.add(content_hash)
+                    found.append((doc, _relevance(distance)))
+                    if len(found) == k:
+                        break
+                results.append(found)
         return results
 
+    def matching_documents(self, filters: RetrievalFilter) -> List[str]:
+        """doc_ids whose manifest entry satisfies every field given in filters."""
+        doc_ids = set(filters.doc_ids) if filters.doc_ids is not None else None
+        filenames = set(filters.filenames) if filters.filenames is not None else None
+        file_types = {t.lstrip(".").lower() for t in filters.file_types} if filters.file_types is not None else None
+        return [
+            doc_id for doc_id, entry in self._manifest.items()
+            if (doc_ids is None or doc_id in doc_ids)
+            and (filenames is None or entry.get("filename") in filenames)
+            and (file_types is None or entry.get("file_type") in file_types)
+        ]
+
+    def has_document(self, doc_id: str) -> bool:
+        return doc_id in self._manifest
+
+    def get_document_metadata(self, doc_id: str) -> Optional[Dict]:
+        return self._manifest.get(doc_id)
+
+    def lookup_vectors(self, content_hashes: List[str]) -> Dict[str, List[float]]:
+        """Already-indexed vectors for any of the given chunk content hashes."""
+        gen = self._gen
+        if not gen.shards or ann_index.is_lossy(gen.kind):
+            # PQ reconstructions are approximate; let those chunks go through
+            # embed_documents (and its cache) instead of reusing them
+            return {}
+        # Rows of an add still in progress aren't in this generation yet
+        found = {h: vid for h, vid in self._chunks.ids_for_hashes(content_hashes).items() if vid < gen.id_limit}
+        if not found:
+            return {}
+        vectors = self._exact_vectors(gen, np.array(list(found.values()), dtype=np.int64))
+        return {content_hash: vector.tolist() for content_hash, vector in zip(found, vectors)}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed chunk texts with the document embedding model (blocking).
+        The on-disk embedding cache is consulted first; only misses hit the model.
+        """
+        if not settings.EMBEDDING_CACHE_ENABLED:
+            return self._get_embeddings().embed_documents(texts)
+
+        hashes = [chunk_content_hash(t) for t in texts]
+        cached = embedding_cache.get_many(hashes)
+        missing = [i for i, h in enumerate(hashes) if h not in cached]
+        if missing:
+            fresh = self._get_embeddings().embed_documents([texts[i] for i in missing])
+            embedding_cache.put_many([hashes[i] for i in missing], fresh)
+            cached.update((hashes[i], v) for i, v in zip(missing, fresh))
+        return [cached[h] for h in hashes]
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a user query via the shared LRU cache + micro-batcher."""
+        with metrics.stage("chat", "embed"):
+            return self.query_embedder.embed(query)
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries: cache hits plus one batched encode for the rest."""
+        if len(queries) == 1:
+            return [self.embed_query(queries[0])]
+        with metrics.stage("chat", "embed"):
+            return self.query_embedder.embed_many(queries)
+
     async def delete_document(self, doc_id: str) -> bool:
         """
         Remove all chunks belonging to doc_id.
-        FAISS doesn't natively support deletion, so we rebuild the index
-        excluding the target doc's chunks.
+        The index is ID-mapped, so the doc's vectors are removed by ID —
+        nothing is re-embedded and cost scales with the deleted doc's size.
         """
         if doc_id not in self._manifest:
             return False
 
-        logger.info(f"Deleting doc_id={doc_id} from vector store (index rebuild)...")
-
-        embeddings = self._get_embeddings()
-        all_docs = self._get_all_documents()
-        remaining = [d for d in all_docs if d.metadata.get("doc_id") != doc_id]
-
         from fastapi.concurrency import run_in_threadpool
-
-        if remaining:
-            self._vector_store = await run_in_threadpool(FAISS.from_documents, remaining, embeddings)
-        else:
-            self._vector_store = None
-
-        del self._manifest[doc_id]
-        await self._persist()
-        logger.info(f"  ✓ Deleted. Remaining docs: {len(self._manifest)}")
+        async with self._write_lock:
+            logger.info(f"Deleting doc_id={doc_id} from vector store...")
+            ids = await run_in_threadpool(self._chunks.ids_for_doc, doc_id)
+            record = {"op": "delete", "doc_id": doc_id, "ids": ids}
+            # WAL first, then the chunk rows: after a crash in between, replay
+            # redoes the delete instead of restoring vectors whose rows are gone
+            logged = self._persistence.current_seq() is not None
+            if logged:
+                await run_in_threadpool(self._persistence.append, record, True)
+            removed = await run_in_threadpool(self._apply_delete, doc_id, ids)
+            if logged and not self._needs_snapshot:
+                await self._maybe_compact()
+            else:
+                await self._log(record)   # snapshots the state after the delete
+        self._notify_change(doc_id)
+        logger.info(f"  ✓ Deleted {len(removed)} vectors. Remaining docs: {len(self._manifest)}")
         return True
 
+    async def persist(self):
+        """Make every change so far durable (fsync the WAL), compacting if it has grown large."""
+        from fastapi.concurrency import run_in_threadpool
+        with metrics.stage("ingest", "persist"):
+            async with self._write_lock:
+                await run_in_threadpool(self._persistence.sync)
+                await self._maybe_compact()
+
     def get_all_metadata(self) -> List[Dict]:
         return list(self._manifest.values())
 
     @property
     def is_ready(self) -> bool:
-        return self._vector_store is not None
+        return bool(self._gen.shards)
 
     @property
     def total_chunks(self) -> int:
-        if self._vector_store is None:
-            return 0
-        return self._vector_store.index.ntotal
+        return self._gen.total
+
+    @property
+    def index_type(self) -> str:
+        """Index type currently in use (flat until FAISS_ANN_MIN_VECTORS is reached)."""
+        return self._gen.kind
+
+    @property
+    def num_shards(self) -> int:
+        return max(len(self._gen.shards), 1)
 
     @property
     def num_documents(self) -> int:
@@ -136,69 +473,626 @@ class VectorStoreService:
 
     # ─────────────────────────── Private Helpers ─────────────────────────────
 
-    def _get_embeddings(self) -> HuggingFaceEmbeddings:
+    def _get_embeddings(self) -> Embeddings:
         if self._embedding_model is None:
-            logger.info(f"Loading embedding model: {settings.EMBEDDING_MODEL}")
-            self._embedding_model = HuggingFaceEmbeddings(
-                model_name=settings.EMBEDDING_MODEL,
-                model_kwargs={"device": "cpu"},
-                encode_kwargs={"normalize_embeddings": True},
-            )
+            logger.info(f"Loading embedding model: {settings.EMBEDDING_MODEL} ({settings.EMBEDDING_BACKEND})")
+            if settings.EMBEDDING_BACKEND == "onnx":
+                from app.services.onnx_embeddings import OnnxEmbeddings
+
+                self._embedding_model = OnnxEmbeddings(
+                    settings.EMBEDDING_MODEL,
+                    int8=settings.EMBEDDING_ONNX_INT8,
+                    threads=settings.EMBEDDING_THREADS,
+                    batch_size=settings.EMBEDDING_BATCH_SIZE,
+                )
+            else:
+                # Deferred: pulls in torch + sentence-transformers (seconds of import time)
+                import torch
+                from langchain_community.embeddings import HuggingFaceEmbeddings
+
+                if settings.EMBEDDING_THREADS > 0:
+                    torch.set_num_threads(settings.EMBEDDING_THREADS)
+                self._embedding_model = HuggingFaceEmbeddings(
+                    model_name=settings.EMBEDDING_MODEL,
+                    model_kwargs={"device": "cpu"},
+                    encode_kwargs={"normalize_embeddings": True, "batch_size": settings.EMBEDDING_BATCH_SIZE},
+                )
             logger.info("  ✓ Embedding model loaded.")
         return self._embedding_model
 
-    async def _persist(self):
-        """Save FAISS index + manifest to disk."""
-        index_path = str(INDEX_PATH)
+    def _notify_change(self, doc_id: str):
+        for callback in self._change_listeners:
+            try:
+                callback(doc_id)
+            except Exception as e:
+                logger.warning(f"Change listener failed for doc_id={doc_id}: {e}")
+
+    def _apply_add(self, doc_id: str, chunks: List[Document], vectors, ids: List[int],
+                   manifest_entry: Dict, replaces: Optional[List[int]] = None,
+                   rebuild: bool = True, append: bool = False) -> List[int]:
+        """
+        In-memory half of an add (shared by add_documents and WAL replay).
+        Returns the IDs of the doc's previous vectors, which were dropped
+        (none when appending).
+
+        Chunk rows and BM25 postings go in first, then one new generation
+        carries the vectors, the doc's ID runs and (same content re-indexed)
+        the old vectors' tombstones; a search sees the old doc or the new one.
+        """
+        if append:
+            replaces = []
+        elif replaces is None:
+            replaces = self._previous_ids(doc_id, ids)
+        self._chunks.add(ids, chunks)
+        if self._lexical is not None:
+            if replaces:
+                self._lexical.remove(replaces)
+            self._lexical.add(ids, [c.page_content for c in chunks])
+
+        gen = self._gen
+        matrix = np.array(vectors, dtype=np.float32)
+        id_array = np.array(ids, dtype=np.int64)
+        segment = ann_index.build_index("flat", matrix, id_array)
+        self._next_vector_id = max(self._next_vector_id, max(ids) + 1)
+        self._manifest[doc_id] = manifest_entry
+        runs = list(gen.doc_ranges.get(doc_id, ())) if append else []
+        for start, stop in _id_runs(ids):
+            if runs and runs[-1][1] == start:
+                runs[-1] = (runs[-1][0], stop)
+            else:
+                runs.append((start, stop))
+        base = {}
+        if not gen.shards:
+            empty = ann_index.build_shards("flat", matrix[:0], id_array[:0], id_array[:0], settings.INDEX_SHARDS)
+            base = {"shards": tuple(empty), "shard_by": settings.INDEX_SHARD_BY}
+        self._publish(
+            **base,
+            delta=gen.delta + (segment,),
+            delta_starts=gen.delta_starts + (int(id_array.min()),),
+            tombstones=gen.tombstones | frozenset(int(v) for v in replaces),
+            doc_ranges={**gen.doc_ranges, doc_id: runs},
+        )
+        if len(self._gen.delta) > DELTA_MAX_SEGMENTS:
+            self._merge_segments()
+        if replaces:
+            # Same content re-indexed: drop the old vectors rather than orphaning them
+            self._chunks.delete(replaces)
+        if rebuild:
+            self._maybe_rebuild_index()
+        elif self._gen.delta_size > settings.INDEX_DELTA_MAX_VECTORS:
+            self._compact_index()   # WAL replay: keep the delta copies small
+        return replaces
+
+    def _previous_ids(self, doc_id: str, ids: List[int]) -> List[int]:
+        """The doc's indexed vector IDs that an add of `ids` replaces."""
+        new_ids = set(ids)
+        return [vid for vid in self._chunks.ids_for_doc(doc_id) if vid not in new_ids]
+
+    def _apply_delete(self, doc_id: str, ids: Optional[List[int]] = None, rebuild: bool = True) -> List[int]:
+        """In-memory half of a delete (shared by delete_document and WAL replay). Returns the removed IDs."""
+        if ids is None:
+            ids = self._chunks.ids_for_doc(doc_id)
+        gen = self._gen
+        if gen.shards and ids:
+            if self._lexical is not None:
+                self._lexical.remove(ids)
+            self._publish(
+                tombstones=gen.tombstones | frozenset(int(v) for v in ids),
+                doc_ranges={d: runs for d, runs in gen.doc_ranges.items() if d != doc_id},
+            )
+            self._chunks.delete(ids)
+            if self.total_chunks == 0:
+                self._reset_index()
+            elif rebuild:
+                self._maybe_rebuild_index()
+        self._manifest.pop(doc_id, None)
+        return ids
+
+    def _apply_finalize(self, doc_id: str, manifest_entry: Dict):
+        """In-memory half of finalize_document (shared with WAL replay)."""
+        self._chunks.set_total_chunks(doc_id, manifest_entry["num_chunks"])
+        self._manifest[doc_id] = manifest_entry
+
+    def _publish(self, **changes):
+        """Swap in the next generation: the current one with `changes` applied."""
+        gen = replace(self._gen, id_limit=self._next_vector_id, **changes)
+        if "doc_ranges" in changes or "shards" in changes:
+            gen.routes = None
+        if "tombstones" in changes:
+            gen.selector = faiss.IDSelectorNot(
+                faiss.IDSelectorBatch(np.fromiter(gen.tombstones, dtype=np.int64, count=len(gen.tombstones)))
+            ) if gen.tombstones else None
+        self._gen = gen
+
+    def _merge_segments(self):
+        """
+        Fold delta segments into one (tombstoned vectors dropped), so a search
+        stays a few FAISS calls. A first segment larger than all the others
+        together is kept as is: segment sizes grow geometrically and each
+        vector is copied O(log n) times, not once per merge.
+        """
+        gen = self._gen
+        keep = 1 if gen.delta[0].ntotal > sum(segment.ntotal for segment in gen.delta[1:]) else 0
+        merging = gen.delta[keep:]
+        ids = np.concatenate([faiss.vector_to_array(segment.id_map) for segment in merging])
+        vectors = np.concatenate([segment.index.reconstruct_n(0, segment.ntotal) for segment in merging])
+        dead = np.isin(ids, np.fromiter(gen.tombstones, dtype=np.int64, count=len(gen.tombstones)))
+        merged = ann_index.build_index("flat", vectors[~dead], ids[~dead])
+        self._publish(delta=gen.delta[:keep] + (merged,), delta_starts=gen.delta_starts[:keep + 1],
+                      tombstones=gen.tombstones - frozenset(ids[dead].tolist()))
+
+    def _reset_index(self):
+        self._gen = IndexGeneration(id_limit=self._next_vector_id)
+        self._trained_size = 0
+        if self._lexical is not None:
+            self._lexical.clear()
+
+    def _search_by_vector(self, embedding: List[float], k: int) -> List[Tuple[Document, float]]:
+        """Raw (Document, L2 distance) hits across base + delta, skipping tombstoned IDs."""
+        return self._load_hits(self._dense_hits(self._gen, np.asarray([embedding], dtype=np.float32), k)[0])
+
+    def _filtered_ids(self, gen: IndexGeneration, filters: Optional[RetrievalFilter]) -> Optional[np.ndarray]:
+        """
+        Sorted live vector IDs of the documents matching filters (None = no
+        filter), expanded from the per-doc ID runs — a document's chunks get
+        consecutive IDs, so this costs O(matching chunks), not O(corpus).
+        """
+        if filters is None or all(v is None for v in filters.model_dump().values()):
+            return None
+        runs = [run for doc_id in self.matching_documents(filters) for run in gen.doc_ranges.get(doc_id, ())]
+        if not runs:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate([np.arange(start, stop, dtype=np.int64) for start, stop in runs]))
+
+    def _dense_hits(
+        self, gen: IndexGeneration, queries: np.ndarray, k: int, allowed: Optional[np.ndarray] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Per query row: (vector ID, L2 distance) across base + delta, nearest
+        first. With `allowed`, small candidate sets are scored exactly against
+        their own vectors; larger ones search the index through an ID selector.
+
+        Base shards are searched on the shard pool while this thread takes
+        the delta segments; each result row comes back sorted, so a heap
+        merge of the rows yields the overall top k.
+        """
+        if allowed is not None and len(allowed) <= settings.FILTER_EXACT_MAX_VECTORS:
+            return self._exact_hits(gen, queries, k, allowed)
+
+        # The doc ID runs of a generation hold only its live IDs, so a filter already leaves out tombstones
+        selector = faiss.IDSelectorBatch(allowed) if allowed is not None else gen.selector
+        shards = gen.shards
+        if allowed is not None and len(shards) > 1:
+            holding = set(np.unique(gen.shard_of(allowed)).tolist())
+            shards = tuple(shard for i, shard in enumerate(shards) if i in holding)
+
+        def search(index: faiss.Index) -> Tuple[List[List[float]], List[List[int]]]:
+            distances, ids = index.search(queries, k, params=ann_index.search_params(index, selector))
+            return distances.tolist(), ids.tolist()
+
+        shards = [shard for shard in shards if shard.ntotal]
+        if len(shards) > 1:
+            pending = [self._shard_pool.submit(search, shard) for shard in shards]
+            local = gen.delta
+        else:
+            pending, local = [], (*shards, *gen.delta)
+        results = [search(index) for index in local if index.ntotal]
+        results.extend(future.result() for future in pending)
+
+        hits = []
+        for row in range(len(queries)):
+            best: List[Tuple[int, float]] = []
+            seen = set()
+            for distance, vid in heapq.merge(*(zip(distances[row], ids[row]) for distances, ids in results)):
+                if vid == -1 or vid in seen:
+                    continue
+                seen.add(vid)
+                best.append((vid, distance))
+                if len(best) == k:
+                    break
+            hits.append(best)
+        return hits
+
+    def _exact_hits(self, gen: IndexGeneration, queries: np.ndarray, k: int,
+                    ids: np.ndarray) -> List[List[Tuple[int, float]]]:
+        """Brute-force (vector ID, L2 distance) over just `ids`, per query row."""
+        distances, rows = faiss.knn(queries, self._exact_vectors(gen, ids), min(k, len(ids)))
+        return [
+            [(int(ids[r]), float(d)) for d, r in zip(row_distances, row_ids)]
+            for row_distances, row_ids in zip(distances, rows)
+        ]
+
+    def _lexical_hits(self, gen: IndexGeneration, query: str, k: int,
+                      allowed: Optional[np.ndarray]) -> List[Tuple[int, float]]:
+        """BM25 hits that exist in `gen` (the lexical index may already hold a newer add)."""
+        return [
+            (vid, score) for vid, score in self._lexical.search(query, k, allowed)
+            if vid < gen.id_limit and vid not in gen.tombstones
+        ]
+
+    def _fuse(self, gen: IndexGeneration, embedding: List[float], dense: List[Tuple[int, float]],
+              lexical: List[Tuple[int, float]], weight: float) -> List[Tuple[int, float]]:
+        """
+        Weighted reciprocal rank fusion of dense and BM25 hits. Returns
+        (vector ID, L2 distance) in fused order; lexical-only hits get their
+        distance from the stored vector.
+        """
+        rrf_k = settings.HYBRID_RRF_K
+        fused: Dict[int, float] = {}
+        for rank, (vid, _) in enumerate(dense):
+            fused[vid] = (1 - weight) / (rrf_k + rank + 1)
+        for rank, (vid, _) in enumerate(lexical):
+            fused[vid] = fused.get(vid, 0.0) + weight / (rrf_k + rank + 1)
+        order = sorted(fused, key=fused.get, reverse=True)
+
+        distances = dict(dense)
+        missing = np.array([vid for vid in order if vid not in distances], dtype=np.int64)
+        if len(missing):
+            vectors = self._exact_vectors(gen, missing)
+            query = np.asarray(embedding, dtype=np.float32)
+            distances.update(zip(missing.tolist(), ((vectors - query) ** 2).sum(axis=1).tolist()))
+        return [(vid, distances[vid]) for vid in order]
+
+    def _load_hits(self, hits: List[Tuple[int, float]]) -> List[Tuple[Document, float]]:
+        docs = self._chunks.get_many([vid for vid, _ in hits])
+        return [(docs[vid], distance) for vid, distance in hits if vid in docs]
+
+    def _maybe_rebuild_index(self):
+        """
+        Switch index type or retrain when the corpus crosses a threshold:
+        FAISS_ANN_MIN_VECTORS (flat ↔ ANN), FAISS_RETRAIN_GROWTH × the size the
+        IVF centroids were trained on, or tombstones past 25% of live vectors
+        on an index that can't remove them (HNSW). Otherwise merge the delta
+        and tombstones into a new base once the delta passes
+        INDEX_DELTA_MAX_VECTORS or tombstones pass 25%. A changed INDEX_SHARDS
+        or INDEX_SHARD_BY rebuilds too, redistributing the vectors.
+        """
+        gen = self._gen
+        if not gen.shards:
+            return
+        live = gen.total
+        current, target = gen.kind, ann_index.target_kind(live)
+        grown = target in ("ivf", "ivfpq") and live >= self._trained_size * settings.FAISS_RETRAIN_GROWTH
+        churned = len(gen.tombstones) > live // 4
+        resharded = len(gen.shards) != settings.INDEX_SHARDS or (
+            settings.INDEX_SHARDS > 1 and gen.shard_by != settings.INDEX_SHARD_BY)
+        if current != target or grown or resharded or (churned and not ann_index.supports_remove(current)):
+            self._rebuild_index(target)
+        elif churned or gen.delta_size > settings.INDEX_DELTA_MAX_VECTORS:
+            self._compact_index()
+
+    def _rebuild_index(self, kind: str):
+        gen = self._gen
+        ids = self._chunks.all_ids()
+        start = time.perf_counter()
+        count, shard_by = settings.INDEX_SHARDS, settings.INDEX_SHARD_BY
+        routes = _doc_routes(gen.doc_ranges, count) if shard_by == "doc" and count > 1 else None
+        shards = ann_index.build_shards(kind, self._exact_vectors(gen, ids), ids,
+                                        _shard_owner(ids, count, shard_by, routes), count)
+        self._publish(shards=tuple(shards), shard_by=shard_by, base_mmapped=False, base_paths=(),
+                      delta=(), delta_starts=(), delta_from=self._next_vector_id, tombstones=frozenset())
+        self._trained_size = len(ids)
+        # Memory-mapped mode: get the RAM-resident rebuild back onto disk soon
+        self._needs_snapshot = settings.INDEX_MMAP
+        layout = f" in {count} shards ({shard_by})" if count > 1 else ""
+        logger.info(f"  ✓ Built {kind} index over {len(ids)} vectors{layout} in {time.perf_counter() - start:.1f}s")
+
+    def _compact_index(self):
+        """Merge delta + tombstones into a new base (in RAM; a snapshot re-maps it in mmap mode)."""
+        start = time.perf_counter()
+        shards, tombstones = self._merged_index(self._gen)
+        self._publish(shards=shards, base_mmapped=False, base_paths=(),
+                      delta=(), delta_starts=(), delta_from=self._next_vector_id, tombstones=tombstones)
+        self._needs_snapshot = settings.INDEX_MMAP
+        logger.info(f"  ✓ Merged delta into the base index ({self.total_chunks} chunks) "
+                    f"in {time.perf_counter() - start:.2f}s")
+
+    def _exact_vectors(self, gen: IndexGeneration, ids: np.ndarray) -> np.ndarray:
+        """Original vectors for ids — from the embedding cache when the base is lossy (PQ)."""
+        lossy = ann_index.is_lossy(gen.kind)
+        in_delta = ids >= gen.delta_from if gen.delta else np.zeros(len(ids), dtype=bool)
+        if len(ids) and not in_delta.any() and not lossy and len(gen.shards) == 1:
+            return gen.shards[0].reconstruct_batch(ids)
+        vectors = np.zeros((len(ids), gen.shards[0].d), dtype=np.float32)
+        if len(ids) == 0:
+            return vectors
+        if in_delta.any():
+            rows = np.flatnonzero(in_delta)
+            owner = np.searchsorted(gen.delta_starts, ids[rows], side="right") - 1
+            for i, segment in enumerate(gen.delta):
+                mine = rows[owner == i]
+                if len(mine):
+                    vectors[mine] = segment.reconstruct_batch(ids[mine])
+        in_base = ~in_delta
+        if in_base.any():
+            rows = np.flatnonzero(in_base)
+            owner = gen.shard_of(ids[rows])
+            for i, shard in enumerate(gen.shards):
+                mine = rows[owner == i]
+                if len(mine):
+                    vectors[mine] = shard.reconstruct_batch(ids[mine])
+            if lossy and settings.EMBEDDING_CACHE_ENABLED:
+                docs = self._chunks.get_many(ids[rows].tolist())
+                hashes = {
+                    row: docs[int(ids[row])].metadata.get("content_hash")
+                    for row in rows if int(ids[row]) in docs
+                }
+                cached = embedding_cache.get_many([h for h in hashes.values() if h])
+                for row, content_hash in hashes.items():
+                    if content_hash in cached:
+                        vectors[row] = cached[content_hash]
+        return vectors
+
+    async def _log(self, record: Dict, sync: bool = True):
+        """Append a change to the WAL (compacting into a new snapshot when it grows large)."""
         from fastapi.concurrency import run_in_threadpool
-        
-        if self._vector_store:
-            await run_in_threadpool(self._vector_store.save_local, index_path)
-        
-        # Manifest save is small JSON, but good practice to thread file I/O
-        await run_in_threadpool(self._save_manifest)
-        logger.info(f"  ✓ Persisted index to {index_path}")
+        if self._persistence.current_seq() is None or self._needs_snapshot:
+            # No snapshot yet, or the base was just rebuilt: the snapshot already includes this change
+            await run_in_threadpool(self._write_snapshot)
+        else:
+            await run_in_threadpool(self._persistence.append, record, sync)
+            await self._maybe_compact()
+
+    async def _maybe_compact(self):
+        if self._persistence.wal_bytes > settings.INDEX_WAL_MAX_MB * 1024 * 1024:
+            from fastapi.concurrency import run_in_threadpool
+            await run_in_threadpool(self._write_snapshot)
+
+    def _write_snapshot(self):
+        """
+        Compact current state into a new snapshot (atomic; see index_persistence).
+        Base, delta and tombstones are merged in RAM, written out, then the
+        snapshot is re-opened memory-mapped when INDEX_MMAP allows.
+        """
+        gen = self._gen
+        shards, tombstones = self._merged_index(gen)
+
+        def write(directory: Path):
+            if shards:
+                for shard, path in zip(shards, _shard_files(directory, len(shards))):
+                    faiss.write_index(shard, str(path))
+                (directory / "index_meta.json").write_text(json.dumps({
+                    "index_type": gen.kind,
+                    "shards": len(shards),
+                    "shard_by": gen.shard_by,
+                    "trained_size": self._trained_size,
+                    "tombstones": sorted(tombstones),
+                    "next_vector_id": self._next_vector_id,
+                }))
+                if self._lexical is not None:
+                    self._lexical.save(directory / "bm25.pkl")
+            (directory / "manifest.json").write_text(json.dumps(self._manifest))
+
+        seq = self._persistence.write_snapshot(write)
+        self._needs_snapshot = False
+        self._save_manifest()
+        if shards and settings.INDEX_MMAP and ann_index.can_mmap(gen.kind):
+            self._open_base(self._persistence.snapshot_dir(seq))
+        elif shards is not gen.shards:
+            self._publish(shards=shards, base_mmapped=False, base_paths=(),
+                          delta=(), delta_starts=(), delta_from=self._next_vector_id, tombstones=tombstones)
+        logger.info(f"  ✓ Wrote index snapshot-{seq} ({self.total_chunks} chunks)")
+
+    def _merged_index(self, gen: IndexGeneration) -> Tuple[Tuple[faiss.Index, ...], FrozenSet[int]]:
+        """
+        Base + delta − removable tombstones as RAM-resident shards (each delta
+        vector joins the shard it belongs to), plus the tombstones they still
+        hold. Built from copies: `gen` stays searchable.
+        """
+        if not gen.shards:
+            return (), frozenset()
+        removable = gen.tombstones and ann_index.supports_remove(gen.kind)
+        if not gen.base_mmapped and not gen.delta_size and not removable:
+            return gen.shards, gen.tombstones
+        if gen.base_mmapped:
+            merged = [faiss.read_index(str(path)) for path in gen.base_paths]
+        else:
+            merged = [faiss.clone_index(shard) for shard in gen.shards]
+        for shard in merged:
+            ann_index.configure(shard)
+        tombstones = set(gen.tombstones)
+        for segment in gen.delta:
+            ids = faiss.vector_to_array(segment.id_map)
+            live = ~np.isin(ids, np.fromiter(tombstones, dtype=np.int64, count=len(tombstones)))
+            vectors = segment.index.reconstruct_n(0, segment.ntotal)[live]
+            owner = gen.shard_of(ids[live])
+            for i, shard in enumerate(merged):
+                mine = owner == i
+                if mine.any():
+                    shard.add_with_ids(vectors[mine], ids[live][mine])
+            tombstones.difference_update(ids.tolist())
+        if tombstones and ann_index.supports_remove(gen.kind):
+            dead = np.array(sorted(tombstones), dtype=np.int64)
+            for shard in merged:
+                shard.remove_ids(dead)
+            tombstones = set()
+        return tuple(merged), frozenset(tombstones)
+
+    def _open_base(self, snapshot: Path):
+        """Load a snapshot's index shards — memory-mapped read-only when INDEX_MMAP allows it."""
+        meta_path = snapshot / "index_meta.json"
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+        mmap = settings.INDEX_MMAP and ann_index.can_mmap(meta.get("index_type", "flat"))
+        paths = _shard_files(snapshot, meta.get("shards", 1))
+        shards = tuple(faiss.read_index(str(path), ann_index.MMAP_FLAG if mmap else 0) for path in paths)
+        for shard in shards:
+            ann_index.configure(shard)
+        self._trained_size = meta.get("trained_size", sum(shard.ntotal for shard in shards))
+        self._next_vector_id = max(self._next_vector_id, meta.get("next_vector_id", 0))
+        self._publish(shards=shards, shard_by=meta.get("shard_by", "round_robin"),
+                      base_mmapped=mmap, base_paths=paths if mmap else (),
+                      delta=(), delta_starts=(), delta_from=self._next_vector_id,
+                      tombstones=frozenset(meta.get("tombstones", [])))
 
     def _load_manifest(self):
-        """Load manifest JSON from disk."""
-        if MANIFEST_PATH.exists():
-            with open(MANIFEST_PATH, "r") as f:
+        """
+        Load manifest JSON from disk: a listing cache, rewritten only with each
+        snapshot and after startup replay, so documents are listed while the
+        index loads. The snapshot + WAL are authoritative.
+        """
+        path = self._root / "manifest.json"
+        if path.exists():
+            with open(path, "r") as f:
                 self._manifest = json.load(f)
             logger.info(f"Loaded manifest: {len(self._manifest)} docs")
         else:
             self._manifest = {}
 
     def _save_manifest(self):
-        MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(MANIFEST_PATH, "w") as f:
-            json.dump(self._manifest, f, indent=2)
+        self._root.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(self._root / "manifest.json", json.dumps(self._manifest).encode())
 
     def _load_index(self):
-        """Load FAISS index from disk if it exists."""
-        if INDEX_PATH.exists():
-            try:
-                embeddings = self._get_embeddings()
-                self._vector_store = FAISS.load_local(
-                    str(INDEX_PATH),
-                    embeddings,
-                    allow_dangerous_deserialization=True,
+        """
+        Restore the latest snapshot and replay its WAL. Indexes saved in the
+        langchain pickle format (pre-WAL `index/`, or snapshots with index.pkl)
+        are migrated into the chunk store and re-snapshotted.
+        """
+        seq = self._persistence.current_seq()
+        self._reset_index()
+        self._next_vector_id = 0
+        try:
+            if seq is None:
+                if (self._root / "index").exists():
+                    self._migrate_langchain(self._root / "index")
+                    self._publish(doc_ranges=self._chunks.doc_ranges())
+                    if settings.HYBRID_ENABLED:
+                        self._rebuild_lexical()
+                    self._write_snapshot()
+                    logger.info("  ✓ Migrated index to snapshot + WAL layout")
+                else:
+                    self._chunks.clear()   # rows from a crash before the first snapshot
+                return
+
+            snapshot = self._persistence.snapshot_dir(seq)
+            migrated = (snapshot / "index.pkl").exists()
+            if migrated:
+                self._migrate_langchain(snapshot)
+            elif (snapshot / "index.faiss").exists() or (snapshot / "index-0.faiss").exists():
+                self._open_base(snapshot)
+            # No BM25 in the snapshot (older layout, or HYBRID_ENABLED newly on):
+            # skip it during replay and build it from the chunk store afterwards
+            rebuild_lexical = settings.HYBRID_ENABLED and not (snapshot / "bm25.pkl").exists()
+            if settings.HYBRID_ENABLED:
+                self._lexical = None if rebuild_lexical else LexicalIndex.load(snapshot / "bm25.pkl")
+            with open(snapshot / "manifest.json", "r") as f:
+                self._manifest = json.load(f)
+
+            replayed = 0
+            for record in self._persistence.replay():
+                if record["op"] == "add":
+                    self._apply_add(record["doc_id"], record["chunks"], record["vectors"], record["ids"],
+                                    record["manifest"], replaces=record.get("replaces"), rebuild=False,
+                                    append=record.get("append", False))
+                elif record["op"] == "delete":
+                    self._apply_delete(record["doc_id"], ids=record.get("ids"), rebuild=False)
+                elif record["op"] == "finalize":
+                    self._apply_finalize(record["doc_id"], record["manifest"])
+                replayed += 1
+            dropped = self._chunks.delete_from(self._next_vector_id)
+            if dropped:
+                logger.warning(f"Dropped {dropped} chunks whose WAL records never reached disk")
+            self._publish(doc_ranges=self._chunks.doc_ranges())
+            if rebuild_lexical:
+                self._rebuild_lexical()
+            # One rebuild at the end, also picking up a changed FAISS_INDEX_TYPE
+            self._maybe_rebuild_index()
+            if migrated or self._needs_snapshot:
+                self._write_snapshot()
+            self._save_manifest()
+            logger.info(f"  ✓ FAISS index loaded ({self.total_chunks} chunks, {self.index_type}"
+                        f"{', memory-mapped' if self._gen.base_mmapped else ''}, {replayed} WAL records replayed)")
+        except Exception as e:
+            logger.warning(f"Could not load existing index: {e}")
+            if settings.HYBRID_ENABLED and self._lexical is None:
+                self._lexical = LexicalIndex()
+            self._reset_index()
+
+    def _rebuild_lexical(self):
+        start = time.perf_counter()
+        self._lexical = LexicalIndex()
+        batch_ids, batch_texts = [], []
+        for vid, text in self._chunks.iter_texts():
+            batch_ids.append(vid)
+            batch_texts.append(text)
+            if len(batch_ids) == 10000:
+                self._lexical.add(batch_ids, batch_texts)
+                batch_ids, batch_texts = [], []
+        self._lexical.add(batch_ids, batch_texts)
+        logger.info(f"  ✓ Built BM25 index over {self._lexical.num_docs} chunks in {time.perf_counter() - start:.1f}s")
+
+    def _migrate_langchain(self, folder: Path):
+        """
+        Import an index saved with langchain's FAISS.save_local: move the
+        pickled docstore into the chunk store, and wrap pre-ID-mapped flat
+        indexes in an IndexIDMap2 (positions become IDs).
+        """
+        from langchain_community.vectorstores import FAISS
+
+        store = FAISS.load_local(str(folder), self._get_embeddings(), allow_dangerous_deserialization=True)
+        index = store.index
+        if isinstance(index, faiss.IndexFlat):
+            id_mapped = faiss.IndexIDMap2(faiss.IndexFlatL2(index.d))
+            if index.ntotal:
+                id_mapped.add_with_ids(
+                    index.reconstruct_n(0, index.ntotal),
+                    np.array(sorted(store.index_to_docstore_id), dtype=np.int64),
                 )
-                logger.info(f"  ✓ FAISS index loaded ({self.total_chunks} chunks)")
-            except Exception as e:
-                logger.warning(f"Could not load existing index: {e}")
-                self._vector_store = None
+            index = id_mapped
+            logger.info("  ✓ Upgraded FAISS index to ID-mapped format")
+
+        self._chunks.clear()
+        items = sorted((int(vid), ds_id) for vid, ds_id in store.index_to_docstore_id.items())
+        for start in range(0, len(items), 1000):
+            batch = [(vid, store.docstore.search(ds_id)) for vid, ds_id in items[start:start + 1000]]
+            batch = [(vid, doc) for vid, doc in batch if isinstance(doc, Document)]
+            self._chunks.add([vid for vid, _ in batch], [doc for _, doc in batch])
+
+        meta_path = folder / "index_meta.json"
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+        ann_index.configure(index)
+        tombstones = frozenset(meta.get("tombstones", []))
+        self._trained_size = meta.get("trained_size", index.ntotal)
+        self._next_vector_id = max([vid for vid, _ in items] + list(tombstones), default=-1) + 1
+        self._publish(shards=(index,), shard_by=settings.INDEX_SHARD_BY, base_mmapped=False, base_paths=(),
+                      delta=(), delta_starts=(), delta_from=self._next_vector_id, tombstones=tombstones)
+        logger.info(f"  ✓ Moved {len(items)} chunks from the pickled docstore to the chunk store")
 
     def _get_all_documents(self) -> List[Document]:
-        """Retrieve all stored documents from FAISS docstore."""
-        if self._vector_store is None:
-            return []
-        store = self._vector_store.docstore._dict
-        return list(store.values())
+        """Retrieve all stored documents from the chunk store."""
+        return list(self._chunks.iter_documents())
 
     def load_existing_index(self):
         """Call this on startup to restore persisted index."""
         self._load_index()
 
+    async def startup(self):
+        """
+        Background warm-up run from the app lifespan: restore the persisted
+        index (writers wait on the write lock meanwhile), then load the
+        embedding model and run one dummy encode so the first real query
+        doesn't pay for it.
+        """
+        from fastapi.concurrency import run_in_threadpool
+        start = datetime.utcnow()
+        try:
+            async with self._write_lock:
+                await run_in_threadpool(self._load_index)
+            await run_in_threadpool(self.warm_up)
+            self.startup_state = "ready"
+            elapsed = (datetime.utcnow() - start).total_seconds()
+            logger.info(f"  ✓ Warm-up complete in {elapsed:.1f}s — {self.num_documents} docs, {self.total_chunks} chunks")
+        except Exception as e:
+            self.startup_state = "failed"
+            logger.error(f"Warm-up failed: {e}", exc_info=True)
+
+    def warm_up(self):
+        self._get_embeddings().embed_documents(["warm-up"])
+
+    @property
+    def is_started(self) -> bool:
+        return self.startup_state == "ready"
+
 
 # Singleton
 vector_store_service = VectorStoreService()
@@ -0,0 +1,74 @@
+"""
+ANN index modes vs exact search: recall@k, query latency and memory.
+
+Builds each FAISS_INDEX_TYPE with ann_index.build_index (the same code the
+vector store uses) over N synthetic 384-d unit vectors drawn around a few
+thousand topic centres — uniform random data is a worst case no real
+embedding corpus looks like. Queries are perturbed corpus vectors; recall@k
+is measured against the flat index. Memory is the serialized index size
+scaled to one million chunks (docstore excluded). Run from backend/:
+
+    python -m benchmarks.bench_ann [N]
+"""
+
+import sys
+import time
+
+import faiss
+import numpy as np
+
+import benchmarks.common  # noqa: F401  (temp FAISS_INDEX_PATH)
+from app.services import ann_index
+
+DIM = 384
+K = 10
+NUM_QUERIES = 500
+TOPICS = 2000
+
+
+def make_corpus(n: int, rng: np.random.Generator) -> np.ndarray:
+    centres = rng.standard_normal((TOPICS, DIM)).astype(np.float32)
+    x = centres[rng.integers(0, TOPICS, n)] + 0.6 * rng.standard_normal((n, DIM)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def latency_ms(index: faiss.Index, queries: np.ndarray):
+    """Single-query latency as one request sees it (no OpenMP fan-out)."""
+    threads = faiss.omp_get_max_threads()
+    faiss.omp_set_num_threads(1)
+    samples = []
+    for q in queries:
+        t = time.perf_counter()
+        index.search(q[None, :], K)
+        samples.append((time.perf_counter() - t) * 1000)
+    faiss.omp_set_num_threads(threads)
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rng = np.random.default_rng(0)
+    corpus = make_corpus(n, rng)
+    ids = np.arange(n, dtype=np.int64)
+    queries = corpus[rng.integers(0, n, NUM_QUERIES)] + 0.02 * rng.standard_normal((NUM_QUERIES, DIM)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    truth = None
+    print(f"N={n}, dim={DIM}, k={K}, nlist={ann_index.nlist_for(n)}, pq_m={ann_index.pq_m_for(DIM)}")
+    print(f"{'type':>6} {'build s':>8} {f'recall@{K}':>10} {'p50 ms':>8} {'p99 ms':>8} {'MB / 1M chunks':>15}")
+    for kind in ("flat", "ivf", "hnsw", "ivfpq"):
+        t = time.perf_counter()
+        index = ann_index.build_index(kind, corpus, ids)
+        build_s = time.perf_counter() - t
+
+        _, found = index.search(queries, K)
+        if truth is None:
+            truth = found
+        recall = np.mean([len(set(f) & set(tr)) / K for f, tr in zip(found, truth)])
+        p50, p99 = latency_ms(index, queries)
+        mb_per_million = faiss.serialize_index(index).nbytes / n * 1_000_000 / 2**20
+        print(f"{kind:>6} {build_s:>8.1f} {recall:>10.3f} {p50:>8.2f} {p99:>8.2f} {mb_per_million:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Answer cache: miss vs hit latency and invalidation on delete.
+
+Run from backend/:
+
+    python -m benchmarks.bench_answer_cache
+"""
+
+import asyncio
+import time
+
+from benchmarks.common import HashEmbeddings, StubChatModel, make_chunks, doc_metadata
+from app.services.vector_store import vector_store_service
+from app.services.llm_provider import llm_provider
+from app.services.rag_pipeline import rag_pipeline
+from app.services.answer_cache import answer_cache
+
+QUESTIONS = ["What is the refund policy?", "How long is the warranty?", "Who do I contact for support?"]
+
+
+async def timed_answer(question: str):
+    start = time.perf_counter()
+    _, _, tokens, _ = await rag_pipeline.aanswer(question)
+    return (time.perf_counter() - start) * 1000, tokens
+
+
+async def main():
+    embedder = HashEmbeddings()
+    vector_store_service._get_embeddings = lambda: embedder
+    for d in range(3):
+        await vector_store_service.add_documents(make_chunks(f"doc{d}", 40), doc_metadata(f"doc{d}", 40))
+    llm_provider.use(StubChatModel(first_token_ms=400, token_ms=10))
+
+    for q in QUESTIONS:
+        miss_ms, miss_tokens = await timed_answer(q)
+        hit_ms, hit_tokens = await timed_answer(q)
+        print(f"{q:<32} miss={miss_ms:7.1f}ms tokens={miss_tokens:<4} hit={hit_ms:6.2f}ms tokens={hit_tokens}")
+
+    for d in range(3):
+        await vector_store_service.delete_document(f"doc{d}")
+    print("after deleting all docs:", answer_cache.snapshot())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+"""
+/chat/batch vs the sequential loop evaluation jobs used to run.
+
+Retrieval: N questions through similarity_search one by one vs one
+similarity_search_batch call (one embed call + one multi-query FAISS
+search), with an embedder that costs a fixed overhead per call plus a little
+per text, like a sentence-transformer forward pass.
+
+End to end: N questions through RAGPipeline.aanswer sequentially vs
+abatch_answer (BATCH_LLM_CONCURRENCY calls in flight), with a local stub LLM
+that takes LLM_MS per answer and fails FLAKY of its calls, so retries show
+up in the numbers. The HTTP endpoint is exercised once at the end. Run from
+backend/:
+
+    python -m benchmarks.bench_batch [N]
+"""
+
+import asyncio
+import json
+import random
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import HashEmbeddings, StubChatModel, make_chunks, doc_metadata
+from app.core.config import settings
+from app.services.vector_store import vector_store_service
+from app.services.llm_provider import llm_provider
+from app.services.rag_pipeline import rag_pipeline
+from main import app
+
+LLM_MS = 200
+FLAKY = 0.1
+
+
+class FlakyChatModel(StubChatModel):
+    """StubChatModel that raises on a fraction of calls, like a rate-limited API."""
+
+    async def _agenerate(self, *args, **kwargs):
+        if random.random() < FLAKY:
+            await asyncio.sleep(0.05)
+            raise RuntimeError("429 Too Many Requests")
+        return await super()._agenerate(*args, **kwargs)
+
+
+def questions(n: int):
+    return [f"What does doc{i % 10} say about w{(i * 37) % 997} and w{(i * 11) % 997}?" for i in range(n)]
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    settings.ANSWER_CACHE_ENABLED = False   # every question must reach the LLM
+    settings.BATCH_RETRY_BACKOFF_SECONDS = 0.05
+    settings.LLM_MAX_RETRIES = 0              # the sequential baseline as it was: one attempt per question
+    embedder = HashEmbeddings(cost_ms=0.5, call_overhead_ms=8)
+    vector_store_service._get_embeddings = lambda: embedder
+    for d in range(10):
+        await vector_store_service.add_documents(make_chunks(f"doc{d}", 50), doc_metadata(f"doc{d}", 50))
+    random.seed(0)
+    llm_provider.use(FlakyChatModel(first_token_ms=LLM_MS, token_ms=0))
+
+    # ── Retrieval only ────────────────────────────────────────────────────────
+    qs = questions(n)
+    vector_store_service.query_embedder._cache.clear()
+    start = time.perf_counter()
+    for q in qs:
+        vector_store_service.similarity_search(q, k=5)
+    loop_s = time.perf_counter() - start
+
+    vector_store_service.query_embedder._cache.clear()
+    start = time.perf_counter()
+    vector_store_service.similarity_search_batch(qs, k=5)
+    batch_s = time.perf_counter() - start
+    print(f"retrieval, {n} questions: loop {loop_s * 1000:.0f} ms ({n / loop_s:.0f} q/s), "
+          f"batch {batch_s * 1000:.0f} ms ({n / batch_s:.0f} q/s)")
+
+    # ── End to end (stub LLM) ─────────────────────────────────────────────────
+    qs = [q + " (again)" for q in questions(n)]   # fresh query-embedding cache entries
+    start = time.perf_counter()
+    failed = 0
+    for q in qs:
+        try:
+            await rag_pipeline.aanswer(q, top_k=5)
+        except Exception:
+            failed += 1
+    loop_s = time.perf_counter() - start
+    print(f"end to end, sequential aanswer: {loop_s:.1f}s ({n / loop_s:.1f} q/s), {failed} failed (no retry)")
+
+    qs = [q + " (batch)" for q in questions(n)]
+    start, first_ms, failed = time.perf_counter(), None, 0
+    async for _, result in rag_pipeline.abatch_answer(qs, top_k=5):
+        if first_ms is None:
+            first_ms = (time.perf_counter() - start) * 1000
+        failed += isinstance(result, Exception)
+    batch_s = time.perf_counter() - start
+    print(f"end to end, abatch_answer (concurrency {settings.BATCH_LLM_CONCURRENCY}): {batch_s:.1f}s "
+          f"({n / batch_s:.1f} q/s), first answer after {first_ms:.0f} ms, {failed} failed after retries")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        body = {"questions": [q + " (http)" for q in questions(20)]}
+        r = await client.post("/api/v1/chat/batch", json=body)
+        r.raise_for_status()
+        events = [line[len("event: "):] for line in r.text.splitlines() if line.startswith("event: ")]
+        done = json.loads(r.text.rstrip().splitlines()[-1][len("data: "):])
+    print(f"POST /chat/batch, 20 questions: {events.count('answer')} answer events, "
+          f"{events.count('error')} errors, done={done}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
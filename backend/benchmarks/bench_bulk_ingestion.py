@@ -0,0 +1,57 @@
+"""
+Bulk ingestion vs sequential single uploads for many small files.
+
+Sequential = one ingest_file() per file, persisting the index every time
+(what /documents/upload does). Bulk = one background job: concurrent parse,
+pooled embedding, a single persist. Run from backend/:
+
+    python -m benchmarks.bench_bulk_ingestion [num_files]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import HashEmbeddings
+from app.services.bulk_ingestion import bulk_ingestion_service, collect_files
+from app.services.ingestion import ingestion_pipeline
+from app.services.vector_store import vector_store_service
+
+
+def make_files(directory: Path, n: int, tag: str):
+    for i in range(n):
+        body = " ".join(f"{tag}word{(i * 13 + j) % 4000}" for j in range(300))
+        (directory / f"{tag}{i:05d}.txt").write_text(f"Note {i} ({tag}).\n\n{body}")
+
+
+async def main(num_files: int):
+    embedder = HashEmbeddings(cost_ms=0.3, call_overhead_ms=4.0)
+    vector_store_service._get_embeddings = lambda: embedder
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seq_dir, bulk_dir = Path(tmp) / "seq", Path(tmp) / "bulk"
+        seq_dir.mkdir(), bulk_dir.mkdir()
+        make_files(seq_dir, num_files, "seq")
+        make_files(bulk_dir, num_files, "bulk")
+        await ingestion_pipeline.parse(str(next(seq_dir.iterdir())))   # warm the process pool
+
+        start = time.perf_counter()
+        for path in sorted(seq_dir.iterdir()):
+            await ingestion_pipeline.ingest_file(str(path))
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        job = bulk_ingestion_service.start_job(collect_files(bulk_dir, Path(tmp) / "x"))
+        await job.task
+        bulk = time.perf_counter() - start
+
+    ingestion_pipeline.shutdown()
+    print(f"{num_files} files, {vector_store_service.total_chunks} chunks indexed")
+    print(f"  sequential uploads: {sequential:7.1f}s  ({num_files / sequential:6.1f} files/s)")
+    print(f"  bulk job:           {bulk:7.1f}s  ({num_files / bulk:6.1f} files/s)  status={job.status}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
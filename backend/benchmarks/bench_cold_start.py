@@ -0,0 +1,88 @@
+"""
+Cold start: import cost of `main` and time until the server accepts traffic
+vs. time until it is warm.
+
+"eager" additionally imports what main used to pull in at module load
+(langchain_openai, the document loaders, HuggingFaceEmbeddings); "lazy" is
+the current tree. The lifespan part swaps in an embedder whose model load
+takes MODEL_LOAD_S and checks that startup no longer blocks on it.
+Run from backend/:
+
+    python -m benchmarks.bench_cold_start
+"""
+
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+from benchmarks.common import HashEmbeddings
+
+EAGER_IMPORTS = (
+    "import langchain_openai, langchain_community.document_loaders; "
+    "from langchain_community.embeddings import HuggingFaceEmbeddings; "
+)
+HEAVY_MODULES = ("langchain_openai", "openai", "langchain_community.document_loaders",
+                 "langchain_community.embeddings", "sentence_transformers", "torch")
+MODEL_LOAD_S = 2.0
+RUNS = 3
+
+
+def import_time(eager: bool) -> dict:
+    code = (
+        "import sys, time, json; t = time.perf_counter(); "
+        + (EAGER_IMPORTS if eager else "")
+        + "import main; ms = (time.perf_counter() - t) * 1000; "
+        + f"print(json.dumps({{'ms': ms, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))"
+    )
+    samples = []
+    for _ in range(RUNS):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {"ms": min(s["ms"] for s in samples), "loaded": samples[0]["loaded"]}
+
+
+class SlowLoadingEmbeddings(HashEmbeddings):
+    """First call pays a one-off model-load delay, like sentence-transformers."""
+
+    def embed_documents(self, texts):
+        if not self.calls:
+            time.sleep(MODEL_LOAD_S)
+        return super().embed_documents(texts)
+
+
+async def lifespan_timings() -> dict:
+    from main import app, lifespan
+    from app.services.vector_store import vector_store_service
+
+    embedder = SlowLoadingEmbeddings()
+    vector_store_service._get_embeddings = lambda: embedder
+    t = time.perf_counter()
+    async with lifespan(app):
+        accepting_ms = (time.perf_counter() - t) * 1000
+        while vector_store_service.startup_state == "starting":
+            await asyncio.sleep(0.01)
+        ready_ms = (time.perf_counter() - t) * 1000
+        first = time.perf_counter()
+        vector_store_service.embed_query("first query")
+        first_query_ms = (time.perf_counter() - first) * 1000
+    return {"accepting_ms": accepting_ms, "ready_ms": ready_ms,
+            "first_query_ms": first_query_ms, "state": vector_store_service.startup_state}
+
+
+def main():
+    print(f"{'imports':>8} {'import main ms':>15}  heavy modules loaded")
+    for eager in (True, False):
+        r = import_time(eager)
+        print(f"{'eager' if eager else 'lazy':>8} {r['ms']:>15.0f}  {', '.join(r['loaded']) or '-'}")
+
+    r = asyncio.run(lifespan_timings())
+    print(f"\nlifespan with a {MODEL_LOAD_S:.0f}s model load:")
+    print(f"  accepting connections after {r['accepting_ms']:.0f} ms")
+    print(f"  ready ({r['state']}) after {r['ready_ms']:.0f} ms")
+    print(f"  first query embed {r['first_query_ms']:.1f} ms (model already warm)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Search latency while documents are being ingested.
+
+Indexes BASE_DOCS documents, then runs READERS threads issuing searches
+(precomputed query vectors, hybrid on, k=5) for IDLE_SECONDS with no
+writes, and again while WRITE_DOCS more documents go through
+add_documents — the path uploads and bulk jobs take — back to back.
+INDEX_WAL_MAX_MB is 1, so the writer compacts into a new snapshot (FAISS
+shards, BM25 index, manifest) about every dozen documents. The write
+phase crosses FAISS_ANN_MIN_VECTORS, so it includes the switch from a
+flat to an IVF index.
+
+Reports search p50/p99/max and searches/s for both phases, how many
+searches came back empty or raised, and the writer's chunks/s. Run from
+backend/:
+
+    python -m benchmarks.bench_concurrency [WRITE_DOCS] [BASE_DOCS]
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.common import HashEmbeddings, make_chunks
+from app.core.config import settings
+from app.services.vector_store import vector_store_service
+
+DIM = 384
+CHUNKS_PER_DOC = 50
+BASE_DOCS = 300
+READERS = 4
+IDLE_SECONDS = 3.0
+
+
+def doc(d: int, rng: np.random.Generator):
+    doc_id = f"doc{d:05d}"
+    chunks = make_chunks(doc_id, CHUNKS_PER_DOC, words=40)
+    vectors = rng.standard_normal((CHUNKS_PER_DOC, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    metadata = {"doc_id": doc_id, "filename": f"{doc_id}.txt", "file_type": "txt",
+                "num_chunks": CHUNKS_PER_DOC, "upload_time": datetime.utcnow(), "size_bytes": 0}
+    return chunks, metadata, vectors.tolist()
+
+
+def search_loop(stop: threading.Event, queries: np.ndarray, latencies: list, failures: list):
+    i = 0
+    while not stop.is_set():
+        q = queries[i % len(queries)]
+        start = time.perf_counter()
+        try:
+            results = vector_store_service.similarity_search_batch([f"w{i % 997}"], 5, embeddings=[q])[0]
+            if not results:
+                failures.append("empty")
+        except Exception as e:
+            failures.append(type(e).__name__)
+        latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+
+
+def measure(label: str, wall: float, latencies: list, failures: list):
+    arr = np.array(latencies)
+    print(f"{label:>8} {np.percentile(arr, 50):>7.2f} {np.percentile(arr, 99):>7.2f} {arr.max():>8.1f} "
+          f"{len(arr) / wall:>10.0f} {len(failures):>9}")
+
+
+async def main():
+    write_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    base_docs = int(sys.argv[2]) if len(sys.argv) > 2 else BASE_DOCS
+    if vector_store_service._lexical is None:
+        sys.exit("Run with HYBRID_ENABLED=true: the benchmark measures hybrid search")
+    settings.INDEX_WAL_MAX_MB = 1   # snapshots while the readers run
+    settings.FAISS_INDEX_TYPE = "ivf"
+    settings.FAISS_ANN_MIN_VECTORS = (base_docs + write_docs // 2) * CHUNKS_PER_DOC
+    embedder = HashEmbeddings()
+    vector_store_service._get_embeddings = lambda: embedder
+    rng = np.random.default_rng(0)
+    for d in range(base_docs):
+        chunks, metadata, vectors = doc(d, rng)
+        await vector_store_service.add_documents(chunks, metadata, vectors=vectors, persist=False)
+    queries = rng.standard_normal((256, DIM)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    pending = [doc(d, rng) for d in range(base_docs, base_docs + write_docs)]
+
+    print(f"{base_docs * CHUNKS_PER_DOC} chunks indexed; {READERS} search threads; "
+          f"writing {write_docs * CHUNKS_PER_DOC} more (IVF past {settings.FAISS_ANN_MIN_VECTORS})")
+    print(f"{'phase':>8} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>8} {'searches/s':>10} {'failures':>9}")
+
+    for phase in ("idle", "ingest"):
+        stop, latencies, failures = threading.Event(), [], []
+        threads = [threading.Thread(target=search_loop, args=(stop, queries, latencies, failures))
+                   for _ in range(READERS)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        if phase == "idle":
+            await asyncio.sleep(IDLE_SECONDS)
+        else:
+            first_seq = vector_store_service._persistence.current_seq()
+            for chunks, metadata, vectors in pending:
+                await vector_store_service.add_documents(chunks, metadata, vectors=vectors, persist=False)
+            write_wall = time.perf_counter() - start
+            snapshots = vector_store_service._persistence.current_seq() - first_seq
+        stop.set()
+        for t in threads:
+            t.join()
+        measure(phase, time.perf_counter() - start, latencies, failures)
+
+    print(f"writer: {write_docs * CHUNKS_PER_DOC / write_wall:.0f} chunks/s "
+          f"({write_wall:.1f}s, {snapshots} snapshots), index now {vector_store_service.index_type}, "
+          f"{vector_store_service.total_chunks} chunks")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+"""
+Prompt size: the old 40,000-character truncation vs token-budgeted packing.
+
+For each scenario (top_k retrieved chunks of ~800 characters, with or
+without six long history turns) both builders assemble the prompt for the
+same retrieval result; the old one is reproduced inline (concatenate every
+chunk and the last 6 turns, cut the context at 40,000 chars). Reports input
+tokens per request, whether the three best chunks survive intact (quality
+proxy: they are what the answer is usually grounded in), and build time with
+token counts cached at ingestion vs counted per request. Run from backend/:
+
+    python -m benchmarks.bench_context
+"""
+
+import random
+import time
+
+import benchmarks.common  # noqa: F401  (temp FAISS_INDEX_PATH)
+from langchain.schema import Document
+
+from app.core.config import settings
+from app.models.schemas import ChatMessage
+from app.services import token_counter
+from app.services.rag_pipeline import SYSTEM_PROMPT, rag_pipeline
+
+VOCAB = ("the system stores each record in a replicated log and the leader applies entries once a "
+         "quorum of followers acknowledges them while clients retry requests that time out").split()
+REPEAT = 200
+
+
+def sentence(rng: random.Random) -> str:
+    words = [rng.choice(VOCAB) for _ in range(rng.randint(8, 20))]
+    return " ".join(words).capitalize() + "."
+
+
+def chunk(rng: random.Random, i: int, annotate: bool) -> Document:
+    text = ""
+    while len(text) < 760:
+        text += sentence(rng) + " "
+    doc = Document(page_content=text.strip(), metadata={"doc_id": "d", "filename": "manual.pdf", "chunk_index": i})
+    if annotate:
+        token_counter.annotate(doc)
+    return doc
+
+
+def old_prompt_tokens(question, history, retrieved) -> int:
+    """The previous _build_inputs: every chunk, last 6 turns, 40k-char cut."""
+    context = "\n\n".join(
+        f"Source {i + 1} ({doc.metadata['filename']}): {doc.page_content.replace(chr(10), ' ')}"
+        for i, (doc, _) in enumerate(retrieved)
+    )[:40000]
+    messages = [SYSTEM_PROMPT.format(context=context), question] + [m.content for m in history[-6:]]
+    return sum(token_counter.count_tokens(m) + 4 for m in messages)
+
+
+def new_prompt_tokens(inputs) -> int:
+    messages = [SYSTEM_PROMPT.format(context=inputs["context"]), inputs["question"]]
+    messages += [m.content for m in inputs["history"]]
+    return sum(token_counter.count_tokens(m) + 4 for m in messages)
+
+
+def main():
+    rng = random.Random(0)
+    print(f"encoding: {token_counter.encoding_name()}, PROMPT_TOKEN_BUDGET={settings.PROMPT_TOKEN_BUDGET}")
+    question = "How does the leader decide when an entry is committed and what do clients do on timeout?"
+    long_turn = " ".join(sentence(rng) for _ in range(12))
+    histories = {"none": [], "6 long turns": [
+        ChatMessage(role="user" if i % 2 == 0 else "assistant", content=long_turn) for i in range(6)
+    ]}
+
+    print(f"{'top_k':>5} {'history':>13} {'old tokens':>11} {'new tokens':>11} {'saved':>6} "
+          f"{'top-3 intact':>13} {'chunks kept':>12} {'build µs (cached / counted)':>28}")
+    for top_k in (5, 10, 20):
+        cached = [(chunk(rng, i, True), 1.0 - i * 0.02) for i in range(top_k)]
+        uncached = [(Document(page_content=d.page_content, metadata={k: v for k, v in d.metadata.items()
+                                                                     if not k.startswith("token_")}), s)
+                    for d, s in cached]
+        for label, history in histories.items():
+            old = old_prompt_tokens(question, history, cached)
+            inputs, sources = rag_pipeline._build_inputs(question, history, cached)
+            new = new_prompt_tokens(inputs)
+            intact = sum(doc.page_content.replace("\n", " ") in inputs["context"] for doc, _ in cached[:3])
+
+            timings = []
+            for retrieved in (cached, uncached):
+                start = time.perf_counter()
+                for _ in range(REPEAT):
+                    rag_pipeline._build_inputs(question, history, retrieved)
+                timings.append((time.perf_counter() - start) / REPEAT * 1e6)
+            print(f"{top_k:>5} {label:>13} {old:>11} {new:>11} {1 - new / old:>6.0%} {intact:>11}/3 "
+                  f"{len(sources):>9}/{top_k:<2} {timings[0]:>15.0f} / {timings[1]:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Deduplication savings on a corpus with overlap.
+
+Corpus: distinct documents that all share a boilerplate header and legal
+footer, plus a share of byte-identical re-uploads. The baseline is the old
+behaviour (every upload embedded and indexed in full).
+
+Exact re-uploads are skipped outright. Repeated chunks inside distinct
+documents only reuse the cached embedding: each still gets its own FAISS
+vector, chunk row and BM25 postings, so the index shrinks by the re-uploads
+alone. "index" is the on-disk size after a snapshot (FAISS + BM25 + chunk
+store); "dup chunks" counts indexed chunks whose text is indexed elsewhere
+too. Run from backend/:
+
+    python -m benchmarks.bench_dedup
+"""
+
+import asyncio
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import HashEmbeddings
+from app.core.config import settings
+from app.services.document_processor import DocumentProcessor
+from app.services.ingestion import ingestion_pipeline
+from app.services.vector_store import vector_store_service
+
+NUM_DOCS = 60
+DUPLICATE_EVERY = 4          # every 4th upload is a re-upload of an earlier file
+HEADER = "ACME Corp Confidential. Internal use only. " * 18
+FOOTER = "This document is provided as-is without warranty of any kind. " * 25
+
+
+def make_corpus(directory: Path):
+    for i in range(NUM_DOCS):
+        body = " ".join(f"topic{i}_{j}" for j in range(900))
+        (directory / f"doc{i:03d}.txt").write_text(f"{HEADER}\n\n{body}\n\n{FOOTER}")
+    uploads = []
+    for i in range(NUM_DOCS):
+        uploads.append(directory / f"doc{i:03d}.txt")
+        if i % DUPLICATE_EVERY == DUPLICATE_EVERY - 1:
+            copy = directory / f"doc{i:03d}_copy.txt"
+            shutil.copy(uploads[-2], copy)
+            uploads.append(copy)
+    return uploads
+
+
+def index_stats():
+    """(bytes on disk after a fresh snapshot, indexed chunks that repeat another's text)."""
+    vector_store_service._write_snapshot()
+    size = sum(f.stat().st_size for f in Path(vector_store_service._root).rglob("*") if f.is_file())
+    distinct = vector_store_service._chunks._reader().execute(
+        "SELECT COUNT(DISTINCT content_hash) FROM chunks").fetchone()[0]
+    return size, vector_store_service.total_chunks - distinct
+
+
+def reset(embedder):
+    vector_store_service.__init__(tempfile.mkdtemp(prefix="rag-bench-"))
+    vector_store_service._get_embeddings = lambda: embedder
+    embedder.texts_embedded = 0
+
+
+async def main():
+    settings.EMBEDDING_CACHE_ENABLED = False   # the baseline run would warm it for the dedup run
+    embedder = HashEmbeddings(cost_ms=0.5, call_overhead_ms=4.0)
+    processor = DocumentProcessor()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = make_corpus(Path(tmp))
+
+        reset(embedder)
+        start = time.perf_counter()
+        for path in uploads:
+            chunks, metadata = processor.process_file(str(path))
+            metadata["doc_id"] = f"{metadata['doc_id']}-{path.stem}"   # old path had no hash check
+            for c in chunks:
+                c.metadata["doc_id"] = metadata["doc_id"]
+            await vector_store_service.add_documents(chunks, metadata)
+        baseline = (time.perf_counter() - start, embedder.texts_embedded, vector_store_service.total_chunks,
+                    *index_stats())
+
+        reset(embedder)
+        await ingestion_pipeline.parse(str(uploads[0]))   # warm the process pool
+        start = time.perf_counter()
+        for path in uploads:
+            await ingestion_pipeline.ingest_file(str(path))
+        deduped = (time.perf_counter() - start, embedder.texts_embedded, vector_store_service.total_chunks,
+                   *index_stats())
+        ingestion_pipeline.shutdown()
+
+    print(f"{len(uploads)} uploads ({len(uploads) - NUM_DOCS} exact re-uploads), shared header/footer in every doc")
+    for label, (wall, embedded, indexed, size, dups) in (("baseline", baseline), ("dedup", deduped)):
+        print(f"  {label:<9} {wall:6.2f}s  chunks embedded={embedded:<6} indexed={indexed:<6} "
+              f"dup chunks={dups:<5} index={size / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+"""
+Delete cost vs corpus size.
+
+Compares the old rebuild-on-delete strategy (re-embed every remaining chunk)
+with ID-based removal. Run from backend/:
+
+    python -m benchmarks.bench_delete
+"""
+
+import asyncio
+import tempfile
+
+from benchmarks.common import HashEmbeddings, make_chunks, doc_metadata, timed
+from app.services.vector_store import VectorStoreService
+from langchain_community.vectorstores import FAISS
+
+CHUNKS_PER_DOC = 50
+EMBED_COST_MS = 0.5   # ~MiniLM-L6 per-chunk CPU cost at batch size 32
+
+
+async def run(num_docs: int) -> dict:
+    service = VectorStoreService(tempfile.mkdtemp(prefix="rag-bench-"))
+    embedder = HashEmbeddings(cost_ms=EMBED_COST_MS)
+    service._get_embeddings = lambda: embedder
+    for d in range(num_docs):
+        doc_id = f"doc{d:05d}"
+        await service.add_documents(make_chunks(doc_id, CHUNKS_PER_DOC), doc_metadata(doc_id, CHUNKS_PER_DOC))
+
+    results = {}
+    remaining = [doc for doc in service._get_all_documents() if doc.metadata["doc_id"] != "doc00000"]
+    with timed("rebuild_ms", results):
+        FAISS.from_documents(remaining, embedder)
+
+    embedder.texts_embedded = 0
+    with timed("by_id_ms", results):
+        service._apply_delete("doc00001")
+    results["by_id_texts_embedded"] = embedder.texts_embedded
+    return results
+
+
+def main():
+    print(f"{'docs':>6} {'chunks':>8} {'rebuild ms':>12} {'by-id ms':>10} {'re-embedded':>12}")
+    for num_docs in (10, 50, 200):
+        r = asyncio.run(run(num_docs))
+        print(f"{num_docs:>6} {num_docs * CHUNKS_PER_DOC:>8} {r['rebuild_ms']:>12.1f} "
+              f"{r['by_id_ms']:>10.2f} {r['by_id_texts_embedded']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Persistent embedding cache: cold build vs rebuild of an unchanged corpus.
+
+The rebuild starts from an empty in-memory index (as after a crash, or a
+delete + re-upload), so every vector must come from the on-disk cache.
+A small cache run shows LRU eviction. Run from backend/:
+
+    python -m benchmarks.bench_embedding_cache
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import HashEmbeddings, make_chunks
+from app.services.embedding_cache import EmbeddingCache
+from app.services import vector_store as vs
+
+NUM_CHUNKS = 20000
+
+
+def run(texts, embedder, label):
+    embedder.texts_embedded = 0
+    start = time.perf_counter()
+    for i in range(0, len(texts), 256):
+        vs.vector_store_service.embed_documents(texts[i:i + 256])
+    wall = time.perf_counter() - start
+    print(f"  {label:<22} {wall:6.2f}s  {len(texts) / wall:9.0f} chunks/s  model calls for {embedder.texts_embedded} texts")
+
+
+def main():
+    texts = [c.page_content for c in make_chunks("corpus", NUM_CHUNKS, words=60)]
+    embedder = HashEmbeddings(cost_ms=0.5, call_overhead_ms=4.0)
+    vs.vector_store_service._get_embeddings = lambda: embedder
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vs.embedding_cache = EmbeddingCache(Path(tmp) / "big", max_bytes=512 * 1024 * 1024)
+        print(f"{NUM_CHUNKS} chunks")
+        run(texts, embedder, "cold (empty cache)")
+        vs.embedding_cache = EmbeddingCache(Path(tmp) / "big", max_bytes=512 * 1024 * 1024)  # reopen from disk
+        run(texts, embedder, "rebuild (warm cache)")
+
+        vs.embedding_cache = EmbeddingCache(Path(tmp) / "small", max_bytes=NUM_CHUNKS // 4 * 384 * 4)
+        run(texts, embedder, "cold, cache = 25%")
+        run(texts[-NUM_CHUNKS // 5:], embedder, "recent 20% again")
+        print("  small cache:", vs.embedding_cache.snapshot())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Embedding backends on CPU: torch vs ONNX Runtime (fp32 and int8).
+
+Each backend runs in a fresh process over the same SENTENCES texts, mixed
+lengths (a few words, like queries, up to a few hundred, like chunks),
+embedded INGEST_EMBED_BATCH_SIZE at a time as ingestion does:
+
+  cold s     app imports, model load and first vector in a fresh process
+  sent/s     steady-state throughput
+  RSS MB     peak resident memory of that process
+  torch      whether torch ended up imported
+  cos mean/min, top-10   agreement with the torch vectors: per-text cosine,
+                         and the share of each query's 10 nearest texts that
+                         match the torch backend's
+
+For the ONNX rows, "padding" is the share of padded positions in the batches
+actually run (length-sorted) vs batching texts in arrival order. Needs
+sentence-transformers and onnxruntime installed; the ONNX export runs first
+if EMBEDDING_ONNX_DIR has none. Run from backend/:
+
+    python -m benchmarks.bench_embeddings [SENTENCES] [THREADS]
+"""
+
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKENDS = (("torch", False), ("onnx", False), ("onnx", True))
+QUERIES = 200
+K = 10
+
+
+def make_texts(n: int):
+    rng = random.Random(0)
+    vocabulary = ("the a of to and in is for that on with as by this from be are at or it an which "
+                  "document retrieval index vector search query answer model chunk embedding cache "
+                  "latency memory throughput server request response token context upload file page "
+                  "policy contract payment invoice customer account report quarter revenue growth "
+                  "risk compliance section clause term date party agreement notice period renewal").split()
+    return [" ".join(rng.choice(vocabulary) for _ in range(int(rng.lognormvariate(3.5, 1.0)) + 3)) + "."
+            for _ in range(n)]
+
+
+def label(backend: str, int8: bool) -> str:
+    return f"{backend}-int8" if int8 else backend
+
+
+def worker(backend: str, int8: bool, out: str, n: int, threads: int):
+    start = time.perf_counter()
+    from app.core.config import settings
+
+    settings.EMBEDDING_BACKEND = backend
+    settings.EMBEDDING_ONNX_INT8 = int8
+    settings.EMBEDDING_THREADS = threads
+    from app.services.vector_store import vector_store_service
+
+    model = vector_store_service._get_embeddings()
+    model.embed_documents(["warm-up"])
+    cold_s = time.perf_counter() - start
+
+    import resource
+
+    texts = make_texts(n)
+    step = settings.INGEST_EMBED_BATCH_SIZE
+    start = time.perf_counter()
+    vectors = [v for i in range(0, n, step) for v in model.embed_documents(texts[i:i + step])]
+    rate = n / (time.perf_counter() - start)
+    np.save(out, np.array(vectors, dtype=np.float32))
+
+    result = {"cold_s": cold_s, "rate": rate, "torch": "torch" in sys.modules,
+              "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    if backend == "onnx":
+        result["padding"] = [padding_share(model, texts, step, sort) for sort in (True, False)]
+    print(json.dumps(result))
+
+
+def padding_share(model, texts, step: int, sort: bool) -> float:
+    padded = total = 0
+    for i in range(0, len(texts), step):
+        lengths = [len(e.ids) for e in model._tokenizer.encode_batch(texts[i:i + step])]
+        if sort:
+            lengths.sort()
+        for j in range(0, len(lengths), model.batch_size):
+            batch = lengths[j:j + model.batch_size]
+            padded += max(batch) * len(batch) - sum(batch)
+            total += max(batch) * len(batch)
+    return padded / total
+
+
+def agreement(vectors: np.ndarray, reference: np.ndarray):
+    cosine = (vectors * reference).sum(axis=1)
+    queries = np.arange(0, len(vectors), max(1, len(vectors) // QUERIES))[:QUERIES]
+
+    def neighbours(m):
+        return np.argsort(-(m[queries] @ m.T), axis=1)[:, 1:K + 1]
+
+    same = [len(set(a) & set(b)) / K for a, b in zip(neighbours(vectors), neighbours(reference))]
+    return cosine.mean(), cosine.min(), np.mean(same)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+    from app.core.config import settings
+    from app.services.onnx_embeddings import CONFIG_FILE, model_dir
+
+    if not (model_dir(settings.EMBEDDING_MODEL) / CONFIG_FILE).exists():
+        subprocess.run([sys.executable, "-m", "app.services.onnx_embeddings"], check=True)
+
+    print(f"{settings.EMBEDDING_MODEL}, {n} texts, threads={threads or 'default'}, "
+          f"batch {settings.EMBEDDING_BATCH_SIZE}")
+    print(f"{'backend':>10} {'cold s':>7} {'sent/s':>8} {'RSS MB':>7} {'torch':>6} "
+          f"{'cos mean':>9} {'cos min':>8} {'top-10':>7}  padding sorted / arrival")
+    reference = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend, int8 in BACKENDS:
+            out = str(Path(tmp) / f"{label(backend, int8)}.npy")
+            proc = subprocess.run([sys.executable, "-m", "benchmarks.bench_embeddings", "--worker",
+                                   backend, str(int(int8)), out, str(n), str(threads)],
+                                  capture_output=True, text=True, check=True)
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            vectors = np.load(out)
+            reference = vectors if reference is None else reference
+            mean, low, same = agreement(vectors, reference)
+            padding = " / ".join(f"{p:.0%}" for p in r.get("padding", ())) or "-"
+            print(f"{label(backend, int8):>10} {r['cold_s']:>7.1f} {r['rate']:>8.0f} {r['rss_mb']:>7.0f} "
+                  f"{'yes' if r['torch'] else 'no':>6} {mean:>9.4f} {low:>8.4f} {same:>7.0%}  {padding}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        backend, int8, out, n, threads = sys.argv[2:7]
+        worker(backend, int8 == "1", out, int(n), int(threads))
+    else:
+        main()
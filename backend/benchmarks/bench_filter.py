@@ -0,0 +1,96 @@
+"""
+Filtered retrieval latency as unrelated documents accumulate.
+
+Grows a corpus of 100-chunk documents (every 10th one a PDF, the rest TXT)
+and, at each size, times similarity_search for:
+
+  unfiltered     the whole store
+  one doc        filters.doc_ids = [a single document]   (exact scan of its vectors)
+  file_type=pdf  10% of the corpus                       (selector search once large)
+  post-filter    the old workaround: unfiltered search with k raised to
+                 POST_FILTER_K, keeping only the wanted doc's chunks; reports
+                 how often that still returned fewer than K of them
+
+Run from backend/:
+
+    python -m benchmarks.bench_filter [max N]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.common import HashEmbeddings, make_chunks
+from app.models.schemas import RetrievalFilter
+from app.services.vector_store import vector_store_service
+
+DIM = 384
+K = 5
+DOCS_OF = 100
+POST_FILTER_K = 200
+QUERIES = 100
+
+
+def add_docs(first_doc: int, last_doc: int, rng: np.random.Generator):
+    for d in range(first_doc, last_doc):
+        doc_id = f"doc{d:05d}"
+        file_type = "pdf" if d % 10 == 0 else "txt"
+        chunks = make_chunks(doc_id, DOCS_OF, words=40)
+        for chunk in chunks:
+            chunk.metadata["filename"] = f"{doc_id}.{file_type}"
+        vectors = rng.standard_normal((DOCS_OF, DIM)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        first = d * DOCS_OF
+        vector_store_service._apply_add(
+            doc_id, chunks, vectors, list(range(first, first + DOCS_OF)),
+            {"doc_id": doc_id, "filename": f"{doc_id}.{file_type}", "file_type": file_type},
+            replaces=[], rebuild=False,
+        )
+
+
+def p50_ms(queries, **kwargs) -> float:
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        vector_store_service.similarity_search(q, **kwargs)
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(samples, 50))
+
+
+def main():
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    embedder = HashEmbeddings(dim=DIM)
+    vector_store_service._get_embeddings = lambda: embedder
+    rng = np.random.default_rng(0)
+    queries = [f"question {i} about w{i % 997} w{(i * 7) % 997}" for i in range(QUERIES)]
+    for q in queries:
+        vector_store_service.embed_query(q)
+
+    one_doc = RetrievalFilter(doc_ids=["doc00003"])
+    pdfs = RetrievalFilter(file_types=["pdf"])
+    print(f"{'N':>8} {'unfiltered':>11} {'one doc':>8} {'pdf 10%':>8} {'post-filter':>12} {'short':>6}   (p50 ms)")
+    docs = 0
+    for n in (10_000, 50_000, 200_000):
+        if n > max_n:
+            break
+        add_docs(docs, n // DOCS_OF, rng)
+        docs = n // DOCS_OF
+
+        unfiltered = p50_ms(queries, k=K)
+        filtered = p50_ms(queries, k=K, filters=one_doc)
+        by_type = p50_ms(queries, k=K, filters=pdfs)
+
+        short, samples = 0, []
+        for q in queries:
+            start = time.perf_counter()
+            hits = vector_store_service.similarity_search(q, k=POST_FILTER_K)
+            kept = [doc for doc, _ in hits if doc.metadata["doc_id"] == "doc00003"][:K]
+            samples.append((time.perf_counter() - start) * 1000)
+            short += len(kept) < K
+        print(f"{n:>8} {unfiltered:>11.2f} {filtered:>8.2f} {by_type:>8.2f} "
+              f"{np.percentile(samples, 50):>12.2f} {short / QUERIES:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Hybrid retrieval (dense + BM25, RRF) vs dense only: quality and latency.
+
+Builds a labelled local corpus where each query has exactly one relevant
+chunk. Chunk prose is drawn from a vocabulary of concepts with several
+synonymous surface forms; every chunk also carries an identifier (error code
+or config key). The dense stand-in embeds by concept — synonyms land close
+together, identifiers barely register, as with a real sentence encoder —
+while BM25 sees only surface tokens. Two query sets:
+
+  paraphrase   the target chunk's concepts in different surface forms
+  identifier   "how to fix <identifier>" for the target chunk's identifier
+
+Reports recall@K and MRR@10 per set for several fusion weights (0 = dense
+only, 1 = BM25 only), the search latency of each (query embeddings are
+cached up front, so this is retrieval + fusion only), and the BM25 index size.
+Last, BM25 search p50/p99 on its own and while another thread keeps
+deleting a chunk and saving the index (what a snapshot does): searches read
+the published view and should not wait for the save. Run from backend/:
+
+    python -m benchmarks.bench_hybrid [N]
+"""
+
+import hashlib
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from benchmarks.common import HashEmbeddings
+from langchain.schema import Document
+from app.services.vector_store import vector_store_service
+
+DIM = 384
+K = 5
+CONCEPTS = 3000
+SYNONYMS = 8
+CONCEPTS_PER_CHUNK = 12
+WORDS_PER_CHUNK = 40
+CHUNKS_PER_DOC = 50
+SAVE_SECONDS = 3.0
+QUERIES = 300
+WEIGHTS = (0.0, 0.4, 0.5, 0.6, 1.0)
+
+
+class ConceptEmbeddings(HashEmbeddings):
+    """Sum of concept vectors; unknown tokens (identifiers) add only weak hash noise."""
+
+    def __init__(self, concept_vectors: np.ndarray):
+        super().__init__(dim=concept_vectors.shape[1])
+        self.concept_vectors = concept_vectors
+
+    def _vector(self, text: str) -> List[float]:
+        v = np.zeros(self.dim, dtype=np.float32)
+        for token in text.lower().split():
+            if token.startswith("c") and "s" in token and token[1:].replace("s", "").isdigit():
+                v += self.concept_vectors[int(token[1:token.index("s")])]
+            else:
+                seed = int(hashlib.md5(token.encode()).hexdigest()[:8], 16)
+                v += 0.1 * np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        norm = np.linalg.norm(v)
+        return (v / norm if norm else v).tolist()
+
+
+def word(concept: int, rng: np.random.Generator) -> str:
+    return f"c{concept}s{rng.integers(SYNONYMS)}"
+
+
+def identifier(i: int) -> str:
+    if i % 2:
+        return f"ERR-{10000 + i}"
+    return f"svc.pool{i}.max_retries"
+
+
+def build_corpus(n: int, rng: np.random.Generator):
+    topics = [rng.choice(CONCEPTS, CONCEPTS_PER_CHUNK, replace=False) for _ in range(n)]
+    chunks = []
+    for i, topic in enumerate(topics):
+        words = [word(c, rng) for c in rng.choice(topic, WORDS_PER_CHUNK)]
+        words.insert(int(rng.integers(len(words))), identifier(i))
+        doc_id = f"doc{i // CHUNKS_PER_DOC:05d}"
+        chunks.append(Document(
+            page_content=" ".join(words),
+            metadata={"doc_id": doc_id, "filename": f"{doc_id}.txt", "chunk_index": i % CHUNKS_PER_DOC,
+                      "total_chunks": CHUNKS_PER_DOC, "target": i},
+        ))
+    return topics, chunks
+
+
+def query_sets(topics, rng: np.random.Generator):
+    targets = rng.choice(len(topics), QUERIES, replace=False)
+    paraphrase = [(" ".join(word(c, rng) for c in rng.choice(topics[t], 6, replace=False)), t) for t in targets]
+    ident = [(f"how to fix {identifier(t)}", t) for t in targets]
+    return {"paraphrase": paraphrase, "identifier": ident}
+
+
+def evaluate(queries, weight: float):
+    hits, rr, latencies = 0, 0.0, []
+    for text, target in queries:
+        start = time.perf_counter()
+        results = vector_store_service.similarity_search(text, k=10, hybrid_weight=weight)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ranked = [doc.metadata["target"] for doc, _ in results]
+        if target in ranked[:K]:
+            hits += 1
+        if target in ranked:
+            rr += 1 / (ranked.index(target) + 1)
+    return hits / len(queries), rr / len(queries), latencies
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rng = np.random.default_rng(0)
+    concept_vectors = rng.standard_normal((CONCEPTS, DIM)).astype(np.float32)
+    embedder = ConceptEmbeddings(concept_vectors)
+    vector_store_service._get_embeddings = lambda: embedder
+
+    topics, chunks = build_corpus(n, rng)
+    start = time.perf_counter()
+    vectors = np.array(embedder.embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+    for first in range(0, n, CHUNKS_PER_DOC):
+        batch = chunks[first:first + CHUNKS_PER_DOC]
+        doc_id = batch[0].metadata["doc_id"]
+        vector_store_service._apply_add(doc_id, batch, vectors[first:first + CHUNKS_PER_DOC],
+                                        list(range(first, first + len(batch))), {"doc_id": doc_id},
+                                        replaces=[], rebuild=False)
+    lexical = vector_store_service._lexical
+    size_mb = len(pickle.dumps(lexical._view)) / 1e6
+    print(f"N={n} chunks indexed in {time.perf_counter() - start:.1f}s; "
+          f"BM25 index {size_mb:.1f} MB ({lexical.num_terms} terms)")
+
+    sets = query_sets(topics, rng)
+    for queries in sets.values():
+        for text, _ in queries:
+            vector_store_service.embed_query(text)
+    print(f"{'weight':>7} {'set':>11} {'recall@' + str(K):>9} {'MRR@10':>7} {'p50 ms':>7} {'p99 ms':>7}")
+    for weight in WEIGHTS:
+        for name, queries in sets.items():
+            recall, mrr, latencies = evaluate(queries, weight)
+            print(f"{weight:>7.1f} {name:>11} {recall:>9.2f} {mrr:>7.2f} "
+                  f"{np.percentile(latencies, 50):>7.2f} {np.percentile(latencies, 99):>7.2f}")
+
+    texts = [text for queries in sets.values() for text, _ in queries]
+    idle = bm25_latencies(lexical, texts, SAVE_SECONDS)
+    path = Path(tempfile.mkdtemp(prefix="rag-bench-")) / "bm25.pkl"
+    stop, saves = threading.Event(), [0]
+
+    def save_loop():
+        while not stop.is_set():
+            lexical.remove([int(rng.integers(0, n))])
+            lexical.save(path)
+            saves[0] += 1
+
+    saver = threading.Thread(target=save_loop)
+    saver.start()
+    saving = bm25_latencies(lexical, texts, SAVE_SECONDS)
+    stop.set()
+    saver.join()
+    print(f"BM25 search alone:       p50 {np.percentile(idle, 50):.2f} ms, p99 {np.percentile(idle, 99):.2f} ms "
+          f"({len(idle)} searches)")
+    print(f"BM25 search during save: p50 {np.percentile(saving, 50):.2f} ms, p99 {np.percentile(saving, 99):.2f} ms "
+          f"({len(saving)} searches, {saves[0]} saves)")
+
+
+def bm25_latencies(lexical, texts: List[str], seconds: float) -> np.ndarray:
+    latencies, deadline, i = [], time.perf_counter() + seconds, 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        lexical.search(texts[i % len(texts)], 10)
+        latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+    return np.array(latencies)
+
+
+if __name__ == "__main__":
+    main()
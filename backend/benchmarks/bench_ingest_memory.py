@@ -0,0 +1,130 @@
+"""
+Peak memory of ingesting one large file: whole-file load vs streaming.
+
+For each file size, in a fresh process per run (peak RSS only grows):
+
+  worker MB   peak RSS added by what a parse worker does for the file:
+              "load" = process_file on the whole file, then pickling the
+              chunk list back to the API process; "stream" = iter_chunks,
+              pickling each INGEST_EMBED_BATCH_SIZE batch for the queue
+  API MB      peak RSS added in the API process by ingest_file (receiving
+              chunks, embedding, indexing), with INGEST_STREAMING off vs on;
+              the chunks and vectors end up in the index either way
+  ingest s    wall time of that ingest_file
+  chunks      chunks produced (streaming may differ by a few, since
+              chunks run across page boundaries)
+
+Files are .txt (pypdf isn't needed; a .txt streams in 64 KB blocks where
+a PDF streams page by page); embeddings are hash-based stand-ins. Run
+from backend/:
+
+    python -m benchmarks.bench_ingest_memory [SIZE_MB ...]
+"""
+
+import asyncio
+import json
+import pickle
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+DEFAULT_SIZES_MB = (5, 20, 45)
+
+
+def peak_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_file(path: Path, size_mb: int):
+    rng = random.Random(size_mb)
+    words = [f"term{i}" for i in range(5000)]
+    paragraphs = [" ".join(rng.choice(words) for _ in range(rng.randint(20, 200))) + "." for _ in range(500)]
+    with open(path, "w") as f:
+        written, n = 0, 0
+        while written < size_mb * 1024 * 1024:
+            text = f"Section {n}. {paragraphs[n % len(paragraphs)]}\n\n"
+            f.write(text)
+            written += len(text)
+            n += 1
+
+
+def worker_run(path: str, streaming: bool) -> dict:
+    from app.core.config import settings
+    from app.services.document_processor import DocumentProcessor
+
+    settings.MAX_FILE_SIZE_MB = 1024
+    processor = DocumentProcessor()
+    before = peak_mb()
+    if streaming:
+        metadata = processor.file_metadata(path)
+        batch, chunks = [], 0
+        for chunk in processor.iter_chunks(path, metadata["doc_id"], metadata["filename"]):
+            batch.append(chunk)
+            chunks += 1
+            if len(batch) >= settings.INGEST_EMBED_BATCH_SIZE:
+                pickle.dumps(batch)
+                batch = []
+        pickle.dumps(batch)
+    else:
+        result = processor.process_file(path)
+        pickle.dumps(result)
+        chunks = len(result[0])
+    return {"mb": peak_mb() - before, "chunks": chunks}
+
+
+async def ingest_run(path: str, streaming: bool) -> dict:
+    from benchmarks.common import HashEmbeddings
+    from app.core.config import settings
+    from app.services.ingestion import ingestion_pipeline
+    from app.services.vector_store import vector_store_service
+
+    settings.MAX_FILE_SIZE_MB = 1024
+    settings.INGEST_STREAMING = streaming
+    settings.EMBEDDING_CACHE_ENABLED = False
+    embedder = HashEmbeddings()
+    vector_store_service._get_embeddings = lambda: embedder
+    # Start the worker pool (and queue manager) before measuring
+    warm = Path(path).with_name("warm-up.txt")
+    warm.write_text("warm-up " * 200)
+    await ingestion_pipeline.ingest_file(str(warm))
+
+    before = peak_mb()
+    start = time.perf_counter()
+    metadata = await ingestion_pipeline.ingest_file(path)
+    wall = time.perf_counter() - start
+    ingestion_pipeline.shutdown()
+    return {"mb": peak_mb() - before, "s": wall, "chunks": metadata["num_chunks"]}
+
+
+def run_child(mode: str, path: str, streaming: bool) -> dict:
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_ingest_memory", "--child", mode, path,
+                          str(int(streaming))], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or DEFAULT_SIZES_MB
+    print(f"{'file MB':>7} {'path':>7} {'worker MB':>10} {'API MB':>8} {'ingest s':>9} {'chunks':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = Path(tmp) / f"doc{size}.txt"
+            make_file(path, size)
+            for streaming in (False, True):
+                worker = run_child("worker", str(path), streaming)
+                ingest = run_child("ingest", str(path), streaming)
+                print(f"{size:>7} {'stream' if streaming else 'load':>7} {worker['mb']:>10.0f} {ingest['mb']:>8.0f} "
+                      f"{ingest['s']:>9.1f} {worker['chunks']:>8}")
+            path.unlink()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        mode, path, streaming = sys.argv[2], sys.argv[3], sys.argv[4] == "1"
+        result = worker_run(path, streaming) if mode == "worker" else asyncio.run(ingest_run(path, streaming))
+        print(json.dumps(result))
+    else:
+        main()
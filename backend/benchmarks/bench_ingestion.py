@@ -0,0 +1,85 @@
+"""
+Ingestion throughput and event-loop responsiveness.
+
+Compares the old inline path (process_file on the event loop, then one
+embed call) with the staged pipeline (process-pool parse, batched embed
+threads), ingesting several files concurrently. A ticker coroutine measures
+the worst event-loop stall — what a concurrent chat request would feel.
+Run from backend/:
+
+    python -m benchmarks.bench_ingestion
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import HashEmbeddings
+from app.services.document_processor import DocumentProcessor
+from app.services.ingestion import ingestion_pipeline
+from app.services.vector_store import vector_store_service
+
+NUM_FILES = 8
+PAGES_PER_FILE = 150
+PAGE_CHARS = 3000     # ~one PDF page of text
+
+
+def make_corpus(directory: Path):
+    words = [f"term{i}" for i in range(5000)]
+    for f in range(NUM_FILES):
+        pages = []
+        for p in range(PAGES_PER_FILE):
+            body = " ".join(words[(f * 31 + p * 7 + j) % len(words)] for j in range(PAGE_CHARS // 9))
+            pages.append(f"Page {p} of file {f}.\n\n{body}.")
+        (directory / f"file{f}.txt").write_text("\n\n".join(pages))
+
+
+async def ticker(stop: asyncio.Event, lag: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lag.append((time.perf_counter() - start - 0.005) * 1000)
+
+
+async def inline_ingest(processor: DocumentProcessor, path: str):
+    chunks, metadata = processor.process_file(path)   # on the event loop, as before
+    await vector_store_service.add_documents(chunks, metadata)
+    return metadata
+
+
+async def measure(label: str, ingest, paths):
+    stop, lag = asyncio.Event(), []
+    tick = asyncio.create_task(ticker(stop, lag))
+    start = time.perf_counter()
+    metas = await asyncio.gather(*(ingest(p) for p in paths))
+    wall = time.perf_counter() - start
+    stop.set()
+    await tick
+    chunks = sum(m["num_chunks"] for m in metas)
+    pages = NUM_FILES * PAGES_PER_FILE
+    print(f"{label:<10} {pages / wall:8.0f} pages/s {chunks / wall:8.0f} chunks/s   "
+          f"max loop stall {max(lag):7.1f}ms")
+    for m in metas:
+        await vector_store_service.delete_document(m["doc_id"])
+
+
+async def main():
+    embedder = HashEmbeddings(cost_ms=0.3, call_overhead_ms=4.0)
+    vector_store_service._get_embeddings = lambda: embedder
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_corpus(Path(tmp))
+        paths = sorted(str(p) for p in Path(tmp).iterdir())
+        print(f"{NUM_FILES} files x {PAGES_PER_FILE} pages, {os.cpu_count()} cores")
+
+        processor = DocumentProcessor()
+        await measure("inline", lambda p: inline_ingest(processor, p), paths)
+        await ingestion_pipeline.parse(paths[0])   # warm the process pool
+        await measure("pipeline", ingestion_pipeline.ingest_file, paths)
+        ingestion_pipeline.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+"""
+LLM provider behaviour under load, offline, against the fake provider.
+
+CALLS chat calls go through llm_provider.ainvoke at CONCURRENCY in flight,
+with the fake model's latency log-normal around LATENCY_MS (σ = SIGMA, so
+p99 ≈ 4× the median) and ERROR_RATE of calls failing with a 503:
+
+  no retries        what a single ChatOpenAI call per request gave before
+  retries           LLM_MAX_RETRIES with backoff + jitter
+  retries + hedge   plus a duplicate request for calls still unanswered at
+                    the latency distribution's ~p90
+
+Reports p50/p99/max latency, failed calls, and upstream requests per call
+(the cost of retries and hedges). Then an outage: the provider fails every
+call for OUTAGE_CALLS requests, with and without the circuit breaker —
+how long each failed request held its caller and how many requests still
+reached the failing upstream. Run from backend/:
+
+    python -m benchmarks.bench_llm_provider [CALLS]
+"""
+
+import asyncio
+import math
+import sys
+import time
+
+import numpy as np
+from langchain_core.messages import HumanMessage
+
+import benchmarks.common  # noqa: F401  (temp FAISS_INDEX_PATH)
+from app.core.config import settings
+from app.services.fake_llm import FakeChatModel
+from app.services.llm_provider import LLMProvider
+
+CONCURRENCY = 50
+LATENCY_MS = 200
+SIGMA = 0.6
+ERROR_RATE = 0.05
+OUTAGE_CALLS = 200
+
+
+class CountingFakeModel(FakeChatModel):
+    """FakeChatModel that counts the requests it receives."""
+
+    requests: int = 0
+
+    def _draw(self):
+        self.requests += 1
+        return super()._draw()
+
+
+async def run(provider: LLMProvider, calls: int):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies, failed = [], 0
+    messages = [HumanMessage(content="What does the contract say about termination?")]
+
+    async def one():
+        nonlocal failed
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await provider.ainvoke(messages)
+            except Exception:
+                failed += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return np.array(latencies), failed, time.perf_counter() - start
+
+
+async def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    settings.LLM_RETRY_BACKOFF_SECONDS = 0.05
+    p90_ms = LATENCY_MS * math.exp(1.2816 * SIGMA)
+    print(f"{calls} calls, {CONCURRENCY} in flight, fake latency median {LATENCY_MS} ms σ={SIGMA} "
+          f"(p90 ≈ {p90_ms:.0f} ms), {ERROR_RATE:.0%} errors")
+    print(f"{'mode':>16} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7} {'failed':>7} {'upstream/call':>14} {'calls/s':>8}")
+
+    for mode, retries, hedge_ms in (("no retries", 0, 0), ("retries", 2, 0), ("retries + hedge", 2, p90_ms)):
+        settings.LLM_MAX_RETRIES = retries
+        settings.LLM_HEDGE_AFTER_MS = hedge_ms
+        provider = LLMProvider()
+        model = CountingFakeModel(latency_ms=LATENCY_MS, latency_sigma=SIGMA, token_ms=0, error_rate=ERROR_RATE)
+        provider.use(model)
+        latencies, failed, wall = await run(provider, calls)
+        print(f"{mode:>16} {np.percentile(latencies, 50):>7.0f} {np.percentile(latencies, 99):>7.0f} "
+              f"{latencies.max():>7.0f} {failed:>7} {model.requests / calls:>14.2f} {calls / wall:>8.0f}")
+
+    # ── Outage: every call fails ──────────────────────────────────────────────
+    settings.LLM_MAX_RETRIES = 2
+    settings.LLM_HEDGE_AFTER_MS = 0
+    print(f"\noutage, {OUTAGE_CALLS} calls, upstream failing every request after {LATENCY_MS} ms:")
+    print(f"{'breaker':>16} {'p50 ms':>7} {'p99 ms':>7} {'upstream requests':>18} {'circuit':>9}")
+    for label, threshold in (("off", 0), ("after 5 fails", 5)):
+        settings.LLM_CIRCUIT_FAILURES = threshold
+        provider = LLMProvider()
+        model = CountingFakeModel(latency_ms=LATENCY_MS, latency_sigma=0.1, token_ms=0, error_rate=1.0)
+        provider.use(model)
+        latencies, _, _ = await run(provider, OUTAGE_CALLS)
+        print(f"{label:>16} {np.percentile(latencies, 50):>7.0f} {np.percentile(latencies, 99):>7.0f} "
+              f"{model.requests:>18} {provider.snapshot()['circuit']:>9}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
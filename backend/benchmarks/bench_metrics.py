@@ -0,0 +1,93 @@
+"""
+Cost of the per-stage metrics, and what a trace looks like.
+
+  stage()      one metrics.stage() block: METRICS_ENABLED off vs on
+  /chat/ask    REQUESTS sequential requests through the ASGI app (middleware,
+               routing, retrieval, prompt assembly, a zero-latency stub LLM)
+               with metrics off vs on — the worst case for relative overhead,
+               since a real LLM call adds hundreds of ms the metrics never see
+  /metrics     time to render the exposition after the run
+
+Then one request with include_timings=true, to show the per-stage breakdown
+it returns. Caches are off so every request runs the full pipeline. Run
+from backend/:
+
+    python -m benchmarks.bench_metrics [REQUESTS]
+"""
+
+import asyncio
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.common import HashEmbeddings, StubChatModel, make_chunks, doc_metadata
+from app.core import metrics
+from app.core.config import settings
+from app.services.llm_provider import llm_provider
+from app.services.vector_store import vector_store_service
+from main import app
+
+STAGE_ITERATIONS = 200_000
+
+
+def stage_cost_ns() -> float:
+    start = time.perf_counter()
+    for _ in range(STAGE_ITERATIONS):
+        with metrics.stage("bench", "noop"):
+            pass
+    return (time.perf_counter() - start) / STAGE_ITERATIONS * 1e9
+
+
+async def ask_latencies(client: httpx.AsyncClient, requests: int) -> np.ndarray:
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        r = await client.post("/api/v1/chat/ask", json={"question": f"What does doc{i % 10} say about w{i % 997}?"})
+        r.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+async def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    settings.ANSWER_CACHE_ENABLED = False
+    settings.SEMANTIC_CACHE_ENABLED = False
+    embedder = HashEmbeddings()
+    vector_store_service._get_embeddings = lambda: embedder
+    for d in range(10):
+        await vector_store_service.add_documents(make_chunks(f"doc{d}", 200), doc_metadata(f"doc{d}", 200))
+    llm_provider.use(StubChatModel(reply="A short stub answer.", first_token_ms=0, token_ms=0))
+
+    print(f"{'':>12} {'metrics off':>12} {'metrics on':>12} {'overhead':>10}")
+    settings.METRICS_ENABLED = False
+    off = stage_cost_ns()
+    settings.METRICS_ENABLED = True
+    on = stage_cost_ns()
+    print(f"{'stage()':>12} {off:>10.0f}ns {on:>10.0f}ns {on - off:>8.0f}ns")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        await ask_latencies(client, 50)   # warm-up
+        results = {}
+        for enabled in (False, True, False, True):   # interleaved, best of two
+            settings.METRICS_ENABLED = enabled
+            p50 = float(np.percentile(await ask_latencies(client, requests), 50))
+            results[enabled] = min(results.get(enabled, p50), p50)
+        print(f"{'/chat/ask':>12} {results[False]:>10.3f}ms {results[True]:>10.3f}ms "
+              f"{(results[True] / results[False] - 1) * 100:>9.1f}%   (p50, {requests} requests)")
+
+        start = time.perf_counter()
+        r = await client.get("/api/v1/metrics")
+        render_ms = (time.perf_counter() - start) * 1000
+        print(f"{'/metrics':>12} {render_ms:.2f} ms, {len(r.content)} bytes, "
+              f"{sum(1 for line in r.text.splitlines() if not line.startswith('#'))} samples")
+
+        r = await client.post("/api/v1/chat/ask", json={"question": "What does doc3 say about w42?",
+                                                        "include_timings": True})
+        print(f"\ninclude_timings: {r.json()['timings_ms']} (response_time_ms {r.json()['response_time_ms']})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+Startup time and resident memory per worker: pickled langchain docstore vs
+memory-mapped vectors + SQLite chunk store.
+
+Builds one N-chunk corpus (384-d vectors, ~120-word chunks) in both formats:
+"pickle" is the old layout (FAISS.save_local: index.faiss + pickled
+InMemoryDocstore, loaded with FAISS.load_local); "mmap" is the current
+snapshot loaded by VectorStoreService. Each format is then loaded by
+WORKERS concurrent processes, like uvicorn workers, which run a few searches
+and report load time plus private (RssAnon) and shared file-backed
+(RssFile) memory. Run from backend/:
+
+    python -m benchmarks.bench_mmap [N]
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from benchmarks.common import make_chunks
+
+DIM = 384
+DOCS_OF = 100            # chunks per document
+WORKERS = 3
+SEARCHES = 200
+
+WORKER = r"""
+import json, sys, time
+import numpy as np
+import benchmarks.common
+from benchmarks.common import HashEmbeddings
+
+fmt, path = sys.argv[1], sys.argv[2]
+queries = np.random.default_rng(1).standard_normal((%(searches)d, %(dim)d)).astype(np.float32)
+start = time.perf_counter()
+if fmt == "pickle":
+    from langchain_community.vectorstores import FAISS
+    store = FAISS.load_local(path, HashEmbeddings(), allow_dangerous_deserialization=True)
+    load_s = time.perf_counter() - start
+    for q in queries:
+        store.similarity_search_with_score_by_vector(q.tolist(), k=5)
+else:
+    from app.services.vector_store import VectorStoreService
+    store = VectorStoreService(path)
+    store._load_index()
+    load_s = time.perf_counter() - start
+    for q in queries:
+        store._search_by_vector(q.tolist(), 5)
+
+status = dict(line.split(":", 1) for line in open("/proc/self/status") if line.startswith(("VmRSS", "RssAnon", "RssFile")))
+print(json.dumps({"load_s": load_s, **{k: int(v.split()[0]) // 1024 for k, v in status.items()}}))
+""" % {"searches": SEARCHES, "dim": DIM}
+
+
+def build(n: int, root: Path):
+    """Write the corpus in both formats."""
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    from benchmarks.common import HashEmbeddings
+    from app.services.vector_store import VectorStoreService
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    chunks = []
+    for d in range(n // DOCS_OF):
+        chunks.extend(make_chunks(f"doc{d:06d}", DOCS_OF))
+    ids = np.arange(n, dtype=np.int64)
+
+    index = faiss.IndexIDMap2(faiss.IndexFlatL2(DIM))
+    index.add_with_ids(vectors, ids)
+    docstore_ids = [str(i) for i in range(n)]
+    FAISS(
+        embedding_function=HashEmbeddings(),
+        index=index,
+        docstore=InMemoryDocstore(dict(zip(docstore_ids, chunks))),
+        index_to_docstore_id=dict(zip(range(n), docstore_ids)),
+    ).save_local(str(root / "pickle"))
+
+    service = VectorStoreService(str(root / "mmap"))
+    for start in range(0, n, DOCS_OF):
+        doc_id = chunks[start].metadata["doc_id"]
+        service._apply_add(doc_id, chunks[start:start + DOCS_OF], vectors[start:start + DOCS_OF],
+                           list(range(start, start + DOCS_OF)), {"doc_id": doc_id}, replaces=[], rebuild=False)
+    service._write_snapshot()
+    service._chunks.close()
+
+
+def run_workers(fmt: str, path: Path) -> list:
+    procs = [
+        subprocess.Popen([sys.executable, "-c", WORKER, fmt, str(path)], stdout=subprocess.PIPE, text=True)
+        for _ in range(WORKERS)
+    ]
+    return [json.loads(p.communicate()[0].strip().splitlines()[-1]) for p in procs]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        start = time.perf_counter()
+        build(n, root)
+        print(f"N={n} chunks, built both formats in {time.perf_counter() - start:.0f}s; {WORKERS} concurrent workers")
+        print(f"{'format':>7} {'load s':>8} {'RSS MB':>8} {'private MB':>11} {'shared file MB':>15}")
+        for fmt in ("pickle", "mmap"):
+            results = run_workers(fmt, root / fmt)
+            avg = {k: np.mean([r[k] for r in results]) for k in results[0]}
+            print(f"{fmt:>7} {avg['load_s']:>8.2f} {avg['VmRSS']:>8.0f} {avg['RssAnon']:>11.0f} {avg['RssFile']:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
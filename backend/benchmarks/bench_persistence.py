@@ -0,0 +1,78 @@
+"""
+Write amplification and recovery time: full save_local per change vs
+snapshot + write-ahead log.
+
+For a growing corpus, each step adds one document. "full rewrite" is the old
+_persist (write the whole index + pickled docstore); "WAL" appends one
+record and compacts only past INDEX_WAL_MAX_MB, and counts any manifest.json
+rewrite the add caused. Recovery = constructing a
+fresh VectorStoreService and calling load_existing_index(). Run from backend/:
+
+    python -m benchmarks.bench_persistence
+"""
+
+import asyncio
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+
+import faiss
+
+from benchmarks.common import HashEmbeddings, make_chunks, doc_metadata
+from app.core.config import settings
+from app.services import vector_store as vs
+
+CHUNKS_PER_DOC = 40
+CHECKPOINTS = (50, 200, 500)
+
+
+def dir_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+async def main():
+    manifest_bytes = [0]
+    write = vs.atomic_write_bytes
+
+    def counting_write(path: Path, data: bytes):
+        if path.name == "manifest.json":
+            manifest_bytes[0] += len(data)
+        write(path, data)
+
+    vs.atomic_write_bytes = counting_write
+    embedder = HashEmbeddings()
+    service = vs.VectorStoreService()
+    service._get_embeddings = lambda: embedder
+    settings.INDEX_WAL_MAX_MB = 16
+
+    print(f"{'docs':>6} {'chunks':>8} | {'full rewrite':>14} {'WAL':>10} {'ratio':>8} | {'recovery':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        full_dir = Path(tmp) / "full"
+        for n in range(1, max(CHECKPOINTS) + 1):
+            doc_id = f"doc{n:05d}"
+            before = service._persistence.bytes_written + manifest_bytes[0]
+            await service.add_documents(make_chunks(doc_id, CHUNKS_PER_DOC), doc_metadata(doc_id, CHUNKS_PER_DOC))
+            wal_bytes = service._persistence.bytes_written + manifest_bytes[0] - before
+
+            if n in CHECKPOINTS:
+                full_dir.mkdir(exist_ok=True)
+                faiss.write_index(service._merged_index(service._gen)[0][0], str(full_dir / "index.faiss"))
+                (full_dir / "index.pkl").write_bytes(pickle.dumps(service._get_all_documents()))
+                full_bytes = dir_bytes(full_dir)
+
+                start = time.perf_counter()
+                fresh = vs.VectorStoreService()
+                fresh._get_embeddings = lambda: embedder
+                fresh.load_existing_index()
+                recovery_ms = (time.perf_counter() - start) * 1000
+                assert fresh.total_chunks == service.total_chunks
+
+                print(f"{n:>6} {service.total_chunks:>8} | {full_bytes / 1024:>11.0f} KB {wal_bytes / 1024:>7.0f} KB "
+                      f"{full_bytes / wal_bytes:>7.0f}x | {recovery_ms:>8.0f}ms  "
+                      f"(WAL {service._persistence.wal_bytes / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
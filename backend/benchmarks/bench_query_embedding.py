@@ -0,0 +1,46 @@
+"""
+Query embedding throughput: per-query encode vs LRU cache + micro-batching.
+
+Simulated MiniLM-on-CPU cost: ~4 ms fixed per forward pass plus ~0.5 ms per
+query. Concurrent callers mimic FastAPI threadpool workers. Run from backend/:
+
+    python -m benchmarks.bench_query_embedding
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import HashEmbeddings
+from app.services.query_embedder import QueryEmbedder
+
+QUERIES = 2000
+DISTINCT = 600        # repeats hit the LRU
+WORKERS = 32
+
+
+def run(label: str, embedder: QueryEmbedder, queries):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(WORKERS) as pool:
+        list(pool.map(embedder.embed, queries))
+    wall = time.perf_counter() - start
+    stats = embedder.snapshot()
+    avg_batch = stats["batched_queries"] / stats["batches"] if stats["batches"] else 1
+    print(f"{label:<22} {len(queries) / wall:8.0f} q/s   cache hits={stats['hits']:<5} avg batch={avg_batch:.1f}")
+
+
+def main():
+    rng = random.Random(0)
+    queries = [f"question number {rng.randrange(DISTINCT)}" for _ in range(QUERIES)]
+
+    def model():
+        return HashEmbeddings(cost_ms=0.5, call_overhead_ms=4.0)
+
+    run("per-query (baseline)", QueryEmbedder(model().embed_documents, 0, 1, 0), queries)
+    run("LRU only", QueryEmbedder(model().embed_documents, 2048, 1, 0), queries)
+    run("micro-batch only", QueryEmbedder(model().embed_documents, 0, 32, 3), queries)
+    run("LRU + micro-batch", QueryEmbedder(model().embed_documents, 2048, 32, 3), queries)
+
+
+if __name__ == "__main__":
+    main()
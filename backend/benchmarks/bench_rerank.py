@@ -0,0 +1,140 @@
+"""
+Reranking: prompt size and quality vs what the second stage costs.
+
+Corpus: DOCS documents of CHUNKS_PER_DOC chunks drawn from one shared
+vocabulary, each chunk carrying a few identifiers of its own; a question
+names two identifiers of its target chunk plus some of its common words.
+Retrieval is the real hybrid search over bag-of-words embeddings.
+
+sentence-transformers isn't needed: the cross-encoder is a stand-in that
+scores IDF-weighted term overlap and sleeps PAIR_MS per uncached pair
+(roughly a MiniLM-L6 cross-encoder on a few CPU cores at 256 tokens). Its
+ranking is only as good as that heuristic, so the quality column shows the
+mechanics — a real model has to be judged on real questions.
+
+Per setting, over QUESTIONS questions through RAGPipeline._prepare:
+
+  context tok   tokens of context sent to the LLM (mean)
+  target in     share of prompts containing the question's target chunk
+  prepare ms    retrieval + rerank + prompt assembly (p50), cold and with
+                the (question, chunk) score cache warm
+
+Run from backend/:
+
+    python -m benchmarks.bench_rerank [QUESTIONS]
+"""
+
+import math
+import random
+import sys
+import time
+from collections import Counter
+from typing import List, Tuple
+
+import numpy as np
+
+from benchmarks.common import BagOfWordsEmbeddings, doc_metadata
+from langchain.schema import Document
+
+from app.core.config import settings
+from app.services import token_counter
+from app.services.rag_pipeline import rag_pipeline, start_rerank_report
+from app.services.reranker import reranker
+from app.services.vector_store import vector_store_service
+import asyncio
+
+DOCS = 100
+CHUNKS_PER_DOC = 20
+WORDS_PER_CHUNK = 130
+PAIR_MS = 4.0
+COMMON = [f"term{i}" for i in range(400)]
+
+
+class OverlapCrossEncoder:
+    """CrossEncoder stand-in: IDF-weighted overlap of question and chunk terms, PAIR_MS per pair."""
+
+    def __init__(self, df: Counter, n: int):
+        self.idf = {term: math.log(n / count) for term, count in df.items()}
+        self.pairs = 0
+
+    def predict(self, pairs: List[Tuple[str, str]], batch_size: int = 32, show_progress_bar: bool = False):
+        self.pairs += len(pairs)
+        time.sleep(PAIR_MS * len(pairs) / 1000)
+        scores = []
+        for question, text in pairs:
+            terms = set(text.lower().split())
+            scores.append(sum(self.idf.get(t, 0.0) for t in set(question.lower().rstrip("?").split()) if t in terms))
+        return np.array(scores, dtype=np.float32)
+
+
+def build_corpus(rng: random.Random):
+    docs, targets = [], []
+    for d in range(DOCS):
+        chunks = []
+        for c in range(CHUNKS_PER_DOC):
+            ids = [f"id{d}x{c}x{j}" for j in range(3)]
+            words = [rng.choice(COMMON) for _ in range(WORDS_PER_CHUNK)] + ids
+            rng.shuffle(words)
+            text = " ".join(words) + "."
+            chunks.append(Document(page_content=text, metadata={
+                "doc_id": f"doc{d}", "filename": f"doc{d}.txt", "chunk_index": c, "total_chunks": CHUNKS_PER_DOC,
+            }))
+            question = " ".join(ids[:2] + rng.sample(words, 6)) + "?"
+            targets.append((question, text))
+        docs.append(chunks)
+    return docs, targets
+
+
+def run(questions, top_k: int):
+    tokens, found, latencies = [], 0, []
+    for question, target in questions:
+        start_rerank_report()
+        start = time.perf_counter()
+        prepared = rag_pipeline._prepare(question, [], top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        tokens.append(token_counter.count_tokens(prepared.inputs["context"]))
+        found += target in prepared.inputs["context"]
+    return np.mean(tokens), found / len(questions), np.percentile(latencies, 50)
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    settings.ANSWER_CACHE_ENABLED = False
+    settings.SEMANTIC_CACHE_ENABLED = False
+    embedder = BagOfWordsEmbeddings()
+    vector_store_service._get_embeddings = lambda: embedder
+
+    rng = random.Random(0)
+    docs, targets = build_corpus(rng)
+    df = Counter(t for chunks in docs for c in chunks for t in set(c.page_content.lower().rstrip(".").split()))
+    for d, chunks in enumerate(docs):
+        for c in chunks:
+            token_counter.annotate(c)
+        await vector_store_service.add_documents(chunks, doc_metadata(f"doc{d}", len(chunks)), persist=False)
+    encoder = OverlapCrossEncoder(df, DOCS * CHUNKS_PER_DOC)
+    reranker.use(encoder)
+    questions = rng.sample(targets, n)
+
+    print(f"{DOCS * CHUNKS_PER_DOC} chunks, {n} questions, stand-in cross-encoder at {PAIR_MS} ms/pair, "
+          f"RERANK_CANDIDATES={settings.RERANK_CANDIDATES}, RERANK_TOP_N={settings.RERANK_TOP_N}")
+    print(f"{'top_k':>5} {'rerank':>7} {'context tok':>12} {'saved':>6} {'target in':>10} "
+          f"{'prepare ms':>11} {'warm cache ms':>14}")
+    for top_k in (5, 10, 20):
+        settings.RERANK_ENABLED = False
+        base_tokens, base_found, base_ms = run(questions, top_k)
+        print(f"{top_k:>5} {'off':>7} {base_tokens:>12.0f} {'':>6} {base_found:>10.0%} {base_ms:>11.1f}")
+
+        settings.RERANK_ENABLED = True
+        reranker.use(encoder)   # clears the score cache
+        tokens, found, cold_ms = run(questions, top_k)
+        _, _, warm_ms = run(questions, top_k)
+        print(f"{top_k:>5} {'on':>7} {tokens:>12.0f} {1 - tokens / base_tokens:>6.0%} {found:>10.0%} "
+              f"{cold_ms:>11.1f} {warm_ms:>14.1f}")
+
+    report = start_rerank_report()
+    rag_pipeline._prepare(questions[0][0], [], 20)
+    print(f"\nper-request report (top_k=20, warm): {report}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+"""
+Semantic cache: hit rate and latency saved on a replayed query log.
+
+The log mixes exact repeats with paraphrases of a few FAQ topics, replayed
+with a Zipf-like skew. Questions are embedded with a hashed bag-of-words
+encoder (no model download), so the threshold here is lower than the
+production default tuned for MiniLM. Run from backend/:
+
+    python -m benchmarks.bench_semantic_cache
+"""
+
+import asyncio
+import random
+import time
+
+from benchmarks.common import BagOfWordsEmbeddings, StubChatModel, make_chunks, doc_metadata
+from app.core.config import settings
+from app.services.vector_store import vector_store_service
+from app.services.llm_provider import llm_provider
+from app.services.rag_pipeline import rag_pipeline
+from app.services.answer_cache import answer_cache
+from app.services.semantic_cache import semantic_cache
+
+TOPICS = [
+    ["what is the refund policy", "how does the refund policy work", "refund policy details please",
+     "explain the refund policy"],
+    ["how long is the warranty period", "what is the warranty period", "warranty period length",
+     "how long does the warranty last"],
+    ["how do I reset my password", "password reset steps", "reset password how",
+     "steps to reset my password"],
+    ["which payment methods are accepted", "accepted payment methods", "what payment methods can I use"],
+    ["where is my order shipped from", "shipping origin of my order", "where do orders ship from"],
+]
+FILLERS = ["", "please, ", "quick question: ", "can you tell me ", "hi, "]
+LOG_SIZE = 300
+
+
+def query_log(seed: int = 7):
+    rng = random.Random(seed)
+    weights = [1 / (i + 1) for i in range(len(TOPICS))]
+    return [rng.choice(FILLERS) + rng.choice(rng.choices(TOPICS, weights)[0]) + rng.choice(["?", ""])
+            for _ in range(LOG_SIZE)]
+
+
+async def replay(log, semantic: bool):
+    settings.SEMANTIC_CACHE_ENABLED = semantic
+    answer_cache.clear()
+    semantic_cache.__init__(settings.SEMANTIC_CACHE_MAX_ENTRIES, settings.SEMANTIC_CACHE_TTL_SECONDS, threshold=0.6)
+    llm_calls, start = 0, time.perf_counter()
+    for q in log:
+        _, _, tokens, _ = await rag_pipeline.aanswer(q)
+        llm_calls += tokens > 0
+    return llm_calls, (time.perf_counter() - start)
+
+
+async def main():
+    embedder = BagOfWordsEmbeddings()
+    vector_store_service._get_embeddings = lambda: embedder
+    for d in range(3):
+        await vector_store_service.add_documents(make_chunks(f"doc{d}", 40), doc_metadata(f"doc{d}", 40))
+    llm_provider.use(StubChatModel(first_token_ms=200, token_ms=0))
+
+    log = query_log()
+    for semantic in (False, True):
+        llm_calls, wall = await replay(log, semantic)
+        label = "exact + semantic" if semantic else "exact only"
+        print(f"{label:>16}: {LOG_SIZE} queries, {llm_calls} LLM calls, "
+              f"hit rate {(1 - llm_calls / LOG_SIZE):.0%}, wall {wall:.1f}s")
+    print("semantic cache:", semantic_cache.snapshot())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,148 @@
+"""
+Request payload and prompt size over a long chat: resent history vs sessions.
+
+Plays the same TURNS-turn conversation through POST /chat/ask three ways:
+
+  full history   the client resends the whole conversation_history each time
+  last 10        the previous frontend: only the last 10 messages (no memory
+                 of anything older)
+  session        session_id only; the server keeps the turns and folds the
+                 older ones into a running summary
+
+with a local stub LLM whose answers are ~ANSWER_WORDS words and whose
+summaries keep the gist of the previous summary plus the new turns. Turn 1
+states a fact (a project code name) that the last question depends on, to
+show which modes still carry it. Reports request bytes and prompt tokens
+(as assembled by the pipeline) per turn, the summarization calls the
+session made, and whether the code name reached the final prompt. Run from
+backend/:
+
+    python -m benchmarks.bench_sessions [TURNS]
+"""
+
+import asyncio
+import json
+import sys
+
+import httpx
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from benchmarks.common import HashEmbeddings, StubChatModel, make_chunks, doc_metadata
+from app.core.config import settings
+from app.services import token_counter
+from app.services.conversation_memory import conversation_memory
+from app.services.llm_provider import llm_provider
+from app.services.rag_pipeline import SYSTEM_PROMPT, rag_pipeline
+from app.services.vector_store import vector_store_service
+from main import app
+
+ANSWER_WORDS = 120
+CODE_NAME = "BLUEHERON"
+
+
+class SessionStubModel(StubChatModel):
+    """Answers with filler; a summary request gets a short digest of the transcript it was given."""
+
+    async def _agenerate(self, messages, *args, **kwargs):
+        prompt = messages[-1].content
+        if "CURRENT SUMMARY:" not in prompt:
+            return await super()._agenerate(messages, *args, **kwargs)
+        summary = prompt.split("CURRENT SUMMARY:")[1].split("NEW MESSAGES:")[0].strip()
+        summary = "" if summary == "(none yet)" else summary
+        user_lines = [line[len("User: "):] for line in prompt.splitlines() if line.startswith("User: ")]
+        digest = (summary + " Asked: " + "; ".join(user_lines)).strip()
+        message = AIMessage(content=token_counter.truncate(digest, settings.SESSION_SUMMARY_MAX_TOKENS))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def questions(turns: int):
+    qs = [f"Our project is code-named {CODE_NAME}. What does doc0 say about w17 for it?"]
+    qs += [f"And what about w{(i * 37) % 997} in doc{i % 10}, compared with w{(i * 11) % 997}?"
+           for i in range(1, turns - 1)]
+    qs.append("Remind me of our project's code name and summarize what we covered.")
+    return qs
+
+
+def prompt_tokens(inputs) -> int:
+    messages = [SYSTEM_PROMPT.format(context=inputs["context"]), inputs["question"]]
+    messages += [m.content for m in inputs["history"]]
+    return sum(token_counter.count_tokens(m) + 4 for m in messages)
+
+
+async def play(client: httpx.AsyncClient, mode: str, qs):
+    prompts = []
+    original = rag_pipeline._build_inputs
+
+    def recording(question, history, retrieved):
+        inputs, sources = original(question, history, retrieved)
+        prompts.append(inputs)
+        return inputs, sources
+
+    rag_pipeline._build_inputs = recording
+    history, sizes = [], []
+    try:
+        for q in qs:
+            body = {"question": q, "top_k": 5}
+            if mode == "session":
+                body["session_id"] = "bench-session-1"
+            elif mode == "full history":
+                body["conversation_history"] = history
+            else:
+                body["conversation_history"] = history[-10:]
+            payload = json.dumps(body).encode()
+            sizes.append(len(payload))
+            r = await client.post("/api/v1/chat/ask", content=payload, headers={"Content-Type": "application/json"})
+            r.raise_for_status()
+            history = history + [{"role": "user", "content": q}, {"role": "assistant", "content": r.json()["answer"]}]
+            await conversation_memory.drain()
+    finally:
+        rag_pipeline._build_inputs = original
+    return sizes, prompts
+
+
+async def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    settings.ANSWER_CACHE_ENABLED = False
+    embedder = HashEmbeddings()
+    vector_store_service._get_embeddings = lambda: embedder
+    for d in range(10):
+        await vector_store_service.add_documents(make_chunks(f"doc{d}", 50), doc_metadata(f"doc{d}", 50))
+
+    answer = " ".join(["The retrieved context explains this point in some detail."] * (ANSWER_WORDS // 9))
+    llm = SessionStubModel(reply=answer, first_token_ms=0, token_ms=0)
+    llm_provider.use(llm)
+    summary_calls = 0
+    original_summarize = rag_pipeline.asummarize
+
+    async def counting(summary, messages):
+        nonlocal summary_calls
+        summary_calls += 1
+        return await original_summarize(summary, messages)
+
+    rag_pipeline.asummarize = counting
+    qs = questions(turns)
+    print(f"{turns} turns, answers ~{ANSWER_WORDS} words, encoding {token_counter.encoding_name()}, "
+          f"SESSION_RECENT_MESSAGES={settings.SESSION_RECENT_MESSAGES}")
+    print(f"{'mode':>13} {'req bytes t10':>14} {'t50':>8} {'total KB':>9} "
+          f"{'prompt tok t10':>15} {'t50':>6} {'mean':>6} {'code name in last prompt':>25}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for mode in ("full history", "last 10", "session"):
+            sizes, prompts = await play(client, mode, qs)
+            tokens = [prompt_tokens(p) for p in prompts]
+            last = prompts[-1]
+            carried = any(CODE_NAME in m.content for m in last["history"])
+            print(f"{mode:>13} {sizes[9]:>14} {sizes[-1]:>8} {sum(sizes) / 1024:>9.1f} "
+                  f"{tokens[9]:>15} {tokens[-1]:>6} {sum(tokens) / len(tokens):>6.0f} {str(carried):>25}")
+
+        r = await client.get("/api/v1/chat/sessions/bench-session-1")
+        session = r.json()
+    print(f"session: {summary_calls} summarization calls, {session['summarized_messages']} messages folded, "
+          f"summary {token_counter.count_tokens(session['summary'])} tokens, "
+          f"{len(session['recent_messages'])} recent messages kept")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
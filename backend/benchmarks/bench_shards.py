@@ -0,0 +1,112 @@
+"""
+Search latency and throughput against INDEX_SHARDS.
+
+Indexes N synthetic chunks (384-d unit vectors around a few thousand topic
+centres, as in bench_ann) of FAISS_INDEX_TYPE, then for each shard count
+rebuilds the base into that many shards — the same rebalance a changed
+INDEX_SHARDS triggers — and measures dense search through
+similarity_search_batch (hybrid off, k=10):
+
+  p50/p99    one client, one query at a time
+  searches/s CLIENTS threads searching concurrently for SECONDS
+  same top-k share of queries whose results match the unsharded index
+
+Shards are searched on a thread pool sized to the machine's cores, so the
+speed-up is bounded by how many cores are free. Run from backend/:
+
+    python -m benchmarks.bench_shards [N] [flat|ivf|hnsw]
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.bench_ann import make_corpus
+from benchmarks.common import HashEmbeddings, make_chunks, doc_metadata
+from app.core.config import settings
+from app.services import ann_index
+from app.services.vector_store import vector_store_service
+
+DIM = 384
+K = 10
+CHUNKS_PER_DOC = 100
+NUM_QUERIES = 300
+CLIENTS = 8
+SECONDS = 3.0
+SHARD_COUNTS = (1, 2, 4, 8)
+
+
+def search(queries: np.ndarray):
+    return [
+        [(doc.metadata["doc_id"], doc.metadata["chunk_index"]) for doc, _ in
+         vector_store_service.similarity_search_batch(["q"], K, hybrid_weight=0.0, embeddings=[q])[0]]
+        for q in queries
+    ]
+
+
+def throughput(queries: np.ndarray) -> float:
+    stop, counts = threading.Event(), [0] * CLIENTS
+
+    def client(c: int):
+        i = c
+        while not stop.is_set():
+            vector_store_service.similarity_search_batch(["q"], K, hybrid_weight=0.0,
+                                                        embeddings=[queries[i % len(queries)]])
+            counts[c] += 1
+            i += CLIENTS
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(CLIENTS)]
+    for t in threads:
+        t.start()
+    time.sleep(SECONDS)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sum(counts) / SECONDS
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    settings.FAISS_INDEX_TYPE = sys.argv[2] if len(sys.argv) > 2 else "flat"
+    settings.INDEX_SHARDS = 1
+    embedder = HashEmbeddings()
+    vector_store_service._get_embeddings = lambda: embedder
+
+    rng = np.random.default_rng(0)
+    corpus = make_corpus(n, rng)
+    for d in range(n // CHUNKS_PER_DOC):
+        rows = corpus[d * CHUNKS_PER_DOC:(d + 1) * CHUNKS_PER_DOC]
+        await vector_store_service.add_documents(make_chunks(f"doc{d}", len(rows), words=8),
+                                                 doc_metadata(f"doc{d}", len(rows)),
+                                                 vectors=rows.tolist(), persist=False)
+    queries = corpus[rng.integers(0, n, NUM_QUERIES)] + 0.02 * rng.standard_normal((NUM_QUERIES, DIM)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    kind = ann_index.target_kind(n)
+
+    print(f"N={n}, {kind}, k={K}, {os.cpu_count()} cores, {CLIENTS} clients for throughput")
+    print(f"{'shards':>6} {'rebuild s':>10} {'p50 ms':>8} {'p99 ms':>8} {'searches/s':>11} {'same top-k':>11}")
+    reference = None
+    for count in SHARD_COUNTS:
+        settings.INDEX_SHARDS = count
+        start = time.perf_counter()
+        vector_store_service._rebuild_index(kind)
+        rebuild_s = time.perf_counter() - start
+
+        search(queries[:20])   # warm-up
+        latencies, results = [], []
+        for q in queries:
+            t = time.perf_counter()
+            results.extend(search(q[None, :]))
+            latencies.append((time.perf_counter() - t) * 1000)
+        reference = reference or results
+        same = np.mean([a == b for a, b in zip(results, reference)])
+        print(f"{count:>6} {rebuild_s:>10.1f} {np.percentile(latencies, 50):>8.2f} "
+              f"{np.percentile(latencies, 99):>8.2f} {throughput(queries):>11.0f} {same:>10.0%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""
+Time-to-first-token and event-loop concurrency for /chat/ask.
+
+The JSON path is driven through the FastAPI app in-process (httpx ASGI
+transport). httpx buffers ASGI bodies, so the streaming path is timed on
+RAGPipeline.astream_answer directly — the same generator the SSE route
+forwards. A local StubChatModel stands in for OpenAI. Run from backend/:
+
+    python -m benchmarks.bench_streaming
+"""
+
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.common import HashEmbeddings, StubChatModel, make_chunks, doc_metadata
+from app.core.config import settings
+from app.services.vector_store import vector_store_service
+from app.services.llm_provider import llm_provider
+from app.services.rag_pipeline import rag_pipeline
+from main import app
+
+CONCURRENCY = 20
+
+
+async def ask(client: httpx.AsyncClient, streaming: bool) -> dict:
+    body = {"question": "What does doc0 say about w42?", "use_streaming": streaming}
+    start = time.perf_counter()
+    if not streaming:
+        r = await client.post("/api/v1/chat/ask", json=body)
+        r.raise_for_status()
+        total = (time.perf_counter() - start) * 1000
+        return {"ttft_ms": total, "total_ms": total}
+
+    ttft = None
+    async for event, _ in rag_pipeline.astream_answer(body["question"]):
+        if ttft is None and event == "token":
+            ttft = (time.perf_counter() - start) * 1000
+    return {"ttft_ms": ttft, "total_ms": (time.perf_counter() - start) * 1000}
+
+
+async def main():
+    settings.ANSWER_CACHE_ENABLED = False   # every request must reach the LLM
+    embedder = HashEmbeddings()
+    vector_store_service._get_embeddings = lambda: embedder
+    for d in range(5):
+        await vector_store_service.add_documents(make_chunks(f"doc{d}", 40), doc_metadata(f"doc{d}", 40))
+    llm_provider.use(StubChatModel())
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for streaming in (False, True):
+            single = await ask(client, streaming)
+            start = time.perf_counter()
+            results = await asyncio.gather(*(ask(client, streaming) for _ in range(CONCURRENCY)))
+            wall = (time.perf_counter() - start) * 1000
+            mode = "stream" if streaming else "json"
+            print(f"{mode:>6}: single ttft={single['ttft_ms']:.0f}ms total={single['total_ms']:.0f}ms | "
+                  f"{CONCURRENCY} concurrent wall={wall:.0f}ms "
+                  f"max ttft={max(r['ttft_ms'] for r in results):.0f}ms")
+
+    # Baseline: the old synchronous path, serialised on one worker
+    start = time.perf_counter()
+    for _ in range(CONCURRENCY):
+        rag_pipeline.answer("What does doc0 say about w42?")
+    print(f"  sync: {CONCURRENCY} sequential answer() calls wall={(time.perf_counter() - start) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,169 @@
+"""
+Shared helpers for the offline benchmarks.
+
+Benchmarks run without network access or model downloads: they point
+FAISS_INDEX_PATH at a temporary directory and swap the HuggingFace model
+for a deterministic hash-based embedder with a tunable per-text cost.
+"""
+
+import os
+import time
+import hashlib
+import tempfile
+import threading
+import warnings
+from contextlib import contextmanager
+from typing import List
+
+import numpy as np
+
+# Must happen before anything imports app.core.config
+os.environ.setdefault("FAISS_INDEX_PATH", tempfile.mkdtemp(prefix="rag-bench-"))
+
+# Hash vectors are random, so langchain warns about out-of-range relevance scores
+warnings.filterwarnings("ignore", message="Relevance scores must be between")
+
+from langchain_core.embeddings import Embeddings  # noqa: E402
+from langchain.schema import Document  # noqa: E402
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Deterministic unit-norm vectors. Simulated encoder cost per call is
+    `call_overhead_ms + cost_ms * len(texts)`, serialised like a model that
+    already saturates the CPU.
+    """
+
+    def __init__(self, dim: int = 384, cost_ms: float = 0.0, call_overhead_ms: float = 0.0):
+        self.dim = dim
+        self.cost_ms = cost_ms
+        self.call_overhead_ms = call_overhead_ms
+        self.calls = 0
+        self.texts_embedded = 0
+        self._compute = threading.Lock()
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+        v = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return (v / np.linalg.norm(v)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        if self.cost_ms or self.call_overhead_ms:
+            with self._compute:
+                time.sleep((self.call_overhead_ms + self.cost_ms * len(texts)) / 1000)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class BagOfWordsEmbeddings(HashEmbeddings):
+    """
+    Hashed bag-of-words vectors: texts sharing words get high cosine similarity,
+    which makes them a cheap stand-in for a real sentence encoder when a
+    benchmark needs paraphrases or lexical overlap to behave plausibly.
+    """
+
+    def _vector(self, text: str) -> List[float]:
+        v = np.zeros(self.dim, dtype=np.float32)
+        for token in text.lower().replace("?", " ").replace(".", " ").replace(",", " ").split():
+            token = token.rstrip("s") if len(token) > 3 else token
+            v[int(hashlib.md5(token.encode()).hexdigest()[:8], 16) % self.dim] += 1.0
+        norm = np.linalg.norm(v)
+        return (v / norm if norm else v).tolist()
+
+
+def make_chunks(doc_id: str, n: int, words: int = 120) -> List[Document]:
+    """Synthetic chunks with the metadata DocumentProcessor would attach."""
+    return [
+        Document(
+            page_content=f"{doc_id} chunk {i} " + " ".join(f"w{(i * 7 + j) % 997}" for j in range(words)),
+            metadata={"doc_id": doc_id, "filename": f"{doc_id}.txt", "chunk_index": i, "total_chunks": n},
+        )
+        for i in range(n)
+    ]
+
+
+def doc_metadata(doc_id: str, n: int) -> dict:
+    from datetime import datetime
+    return {
+        "doc_id": doc_id,
+        "filename": f"{doc_id}.txt",
+        "file_type": "txt",
+        "num_chunks": n,
+        "upload_time": datetime.utcnow(),
+        "size_bytes": n * 800,
+    }
+
+
+@contextmanager
+def timed(label: str, results: dict):
+    start = time.perf_counter()
+    yield
+    results[label] = (time.perf_counter() - start) * 1000
+
+
+# ── Local stub LLM ───────────────────────────────────────────────────────────
+
+import asyncio  # noqa: E402
+from typing import Any, AsyncIterator, Iterator, Optional  # noqa: E402
+
+from langchain_core.language_models.chat_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult  # noqa: E402
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Stand-in for ChatOpenAI: waits `first_token_ms`, then emits the reply
+    word by word every `token_ms`. Reports fake token usage like OpenAI does.
+    """
+
+    reply: str = "This is a stubbed answer grounded in the retrieved context. " * 4
+    first_token_ms: float = 300.0
+    token_ms: float = 15.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _words(self):
+        return [w + " " for w in self.reply.split()]
+
+    def _usage(self):
+        n = len(self._words())
+        return {"input_tokens": 500, "output_tokens": n, "total_tokens": 500 + n}
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep((self.first_token_ms + self.token_ms * len(self._words())) / 1000)
+        message = AIMessage(
+            content=self.reply,
+            response_metadata={"token_usage": {"total_tokens": self._usage()["total_tokens"]}},
+            usage_metadata=self._usage(),
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep((self.first_token_ms + self.token_ms * len(self._words())) / 1000)
+        message = AIMessage(
+            content=self.reply,
+            response_metadata={"token_usage": {"total_tokens": self._usage()["total_tokens"]}},
+            usage_metadata=self._usage(),
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_ms / 1000)
+        for word in self._words():
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+            time.sleep(self.token_ms / 1000)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage()))
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.first_token_ms / 1000)
+        for word in self._words():
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+            await asyncio.sleep(self.token_ms / 1000)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage()))
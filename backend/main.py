@@ -3,14 +3,20 @@ GenAI-Powered RAG Document Q&A Chatbot
 FastAPI Backend Entry Point
 """
 
+import asyncio
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from app.api.routes import documents, chat, health
+from app.api.routes import documents, chat, health, metrics
+from app.core.metrics import MetricsMiddleware
 from app.core.config import settings
 from app.core.logger import logger
+from app.services.ingestion import ingestion_pipeline
+from app.services.reranker import reranker
+from app.services.vector_store import vector_store_service
 
 
 @asynccontextmanager
@@ -18,11 +24,22 @@ async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     logger.info("🚀 Starting RAG Chatbot API...")
     logger.info(f"   Model:       {settings.OPENAI_MODEL}")
-    logger.info(f"   Embeddings:  {settings.EMBEDDING_MODEL}")
+    logger.info(f"   Embeddings:  {settings.EMBEDDING_MODEL} ({settings.EMBEDDING_BACKEND})")
     logger.info(f"   Chunk Size:  {settings.CHUNK_SIZE}")
     logger.info(f"   Top K:       {settings.TOP_K}")
+    if settings.RERANK_ENABLED:
+        logger.info(f"   Reranker:    {settings.RERANK_MODEL} ({settings.RERANK_CANDIDATES} → {settings.RERANK_TOP_N})")
+
+    # Restore the index + warm the embedding model without delaying liveness;
+    # /api/v1/health/ready reports 503 until this finishes.
+    warmup = asyncio.create_task(vector_store_service.startup())
+    rerank_warmup = asyncio.create_task(asyncio.to_thread(reranker.warm_up)) if settings.RERANK_ENABLED else None
     yield
     logger.info("🛑 Shutting down RAG Chatbot API...")
+    warmup.cancel()
+    if rerank_warmup is not None:
+        rerank_warmup.cancel()
+    ingestion_pipeline.shutdown()
 
 
 app = FastAPI(
@@ -40,11 +57,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Routers
 app.include_router(health.router, prefix="/api/v1", tags=["Health"])
 app.include_router(documents.router, prefix="/api/v1/documents", tags=["Documents"])
 app.include_router(chat.router, prefix="/api/v1/chat", tags=["Chat"])
+app.include_router(metrics.router, prefix="/api/v1", tags=["Metrics"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+"""
+Shared fixtures. Like the benchmarks, tests run offline: every data path
+points into a temporary directory (set before app.core.config is imported),
+the LLM is the local fake provider and embeddings are hash vectors.
+"""
+
+import os
+import tempfile
+
+_DATA = tempfile.mkdtemp(prefix="rag-test-")
+os.environ["FAISS_INDEX_PATH"] = os.path.join(_DATA, "faiss_index")
+os.environ["SESSION_DB_PATH"] = os.path.join(_DATA, "sessions.sqlite")
+os.environ["BULK_INGEST_ROOT"] = os.path.join(_DATA, "imports")
+os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["LLM_FAKE_LATENCY_MS"] = "0"
+os.environ["LLM_FAKE_TOKEN_MS"] = "0"
+
+import pytest  # noqa: E402
+
+from benchmarks.common import HashEmbeddings  # noqa: E402
+from app.services.ingestion import ingestion_pipeline  # noqa: E402
+from app.services.vector_store import VectorStoreService, vector_store_service  # noqa: E402
+
+EMBEDDER = HashEmbeddings()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _shutdown_pools():
+    """The ingestion process/thread pools start on first use; stop them once at the end."""
+    yield
+    ingestion_pipeline.shutdown()
+
+
+@pytest.fixture
+def open_store(tmp_path):
+    """Factory: a vector store on tmp_path, restored from disk the way startup does it."""
+    opened = []
+
+    def open_store() -> VectorStoreService:
+        service = VectorStoreService(str(tmp_path / "index"))
+        service._get_embeddings = lambda: EMBEDDER
+        service.load_existing_index()
+        opened.append(service)
+        return service
+
+    yield open_store
+    for service in opened:
+        service._persistence.close()
+        service._chunks.close()
+
+
+@pytest.fixture
+def store(open_store) -> VectorStoreService:
+    return open_store()
+
+
+@pytest.fixture
+def app_store(tmp_path) -> VectorStoreService:
+    """The app's vector store singleton, emptied onto tmp_path; change listeners (caches) stay registered."""
+    listeners = vector_store_service._change_listeners
+    vector_store_service.__init__(str(tmp_path / "app-index"))
+    vector_store_service._change_listeners = listeners
+    vector_store_service._get_embeddings = lambda: EMBEDDER
+    vector_store_service.load_existing_index()
+    yield vector_store_service
+    vector_store_service._persistence.close()
+    vector_store_service._chunks.close()
+
@@ -0,0 +1,47 @@
+"""Answer cache: cached answers are dropped when a document they cite changes."""
+
+import pytest
+
+from benchmarks.common import doc_metadata, make_chunks
+from app.models.schemas import SourceChunk
+from app.services.answer_cache import AnswerCache, answer_cache
+from app.services.rag_pipeline import rag_pipeline
+
+pytestmark = pytest.mark.anyio
+
+QUESTION = "What does chunk 3 say about w24?"
+
+
+def _source(doc_id: str) -> SourceChunk:
+    return SourceChunk(doc_id=doc_id, filename=f"{doc_id}.txt", content="...", chunk_index=0, relevance_score=1.0)
+
+
+def test_invalidate_drops_only_entries_citing_the_doc():
+    cache = AnswerCache(max_entries=10, ttl_seconds=60)
+    cache.put("a", "answer a", [_source("doc1")])
+    cache.put("ab", "answer ab", [_source("doc1"), _source("doc2")])
+    cache.put("b", "answer b", [_source("doc2")])
+
+    assert cache.invalidate_doc("doc1") == 2
+    assert cache.get("a") is None and cache.get("ab") is None
+    assert cache.get("b").answer == "answer b"
+    assert cache.invalidate_doc("doc1") == 0
+
+
+async def test_deleting_a_doc_invalidates_its_cached_answers(app_store):
+    answer_cache.clear()
+    await app_store.add_documents(make_chunks("doc1", 20), doc_metadata("doc1", 20))
+    await app_store.add_documents(make_chunks("doc2", 20), doc_metadata("doc2", 20))
+
+    answer, sources, _, _ = rag_pipeline.answer(QUESTION)
+    hits = answer_cache.stats.hits
+    assert rag_pipeline.answer(QUESTION)[0] == answer
+    assert answer_cache.stats.hits == hits + 1
+    cited = {s.doc_id for s in sources}
+
+    for doc_id in cited:
+        assert await app_store.delete_document(doc_id)
+    assert answer_cache.snapshot()["size"] == 0
+
+    rag_pipeline.answer(QUESTION)
+    assert answer_cache.stats.hits == hits + 1   # answered afresh from what is left
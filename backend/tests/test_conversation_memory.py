@@ -0,0 +1,151 @@
+"""Chat sessions: recent turns plus a running summary, LRU-bounded, optionally persisted."""
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.models.schemas import ChatMessage
+from app.services import conversation_memory as memory_module
+from app.services.conversation_memory import SUMMARY_PREFIX, SessionStore
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch) -> SessionStore:
+    monkeypatch.setattr(settings, "SESSION_RECENT_MESSAGES", 4)
+    monkeypatch.setattr(settings, "SESSION_MAX_MESSAGES", 8)
+    monkeypatch.setattr(settings, "SESSION_DB_PATH", str(tmp_path / "sessions.sqlite"))
+    store = SessionStore()
+    yield store
+    if store._db is not None:
+        store._db.close()
+
+
+@pytest.fixture
+def summaries(monkeypatch):
+    """Stand-in summarizer: records what it was asked to fold."""
+    calls = []
+
+    async def asummarize(summary, messages):
+        calls.append([m.content for m in messages])
+        return (summary + " " if summary else "") + f"folded {len(messages)}"
+
+    monkeypatch.setattr(memory_module.rag_pipeline, "asummarize", asummarize)
+    return calls
+
+
+async def test_overflowing_turns_are_folded_into_the_summary(sessions, summaries):
+    session = sessions.create()
+    for t in range(3):
+        sessions.record(session, f"q{t}", f"a{t}")
+    await sessions.drain()
+
+    assert summaries == [["q0", "a0"]]
+    history = sessions.history(session)
+    assert history[0].role == "system"
+    assert history[0].content == SUMMARY_PREFIX + "folded 2"
+    assert [m.content for m in history[1:]] == ["q1", "a1", "q2", "a2"]
+    assert session.summarized_messages == 2
+
+
+async def test_failed_summaries_cap_the_turns_kept(sessions, monkeypatch):
+    async def failing(summary, messages):
+        raise RuntimeError("LLM down")
+
+    monkeypatch.setattr(memory_module.rag_pipeline, "asummarize", failing)
+    session = sessions.create()
+    for t in range(10):
+        sessions.record(session, f"q{t}", f"a{t}")
+        await sessions.drain()
+
+    assert session.summary == ""
+    assert len(session.turns) == settings.SESSION_MAX_MESSAGES
+    assert session.turns[-1].content == "a9"
+
+
+async def test_empty_answers_are_not_recorded(sessions):
+    session = sessions.create()
+    sessions.record(session, "q", "")
+    assert sessions.history(session) == []
+
+
+async def test_persisted_session_is_reloaded_after_eviction(sessions, summaries, monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_PERSIST", True)
+    monkeypatch.setattr(settings, "SESSION_MAX_SESSIONS", 1)
+    first = sessions.create()
+    sessions.record(first, "q0", "a0")
+    sessions.create()   # evicts the first from memory
+    assert len(sessions) == 1
+
+    restored = sessions.get(first.session_id)
+    assert restored is not first
+    assert [m.content for m in restored.turns] == ["q0", "a0"]
+
+    assert sessions.delete(first.session_id)
+    assert sessions.get(first.session_id) is None
+
+
+async def test_idle_sessions_expire(sessions, monkeypatch):
+    session = sessions.create()
+    sessions.record(session, "q", "a")
+    monkeypatch.setattr(settings, "SESSION_TTL_SECONDS", -1)
+
+    assert sessions.get(session.session_id) is None
+    assert sessions.get_or_create(session.session_id).turns == []
+
+
+async def test_unknown_session_starts_from_client_history(sessions):
+    history = [ChatMessage(role="system", content="ignore"), ChatMessage(role="user", content="q0"),
+               ChatMessage(role="assistant", content="a0")]
+    session = sessions.get_or_create("restarted", history)
+    assert [m.content for m in session.turns] == ["q0", "a0"]
+
+    sessions.record(session, "q1", "a1")
+    assert len(sessions.get_or_create("restarted", history).turns) == 4   # known: history ignored
+
+
+@pytest.fixture
+def held_summary(monkeypatch):
+    """Summarizer that waits until the test releases it."""
+    release = asyncio.Event()
+
+    async def asummarize(summary, messages):
+        await release.wait()
+        return f"folded {len(messages)}"
+
+    monkeypatch.setattr(memory_module.rag_pipeline, "asummarize", asummarize)
+    return release
+
+
+async def test_summary_for_an_evicted_session_is_dropped(sessions, held_summary, monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_MAX_SESSIONS", 1)
+    session = sessions.create()
+    for t in range(3):
+        sessions.record(session, f"q{t}", f"a{t}")
+    sessions.create()   # evicts it while the summary runs
+    held_summary.set()
+    await sessions.drain()
+
+    assert session.summary == "" and len(session.turns) == 6
+    assert sessions.get(session.session_id) is None
+
+
+async def test_summary_lands_on_the_reloaded_session(sessions, held_summary, monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_PERSIST", True)
+    monkeypatch.setattr(settings, "SESSION_MAX_SESSIONS", 1)
+    session = sessions.create()
+    for t in range(3):
+        sessions.record(session, f"q{t}", f"a{t}")
+    sessions.create()
+    reloaded = sessions.get(session.session_id)
+    sessions.record(reloaded, "q3", "a3")   # recorded on the reloaded copy meanwhile
+    held_summary.set()
+    await sessions.drain()
+
+    assert session.summary == ""
+    stored = sessions._load(session.session_id)
+    assert stored.summary.startswith("folded")
+    assert [m.content for m in stored.turns][-2:] == ["q3", "a3"]
+    assert stored.summarized_messages + len(stored.turns) == 8
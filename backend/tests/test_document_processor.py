@@ -0,0 +1,67 @@
+"""Page-by-page chunking: chunks, and their overlap, run across page boundaries."""
+
+from langchain.schema import Document
+
+from app.core.config import settings
+from app.services import document_processor
+from app.services.document_processor import DocumentProcessor
+
+PAGES = 8
+WORDS_PER_PAGE = 50   # ~330 chars: shorter than a chunk, so chunks hold several pages
+
+
+def _page_text(page: int) -> str:
+    return " ".join(f"p{page}w{j}" for j in range(WORDS_PER_PAGE))
+
+
+def _chunk_pages(monkeypatch):
+    processor = DocumentProcessor()
+    pages = [Document(page_content=_page_text(p), metadata={"page": p}) for p in range(PAGES)]
+    monkeypatch.setattr(processor, "iter_pages", lambda filepath: iter(pages))
+    return list(processor.iter_chunks("report.pdf", "doc1", "report.pdf"))
+
+
+def test_chunks_are_numbered_and_wait_for_their_total(monkeypatch):
+    chunks = _chunk_pages(monkeypatch)
+
+    assert [c.metadata["chunk_index"] for c in chunks] == list(range(len(chunks)))
+    assert all(c.metadata["total_chunks"] is None for c in chunks)
+    assert {c.metadata["doc_id"] for c in chunks} == {"doc1"}
+    assert all(len(c.page_content) <= settings.CHUNK_SIZE for c in chunks)
+
+
+def test_short_pages_share_chunks(monkeypatch):
+    chunks = _chunk_pages(monkeypatch)
+
+    assert len(chunks) < PAGES
+    assert any("p0w49\n\np1w0" in c.page_content for c in chunks)
+    # A chunk takes the metadata of the page it starts on, and no page is lost
+    for chunk in chunks:
+        assert chunk.page_content.split()[0].startswith(f"p{chunk.metadata['page']}w")
+    words = {w for c in chunks for w in c.page_content.split()}
+    assert words == {w for p in range(PAGES) for w in _page_text(p).split()}
+
+
+def test_overlap_runs_across_text_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(document_processor, "TEXT_BLOCK_CHARS", 1000)   # blocks cut words in half
+    text = " ".join(f"term{i}" for i in range(2000))
+    path = tmp_path / "notes.txt"
+    path.write_text(text)
+
+    chunks = [c.page_content for c in DocumentProcessor().iter_chunks(str(path), "doc1", "notes.txt")]
+    for boundary in range(1000, len(text), 1000):
+        assert any(text[boundary - 20:boundary + 20] in c for c in chunks), boundary
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk[:settings.CHUNK_OVERLAP // 2] in previous
+    # Words cut in half by a block edge are whole again
+    assert set(" ".join(chunks).split()) == set(text.split())
+
+
+def test_process_file_sets_total_chunks_when_streaming(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_STREAMING", True)
+    path = tmp_path / "notes.txt"
+    path.write_text("\n\n".join(_page_text(p) for p in range(PAGES)))
+
+    chunks, metadata = DocumentProcessor().process_file(str(path))
+    assert metadata["num_chunks"] == len(chunks)
+    assert {c.metadata["total_chunks"] for c in chunks} == {len(chunks)}
@@ -0,0 +1,70 @@
+"""Uploads: content that is already indexed is reported, not stored or indexed again."""
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from benchmarks.common import make_chunks
+from app.api.routes import documents
+from app.services.ingestion import ingestion_pipeline
+
+pytestmark = pytest.mark.anyio
+
+TEXT = "\n\n".join(" ".join(f"s{p}w{j}" for j in range(60)) + "." for p in range(20))
+
+
+@pytest.fixture
+async def client(app_store, tmp_path, monkeypatch):
+    monkeypatch.setattr(documents, "UPLOAD_DIR", tmp_path / "uploads")
+    app = FastAPI()
+    app.include_router(documents.router, prefix="/api/v1/documents")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def _upload(client: httpx.AsyncClient, filename: str, text: str) -> httpx.Response:
+    return await client.post("/api/v1/documents/upload", files={"file": (filename, text.encode(), "text/plain")})
+
+
+async def test_duplicate_upload_returns_the_existing_document(client, app_store, tmp_path):
+    first = await _upload(client, "notes.txt", TEXT)
+    assert first.status_code == 201
+    assert first.json()["duplicate"] is False
+    total = app_store.total_chunks
+
+    again = await _upload(client, "copy.txt", TEXT)
+    assert again.status_code == 200
+    assert again.json()["duplicate"] is True
+    assert again.json()["doc_id"] == first.json()["doc_id"]
+    assert again.json()["filename"] == "notes.txt"
+    assert app_store.total_chunks == total
+    assert len(app_store.get_all_metadata()) == 1
+    assert sorted(p.name for p in (tmp_path / "uploads").iterdir()) == ["notes.txt"]
+
+
+async def test_duplicate_under_a_stored_name_keeps_the_stored_file(client, tmp_path):
+    await _upload(client, "notes.txt", TEXT)
+    assert (await _upload(client, "notes.txt", TEXT)).json()["duplicate"] is True
+    assert (tmp_path / "uploads" / "notes.txt").read_text() == TEXT
+
+
+async def test_upload_name_is_reduced_to_its_basename(client, tmp_path):
+    response = await _upload(client, "../../other.txt", TEXT + " More.")
+    assert response.status_code == 201
+    assert response.json()["filename"] == "other.txt"
+    assert sorted(p.name for p in (tmp_path / "uploads").iterdir()) == ["other.txt"]
+
+
+async def test_repeated_chunks_are_embedded_once(app_store, monkeypatch):
+    embedded = []
+    embed_documents = app_store.embed_documents
+
+    def counting(texts):
+        embedded.extend(texts)
+        return embed_documents(texts)
+
+    monkeypatch.setattr(app_store, "embed_documents", counting)
+    chunks = make_chunks("doc", 5) + make_chunks("doc", 5)
+    vectors = await ingestion_pipeline.embed_chunks(chunks)
+    assert len(embedded) == 5
+    assert vectors[:5] == vectors[5:]
@@ -0,0 +1,74 @@
+"""Index generations: searches read one published generation while writers build the next."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from benchmarks.common import doc_metadata, make_chunks
+from app.core.config import settings
+from app.services.vector_store import VectorStoreService
+
+pytestmark = pytest.mark.anyio
+
+
+async def _add(store: VectorStoreService, doc_id: str, n: int = 20):
+    await store.add_documents(make_chunks(doc_id, n), doc_metadata(doc_id, n))
+
+
+def _ids(runs):
+    return {i for start, end in runs for i in range(start, end)}
+
+
+async def test_a_held_generation_is_unchanged_by_writes(store):
+    await _add(store, "a")
+    await _add(store, "b")
+    held = store._gen
+    a_ids = _ids(held.doc_ranges["a"])
+
+    assert await store.delete_document("a")
+    await _add(store, "c")
+    assert store._gen is not held
+
+    assert held.total == 40
+    assert set(held.doc_ranges) == {"a", "b"}
+    query = np.asarray([store.embed_query(make_chunks("a", 20)[4].page_content)], dtype=np.float32)
+    old = [vid for vid, _ in store._dense_hits(held, query, 5)[0]]
+    new = [vid for vid, _ in store._dense_hits(store._gen, query, 5)[0]]
+    assert old[0] in a_ids          # the old view still finds the deleted doc
+    assert not a_ids & set(new)     # the new one hides it
+
+
+async def test_searches_run_while_writers_publish(store, monkeypatch):
+    monkeypatch.setattr(settings, "INDEX_DELTA_MAX_VECTORS", 30)   # merge the delta into the base often
+    await _add(store, "base")
+    queries = [c.page_content for c in make_chunks("base", 20)[:5]]
+    stop = threading.Event()
+    errors, searches = [], [0]
+
+    def search():
+        while not stop.is_set():
+            try:
+                for results in store.similarity_search_batch(queries, k=5):
+                    assert results and results[0][0].metadata["doc_id"] == "base"
+                searches[0] += 1
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=search) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    try:
+        for i in range(12):
+            await _add(store, f"doc{i}", 10)
+            if i % 3 == 2:
+                assert await store.delete_document(f"doc{i - 1}")
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+    assert errors == []
+    assert searches[0] > 0
+    assert store.total_chunks == 20 + 8 * 10
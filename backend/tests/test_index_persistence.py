@@ -0,0 +1,130 @@
+"""Snapshot + WAL: replay, torn-tail truncation, and recovery of the vector store through them."""
+
+import json
+
+import pytest
+
+from benchmarks.common import doc_metadata, make_chunks
+from app.services.index_persistence import HEADER, IndexPersistence
+
+pytestmark = pytest.mark.anyio
+
+
+def _snapshot(persistence: IndexPersistence) -> int:
+    return persistence.write_snapshot(lambda directory: (directory / "manifest.json").write_text("{}"))
+
+
+def _records(n: int):
+    return [{"op": "add", "doc_id": f"doc{i}", "ids": [i]} for i in range(n)]
+
+
+def test_replay_returns_appended_records(tmp_path):
+    persistence = IndexPersistence(tmp_path)
+    _snapshot(persistence)
+    for record in _records(3):
+        persistence.append(record)
+    persistence.close()
+
+    assert list(IndexPersistence(tmp_path).replay()) == _records(3)
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    persistence = IndexPersistence(tmp_path)
+    seq = _snapshot(persistence)
+    for record in _records(2):
+        persistence.append(record)
+    persistence.close()
+    wal = persistence.wal_path(seq)
+    intact = wal.stat().st_size
+    with open(wal, "ab") as f:   # a crash mid-append: header and half a payload
+        f.write(HEADER.pack(100, 0) + b"x" * 40)
+
+    reopened = IndexPersistence(tmp_path)
+    assert list(reopened.replay()) == _records(2)
+    assert wal.stat().st_size == intact
+
+    # Appending after the truncation extends the good prefix
+    reopened.append({"op": "delete", "doc_id": "doc0", "ids": [0]})
+    reopened.close()
+    assert len(list(IndexPersistence(tmp_path).replay())) == 3
+
+
+def test_corrupt_record_stops_replay(tmp_path):
+    persistence = IndexPersistence(tmp_path)
+    seq = _snapshot(persistence)
+    for record in _records(3):
+        persistence.append(record)
+    persistence.close()
+    wal = persistence.wal_path(seq)
+    data = bytearray(wal.read_bytes())
+    first = HEADER.size + HEADER.unpack(bytes(data[:HEADER.size]))[0]
+    data[first + HEADER.size + 5] ^= 0xFF   # flip a byte in the second payload
+    wal.write_bytes(bytes(data))
+
+    assert list(IndexPersistence(tmp_path).replay()) == _records(1)
+    assert wal.stat().st_size == first
+
+
+def test_snapshot_starts_an_empty_wal(tmp_path):
+    persistence = IndexPersistence(tmp_path)
+    first = _snapshot(persistence)
+    persistence.append(_records(1)[0])
+    second = _snapshot(persistence)
+
+    assert second == first + 1
+    assert list(persistence.replay()) == []
+    assert not persistence.snapshot_dir(first).exists()
+    assert not persistence.wal_path(first).exists()
+
+
+def test_append_before_snapshot_is_an_error(tmp_path):
+    with pytest.raises(RuntimeError):
+        IndexPersistence(tmp_path).append(_records(1)[0])
+
+
+async def test_store_recovers_from_wal(open_store):
+    store = open_store()
+    for d in range(3):
+        await store.add_documents(make_chunks(f"doc{d}", 20), doc_metadata(f"doc{d}", 20))
+    assert store._persistence.wal_bytes > 0   # the first add snapshots, the rest are WAL records
+
+    reopened = open_store()
+    assert reopened.total_chunks == 60
+    assert sorted(m["doc_id"] for m in reopened.get_all_metadata()) == ["doc0", "doc1", "doc2"]
+    hits = reopened.similarity_search(make_chunks("doc1", 20)[7].page_content, k=1)
+    assert hits[0][0].metadata["doc_id"] == "doc1"
+    assert hits[0][0].metadata["chunk_index"] == 7
+
+
+async def test_store_drops_a_torn_add(open_store):
+    store = open_store()
+    for d in range(3):
+        await store.add_documents(make_chunks(f"doc{d}", 20), doc_metadata(f"doc{d}", 20))
+    wal = store._persistence.wal_path(store._persistence.current_seq())
+    store._persistence.close()
+    with open(wal, "r+b") as f:   # the last add never fully reached disk
+        f.truncate(wal.stat().st_size - 10)
+
+    reopened = open_store()
+    assert reopened.total_chunks == 40
+    assert reopened.get_document_metadata("doc2") is None
+    # Its chunk rows were committed, but not its WAL record; replay drops them
+    assert reopened._chunks.count() == 40
+    assert reopened._chunks.ids_for_doc("doc2") == []
+
+
+async def test_manifest_cache_is_written_with_snapshots_only(open_store):
+    store = open_store()
+    listed = lambda: sorted(json.loads((store._root / "manifest.json").read_text()))
+    await store.add_documents(make_chunks("doc0", 20), doc_metadata("doc0", 20))   # first snapshot
+    assert listed() == ["doc0"]
+
+    await store.add_documents(make_chunks("doc1", 20), doc_metadata("doc1", 20))
+    await store.add_documents(make_chunks("tiny", 2), doc_metadata("tiny", 2))
+    assert await store.delete_document("tiny")
+    await store.persist()
+    assert listed() == ["doc0"]   # changes since the snapshot live in the WAL only
+
+    reopened = open_store()
+    assert sorted(m["doc_id"] for m in reopened.get_all_metadata()) == ["doc0", "doc1"]
+    assert listed() == ["doc0", "doc1"]   # rewritten once after replay
@@ -0,0 +1,55 @@
+"""Sharded base index: same results as one index, across deletes and restarts."""
+
+import pytest
+
+from benchmarks.common import doc_metadata, make_chunks
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+DOCS = [f"doc{d}" for d in range(6)]
+
+
+async def _fill(store):
+    for doc_id in DOCS:
+        await store.add_documents(make_chunks(doc_id, 25), doc_metadata(doc_id, 25))
+    await store.persist()   # snapshot: delta merged into the (sharded) base
+
+
+def _top(store, queries, k=8):
+    return [[(doc.metadata["doc_id"], doc.metadata["chunk_index"]) for doc, _ in hits]
+            for hits in store.similarity_search_batch(queries, k=k, hybrid_weight=0)]
+
+
+QUERIES = [make_chunks(doc_id, 25)[i].page_content for doc_id in DOCS for i in (2, 17)]
+
+
+@pytest.mark.parametrize("shard_by", ["round_robin", "doc"])
+async def test_shards_return_the_same_hits_as_one_index(open_store, monkeypatch, shard_by):
+    single = open_store()
+    await _fill(single)
+    expected = _top(single, QUERIES)
+
+    monkeypatch.setattr(settings, "INDEX_SHARDS", 4)
+    monkeypatch.setattr(settings, "INDEX_SHARD_BY", shard_by)
+    sharded = open_store()   # a changed shard count rebuilds the base into the new layout
+    assert sharded.num_shards == 4
+    assert sum(shard.ntotal for shard in sharded._gen.shards) == 150
+    assert _top(sharded, QUERIES) == expected
+
+
+@pytest.mark.parametrize("shard_by", ["round_robin", "doc"])
+async def test_sharded_delete_survives_restart(open_store, monkeypatch, shard_by):
+    monkeypatch.setattr(settings, "INDEX_SHARDS", 3)
+    monkeypatch.setattr(settings, "INDEX_SHARD_BY", shard_by)
+    store = open_store()
+    await _fill(store)
+    assert await store.delete_document("doc2")
+    await store.persist()
+
+    reopened = open_store()
+    assert reopened.num_shards == 3
+    assert reopened.total_chunks == 125
+    hits = _top(reopened, [make_chunks("doc2", 25)[5].page_content], k=20)[0]
+    assert "doc2" not in {doc_id for doc_id, _ in hits}
+    assert _top(reopened, [make_chunks("doc4", 25)[5].page_content])[0][0] == ("doc4", 5)
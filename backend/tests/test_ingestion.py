@@ -0,0 +1,134 @@
+"""
+Ingestion: embedding batches across the embed pool, and streaming, where
+batches are indexed as they are embedded and the doc's chunk count fixed up.
+"""
+
+import random
+import threading
+import time
+
+import pytest
+
+from benchmarks.common import HashEmbeddings, doc_metadata, make_chunks
+from app.core.config import settings
+from app.services.ingestion import ingestion_pipeline
+from app.services.vector_store import VectorStoreService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def big_file(tmp_path):
+    """~200 KB of text: several parse blocks and well over one embed batch of chunks."""
+    path = tmp_path / "big.txt"
+    path.write_text("\n\n".join(" ".join(f"s{p}w{j}" for j in range(120)) + "." for p in range(220)))
+    return path
+
+
+def _reopen(store: VectorStoreService) -> VectorStoreService:
+    service = VectorStoreService(str(store._root))
+    embedder = HashEmbeddings()
+    service._get_embeddings = lambda: embedder
+    service.load_existing_index()
+    return service
+
+
+def _assert_finalized(store: VectorStoreService, doc_id: str, num_chunks: int):
+    ids = store._chunks.ids_for_doc(doc_id)
+    chunks = store._chunks.get_many(ids)
+    assert len(ids) == num_chunks
+    assert [chunks[vid].metadata["chunk_index"] for vid in ids] == list(range(num_chunks))
+    assert {c.metadata["total_chunks"] for c in chunks.values()} == {num_chunks}
+    assert store.get_document_metadata(doc_id)["num_chunks"] == num_chunks
+
+
+async def test_embedding_keeps_chunk_order_across_workers(app_store, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_EMBED_BATCH_SIZE", 7)
+    monkeypatch.setattr(settings, "INGEST_EMBED_WORKERS", 4)
+    embed_documents = app_store.embed_documents
+
+    def jittered(texts):   # batches finish out of order
+        time.sleep(random.uniform(0, 0.01))
+        return embed_documents(texts)
+
+    monkeypatch.setattr(app_store, "embed_documents", jittered)
+    chunks = make_chunks("doc", 100)
+    vectors = await ingestion_pipeline.embed_chunks(chunks)
+    assert vectors == embed_documents([c.page_content for c in chunks])
+
+
+async def test_vector_lookup_runs_off_the_event_loop(app_store, monkeypatch):
+    lookup_vectors = app_store.lookup_vectors
+    threads = []
+
+    def recording(hashes):
+        threads.append(threading.get_ident())
+        return lookup_vectors(hashes)
+
+    monkeypatch.setattr(app_store, "lookup_vectors", recording)
+    await ingestion_pipeline.embed_chunks(make_chunks("doc", 3))
+    assert threads and threads[0] != threading.get_ident()
+
+
+async def test_staged_and_streamed_ingestion_index_the_same_chunks(open_store, big_file, monkeypatch):
+    indexed = {}
+    for streaming in (False, True):
+        monkeypatch.setattr(settings, "INGEST_STREAMING", streaming)
+        store = open_store()
+        monkeypatch.setattr("app.services.ingestion.vector_store_service", store)
+        metadata = await ingestion_pipeline.ingest_file(str(big_file))
+        chunks = store._chunks.get_many(store._chunks.ids_for_doc(metadata["doc_id"]))
+        indexed[streaming] = [(c.metadata["chunk_index"], c.page_content) for c in chunks.values()]
+        assert await store.delete_document(metadata["doc_id"])
+
+    assert sorted(indexed[False]) == sorted(indexed[True])
+
+
+async def test_append_then_finalize_survives_restart(store):
+    chunks = make_chunks("doc", 30)
+    for c in chunks:
+        c.metadata["total_chunks"] = None
+    metadata = doc_metadata("doc", 0)
+    for start in range(0, 30, 10):
+        await store.add_documents(chunks[start:start + 10], {**metadata, "num_chunks": start + 10},
+                                  persist=False, append=start > 0)
+    assert store.total_chunks == 30
+    assert store._gen.doc_ranges["doc"] == [(0, 30)]
+
+    await store.finalize_document({**metadata, "num_chunks": 30})
+    _assert_finalized(store, "doc", 30)
+    _assert_finalized(_reopen(store), "doc", 30)
+
+
+async def test_streamed_upload_sets_total_chunks(app_store, big_file, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_STREAMING", True)
+    metadata = await ingestion_pipeline.ingest_file(str(big_file))
+
+    assert metadata["num_chunks"] > settings.INGEST_EMBED_BATCH_SIZE
+    assert app_store.total_chunks == metadata["num_chunks"]
+    _assert_finalized(app_store, metadata["doc_id"], metadata["num_chunks"])
+    _assert_finalized(_reopen(app_store), metadata["doc_id"], metadata["num_chunks"])
+
+
+async def test_failed_stream_leaves_nothing_indexed(app_store, big_file, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_STREAMING", True)
+    embed_chunks = ingestion_pipeline.embed_chunks
+    calls = 0
+
+    async def failing(chunks):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise RuntimeError("embedder failed")
+        return await embed_chunks(chunks)
+
+    monkeypatch.setattr(ingestion_pipeline, "embed_chunks", failing)
+    with pytest.raises(RuntimeError):
+        await ingestion_pipeline.ingest_file(str(big_file))
+    assert app_store.get_all_metadata() == []
+    assert app_store.total_chunks == 0
+    assert app_store._chunks.count() == 0
+
+    monkeypatch.setattr(ingestion_pipeline, "embed_chunks", embed_chunks)
+    metadata = await ingestion_pipeline.ingest_file(str(big_file))
+    _assert_finalized(app_store, metadata["doc_id"], metadata["num_chunks"])
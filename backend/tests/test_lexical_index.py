@@ -0,0 +1,127 @@
+"""BM25 index: published views, segment merges and compaction, and saving without blocking searches."""
+
+import pickle
+import threading
+
+import pytest
+
+from app.services import lexical_index
+from app.services.lexical_index import MAX_SEGMENTS, LexicalIndex, LexicalView
+
+QUERIES = ["err-4021 timeout", "net.ipv4.tcp_syn_retries", "alpha beta", "w7 w13"]
+
+
+def _text(vid: int) -> str:
+    words = " ".join(f"w{(vid * 7 + j) % 50}" for j in range(vid % 9 + 3))
+    extra = "ERR-4021 timeout" if vid % 5 == 0 else "net.ipv4.tcp_syn_retries" if vid % 7 == 0 else "alpha"
+    return f"{words} {extra} beta"
+
+
+def _fresh(vids):
+    index = LexicalIndex()
+    index.add(vids, [_text(v) for v in vids])
+    return index
+
+
+def _results(index: LexicalIndex, k: int = 10):
+    return [[(vid, round(score, 6)) for vid, score in index.search(q, k)] for q in QUERIES]
+
+
+def test_merged_and_compacted_index_scores_like_a_fresh_one():
+    index = LexicalIndex()
+    live = set()
+    for batch in range(3 * MAX_SEGMENTS):
+        vids = list(range(batch * 10, batch * 10 + 10))
+        index.add(vids, [_text(v) for v in vids])
+        live.update(vids)
+        if batch % 4 == 3:
+            dead = [v for v in sorted(live) if v % 3 == batch % 3][:6]
+            index.remove(dead)
+            live.difference_update(dead)
+        assert len(index._view.segments) <= MAX_SEGMENTS
+
+    assert index.num_docs == len(live)
+    assert _results(index) == _results(_fresh(sorted(live)))
+
+
+def test_a_held_view_is_unchanged_by_writes():
+    index = _fresh(range(100))
+    held = index._view
+    before = [lexical_index._search(held, set(lexical_index.tokenize(q)), 10, None) for q in QUERIES]
+
+    index.remove(range(0, 100, 2))
+    index.add(range(100, 200), [_text(v) for v in range(100, 200)])
+    index.compact()
+
+    assert index._view is not held
+    after = [lexical_index._search(held, set(lexical_index.tokenize(q)), 10, None) for q in QUERIES]
+    assert after == before
+    assert held.num_docs == 100
+
+
+def test_save_does_not_block_searches(tmp_path, monkeypatch):
+    index = _fresh(range(200))
+    index.remove(range(0, 200, 3))   # save() compacts first
+    dumping, release = threading.Event(), threading.Event()
+    dump = pickle.dump
+
+    def slow_dump(obj, f, **kwargs):
+        dumping.set()
+        release.wait(5)
+        dump(obj, f, **kwargs)
+
+    monkeypatch.setattr(lexical_index.pickle, "dump", slow_dump)
+    saver = threading.Thread(target=index.save, args=(tmp_path / "bm25.pkl",))
+    saver.start()
+    try:
+        assert dumping.wait(5)
+        assert not index._lock.locked()
+        assert index.search("alpha", 5)
+        index.add([500], [_text(500)])   # writers don't wait for the dump either
+    finally:
+        release.set()
+        saver.join()
+
+    loaded = LexicalIndex.load(tmp_path / "bm25.pkl")
+    assert isinstance(loaded._view, LexicalView)
+    assert len(loaded._view.segments) == 1
+    assert _results(loaded) == _results(_fresh([v for v in range(200) if v % 3]))
+
+
+def test_loads_the_array_backed_layout(tmp_path):
+    from array import array
+
+    index = _fresh(range(50))
+    view = index._view
+    postings = {}
+    for segment in view.segments:
+        for term in segment.terms:
+            ids, tf = segment.postings(term)
+            postings.setdefault(term, (array("I"), array("H")))
+            postings[term][0].extend(ids.tolist())
+            postings[term][1].extend(tf.tolist())
+    terms = list(postings)
+    legacy = {
+        "_term_ids": {term: i for i, term in enumerate(terms)},
+        "_post_ids": [postings[t][0] for t in terms],
+        "_post_tf": [postings[t][1] for t in terms],
+        "_doc_len": array("I", view.doc_len.tolist()),
+        "_num_docs": view.num_docs,
+        "_total_len": view.total_len,
+        "_deleted_since_compact": 0,
+        "_indexed_since_compact": view.num_docs,
+    }
+    with open(tmp_path / "bm25.pkl", "wb") as f:
+        pickle.dump(legacy, f)
+
+    loaded = LexicalIndex.load(tmp_path / "bm25.pkl")
+    assert _results(loaded) == _results(index)
+    loaded.add([50], [_text(50)])
+    assert loaded.num_docs == 51
+
+
+@pytest.mark.parametrize("vids", [[5, 3, 5], [0]])
+def test_duplicate_ids_in_one_add_are_indexed_once(vids):
+    index = LexicalIndex()
+    index.add(vids, [_text(v) for v in vids])
+    assert index.num_docs == len(set(vids))
@@ -0,0 +1,241 @@
+"""LLM provider: breaker transitions, and which errors are retried and counted."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.fake_llm import FakeProviderError
+from app.services.llm_provider import (
+    CircuitBreaker,
+    LLMProvider,
+    LLMTimeoutError,
+    LLMUnavailableError,
+    is_transient,
+)
+
+pytestmark = pytest.mark.anyio
+
+RESET_SECONDS = 0.05
+
+
+@pytest.fixture(autouse=True)
+def _fast_breaker(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_FAILURES", 3)
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_RESET_SECONDS", RESET_SECONDS)
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 2)
+    monkeypatch.setattr(settings, "LLM_RETRY_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(settings, "LLM_HEDGE_AFTER_MS", 0)
+
+
+class HangingModel:
+    """Never answers until cancelled; a stream yields one chunk, then hangs."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages):
+        raise KeyboardInterrupt   # the sync path's "cancellation": a BaseException mid-call
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await asyncio.Event().wait()
+
+    async def astream(self, messages):
+        self.calls += 1
+        yield "first"
+        await asyncio.Event().wait()
+
+
+class FailingModel:
+    """Raises `error` on every call; counts the calls that reached it."""
+
+    def __init__(self, error: Exception):
+        self.error = error
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        raise self.error
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        raise self.error
+
+
+def _opened_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker()
+    for _ in range(settings.LLM_CIRCUIT_FAILURES):
+        breaker.before_call()
+        opened = breaker.record_failure()
+    assert opened
+    return breaker
+
+
+# ── Breaker ──────────────────────────────────────────────────────────────────
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker()
+    for _ in range(settings.LLM_CIRCUIT_FAILURES - 1):
+        assert not breaker.record_failure()
+    assert breaker.state == "closed"
+
+    assert breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(LLMUnavailableError):
+        breaker.before_call()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker()
+    for _ in range(settings.LLM_CIRCUIT_FAILURES - 1):
+        breaker.record_failure()
+    breaker.record_success()
+    assert not breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_admits_a_single_trial():
+    breaker = _opened_breaker()
+    time.sleep(RESET_SECONDS * 2)
+    assert breaker.state == "half_open"
+
+    breaker.before_call()
+    with pytest.raises(LLMUnavailableError):
+        breaker.before_call()
+
+
+def test_successful_trial_closes_the_circuit():
+    breaker = _opened_breaker()
+    time.sleep(RESET_SECONDS * 2)
+    breaker.before_call()
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    breaker.before_call()
+    breaker.before_call()
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = _opened_breaker()
+    time.sleep(RESET_SECONDS * 2)
+    breaker.before_call()
+
+    assert breaker.record_failure()   # one failure is enough while half-open
+    assert breaker.state == "open"
+    with pytest.raises(LLMUnavailableError):
+        breaker.before_call()
+
+
+def test_released_trial_lets_the_next_call_try():
+    breaker = _opened_breaker()
+    time.sleep(RESET_SECONDS * 2)
+    assert breaker.before_call()
+    breaker.release_trial()
+
+    assert breaker.state == "half_open"
+    assert breaker.before_call()
+
+
+# ── Error classification ─────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("error, transient", [
+    (LLMTimeoutError("deadline"), True),
+    (asyncio.TimeoutError(), True),
+    (ConnectionResetError(), True),
+    (FakeProviderError("overloaded", 503), True),
+    (FakeProviderError("rate limited", 429), True),
+    (FakeProviderError("timeout", 408), True),
+    (FakeProviderError("bad request", 400), False),
+    (FakeProviderError("unauthorized", 401), False),
+    (LLMUnavailableError("open"), False),
+    (TypeError("bug on our side"), False),
+    (ValueError("unparseable"), False),
+])
+def test_is_transient(error, transient):
+    assert is_transient(error) is transient
+
+
+# ── Provider ─────────────────────────────────────────────────────────────────
+
+def test_non_transient_error_is_raised_at_once():
+    provider = LLMProvider()
+    model = FailingModel(FakeProviderError("bad request", 400))
+    provider.use(model)
+
+    for _ in range(settings.LLM_CIRCUIT_FAILURES + 1):
+        with pytest.raises(FakeProviderError):
+            provider.invoke([])
+    assert model.calls == settings.LLM_CIRCUIT_FAILURES + 1   # never retried
+    assert provider.stats.retries == 0
+    assert provider._breaker.state == "closed"                # and never counted
+
+
+def test_transient_error_is_retried_then_raised():
+    provider = LLMProvider()
+    model = FailingModel(FakeProviderError("overloaded", 503))
+    provider.use(model)
+
+    with pytest.raises(FakeProviderError):
+        provider.invoke([])
+    assert model.calls == settings.LLM_MAX_RETRIES + 1
+    assert provider.stats.retries == settings.LLM_MAX_RETRIES
+    assert provider.stats.failures == 1
+    assert provider._breaker.state == "open"   # 3 counted attempts reach LLM_CIRCUIT_FAILURES
+
+
+async def test_open_circuit_short_circuits_calls():
+    provider = LLMProvider()
+    model = FailingModel(FakeProviderError("overloaded", 503))
+    provider.use(model)
+
+    with pytest.raises(FakeProviderError):
+        await provider.ainvoke([])
+    calls = model.calls
+    with pytest.raises(LLMUnavailableError):
+        await provider.ainvoke([])
+    assert model.calls == calls
+    assert provider.stats.short_circuited == 1
+    assert provider.stats.circuit_opens == 1
+
+
+def _half_open_provider(model) -> LLMProvider:
+    provider = LLMProvider()
+    provider.use(model)
+    for _ in range(settings.LLM_CIRCUIT_FAILURES):
+        provider._breaker.record_failure()
+    time.sleep(RESET_SECONDS * 2)
+    assert provider._breaker.state == "half_open"
+    return provider
+
+
+async def test_cancelled_trial_does_not_wedge_the_breaker():
+    provider = _half_open_provider(HangingModel())
+    trial = asyncio.ensure_future(provider.ainvoke([]))
+    await asyncio.sleep(0.01)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+
+    # Still half-open, and the next call gets to be the trial
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(provider.ainvoke([]), 0.05)
+    assert provider._breaker.state == "half_open"
+    assert provider.stats.short_circuited == 0
+
+
+async def test_abandoned_stream_releases_the_trial():
+    provider = _half_open_provider(HangingModel())
+    stream = provider.astream([])
+    assert await stream.__anext__() == "first"
+    await stream.aclose()   # the SSE client disconnected: GeneratorExit at the yield
+
+    provider._breaker.before_call()   # the slot is free again
+
+
+def test_interrupted_sync_trial_releases_the_trial():
+    provider = _half_open_provider(HangingModel())
+    with pytest.raises(KeyboardInterrupt):
+        provider.invoke([])
+    assert provider._breaker.before_call()
@@ -0,0 +1,75 @@
+"""Prompt packing: system prompt, history, question and context stay within PROMPT_TOKEN_BUDGET."""
+
+import pytest
+from langchain.schema import Document
+
+from app.core.config import settings
+from app.models.schemas import ChatMessage
+from app.services import token_counter
+from app.services.rag_pipeline import MESSAGE_OVERHEAD_TOKENS, RAGPipeline
+
+QUESTION = "What do the reports say about the budget?"
+
+
+@pytest.fixture
+def pipeline(monkeypatch) -> RAGPipeline:
+    monkeypatch.setattr(settings, "PROMPT_TOKEN_BUDGET", 1200)
+    monkeypatch.setattr(settings, "HISTORY_TOKEN_BUDGET", 300)
+    return RAGPipeline()
+
+
+def _retrieved(n: int, sentences: int = 40):
+    docs = []
+    for i in range(n):
+        text = " ".join(f"Report {i} sentence {s} covers the budget in some detail." for s in range(sentences))
+        docs.append((Document(page_content=text, metadata={"doc_id": f"doc{i}", "filename": f"r{i}.txt",
+                                                           "chunk_index": 0}), 1.0 - i / 100))
+    return docs
+
+
+def _prompt_tokens(pipeline: RAGPipeline, inputs) -> int:
+    messages = pipeline._prompt.format_messages(**inputs)
+    return sum(token_counter.count_tokens(m.content) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def _history(turns: int):
+    return [ChatMessage(role="user" if t % 2 == 0 else "assistant", content=f"Turn {t}: " + "words " * 60)
+            for t in range(turns)]
+
+
+def test_context_is_packed_within_the_budget(pipeline):
+    retrieved = _retrieved(10)
+    inputs, sources = pipeline._build_inputs(QUESTION, _history(6), retrieved, log=False)
+
+    assert _prompt_tokens(pipeline, inputs) <= settings.PROMPT_TOKEN_BUDGET
+    assert 0 < len(sources) < len(retrieved)
+    # Only chunks that reached the context are cited, best first
+    assert inputs["context"].count("Source ") == len(sources)
+    assert [s.doc_id for s in sources] == [f"doc{i}" for i in range(len(sources))]
+
+
+def test_chunk_that_does_not_fit_is_shortened_at_a_sentence(pipeline):
+    retrieved = _retrieved(1, sentences=200)
+    inputs, sources = pipeline._build_inputs(QUESTION, [], retrieved, log=False)
+
+    assert len(sources) == 1
+    assert len(inputs["context"]) < len(retrieved[0][0].page_content)
+    assert inputs["context"].rstrip(" …").endswith("detail.")
+    assert _prompt_tokens(pipeline, inputs) <= settings.PROMPT_TOKEN_BUDGET
+
+
+def test_chunk_is_skipped_when_too_little_room_is_left(pipeline, monkeypatch):
+    monkeypatch.setattr(settings, "CONTEXT_MIN_CHUNK_TOKENS", settings.PROMPT_TOKEN_BUDGET)
+    inputs, sources = pipeline._build_inputs(QUESTION, [], _retrieved(1, sentences=200), log=False)
+    assert sources == []
+    assert inputs["context"] == ""
+
+
+def test_oldest_history_is_dropped_past_its_budget(pipeline):
+    inputs, _ = pipeline._build_inputs(QUESTION, _history(6), [], log=False)
+    history = [m.content for m in inputs["history"]]
+
+    assert 0 < len(history) < 6
+    assert history[-1].startswith("Turn 5:")
+    kept = sum(token_counter.count_tokens(c) + MESSAGE_OVERHEAD_TOKENS for c in history)
+    assert kept <= settings.HISTORY_TOKEN_BUDGET
@@ -0,0 +1,145 @@
+"""Vector store: deletes by ID, and the index and chunk store agreeing across restarts."""
+
+import pytest
+
+from benchmarks.common import doc_metadata, make_chunks
+from app.core.config import settings
+from app.services import ann_index
+from app.services.vector_store import VectorStoreService
+
+pytestmark = pytest.mark.anyio
+
+
+async def _add(store: VectorStoreService, doc_id: str, n: int = 20):
+    await store.add_documents(make_chunks(doc_id, n), doc_metadata(doc_id, n))
+
+
+def _consistent(store: VectorStoreService):
+    """Index, chunk rows and manifest describe the same documents."""
+    assert store._chunks.count() == store.total_chunks
+    assert set(store._chunks.doc_ranges()) == set(store._manifest)
+    assert set(store._gen.doc_ranges) == set(store._manifest)
+
+
+def _searched_docs(store: VectorStoreService, doc_id: str):
+    query = make_chunks(doc_id, 20)[3].page_content
+    return {doc.metadata["doc_id"] for doc, _ in store.similarity_search(query, k=10)}
+
+
+async def test_delete_survives_restart(open_store):
+    store = open_store()
+    for doc_id in ("keep", "drop", "other"):
+        await _add(store, doc_id)
+
+    assert await store.delete_document("drop")
+    assert "drop" not in _searched_docs(store, "drop")
+    _consistent(store)
+
+    reopened = open_store()
+    assert reopened.get_document_metadata("drop") is None
+    assert reopened.total_chunks == 40
+    assert "drop" not in _searched_docs(reopened, "drop")
+    assert _searched_docs(reopened, "keep") >= {"keep"}
+    _consistent(reopened)
+
+
+async def test_delete_after_restart(open_store):
+    store = open_store()
+    await _add(store, "a")
+    await _add(store, "b")
+
+    reopened = open_store()
+    assert await reopened.delete_document("a")
+    assert not await reopened.delete_document("a")
+    _consistent(reopened)
+
+    again = open_store()
+    assert [m["doc_id"] for m in again.get_all_metadata()] == ["b"]
+    _consistent(again)
+
+
+async def test_crash_after_logging_a_delete(open_store, monkeypatch):
+    store = open_store()
+    await _add(store, "a")
+    await _add(store, "b")
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("killed before the chunk rows were removed")
+
+    monkeypatch.setattr(store, "_apply_delete", crash)
+    with pytest.raises(RuntimeError):
+        await store.delete_document("a")
+    assert store._chunks.ids_for_doc("a")   # rows still there; the WAL already has the delete
+
+    reopened = open_store()
+    assert reopened.get_document_metadata("a") is None
+    assert reopened._chunks.ids_for_doc("a") == []
+    assert reopened.total_chunks == 20
+    _consistent(reopened)
+
+
+async def test_crash_after_logging_a_reindex(open_store, monkeypatch):
+    store = open_store()
+    await _add(store, "a", 20)
+    await _add(store, "b", 20)
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("killed before the old chunk rows were replaced")
+
+    monkeypatch.setattr(store, "_apply_add", crash)
+    with pytest.raises(RuntimeError):
+        await _add(store, "a", 5)
+    assert len(store._chunks.ids_for_doc("a")) == 20   # nothing applied; the WAL already has the add
+
+    reopened = open_store()
+    assert reopened.get_document_metadata("a")["num_chunks"] == 5
+    assert len(reopened._chunks.ids_for_doc("a")) == 5
+    assert reopened.total_chunks == 25
+    assert _searched_docs(reopened, "a") >= {"a"}
+    _consistent(reopened)
+
+
+async def test_reindexing_a_doc_replaces_its_chunks(open_store):
+    store = open_store()
+    await _add(store, "a", 20)
+    await _add(store, "a", 5)
+
+    assert store.total_chunks == 5
+    _consistent(store)
+    reopened = open_store()
+    assert reopened.total_chunks == 5
+    assert reopened.get_document_metadata("a")["num_chunks"] == 5
+    _consistent(reopened)
+
+
+async def test_deleting_the_last_doc_empties_the_index(open_store):
+    store = open_store()
+    await _add(store, "only")
+    assert await store.delete_document("only")
+    assert store.total_chunks == 0
+
+    reopened = open_store()
+    assert reopened.total_chunks == 0
+    assert reopened.get_all_metadata() == []
+    assert reopened._chunks.count() == 0
+
+
+@pytest.mark.parametrize("mmap_flag", [ann_index.MMAP_FLAG, None], ids=["installed-faiss", "no-mmap-flag"])
+async def test_default_mmap_snapshots_round_trip(open_store, monkeypatch, mmap_flag):
+    # faiss-cpu 1.8.0 (the pinned wheel) has no IO_FLAG_MMAP_IFC: snapshots must load into RAM
+    monkeypatch.setattr(ann_index, "MMAP_FLAG", mmap_flag)
+    assert settings.INDEX_MMAP
+    store = open_store()
+    await _add(store, "a")
+    await store.persist()
+    await _add(store, "b")
+    await store.persist()
+    assert store._gen.base_mmapped == (mmap_flag is not None)
+    assert _searched_docs(store, "a") >= {"a"}
+
+    reopened = open_store()
+    assert reopened.total_chunks == 40
+    assert reopened._gen.base_mmapped == (mmap_flag is not None)
+    assert _searched_docs(reopened, "b") >= {"b"}
+    assert await reopened.delete_document("a")
+    _consistent(reopened)
@@ -63,6 +63,10 @@ export default function DocumentPanel({ documents, onDocumentsChange }) {
     for (const file of accepted) {
       try {
         const doc = await uploadDocument(file, setProgress)
+        if (doc.duplicate) {
+          notify(`"${file.name}" is already indexed as "${doc.filename}"`)
+          continue
+        }
         onDocumentsChange(prev => [...prev, doc])
         notify(`"${file.name}" indexed — ${doc.num_chunks} chunks ready`)
       } catch (err) {
@@ -1,11 +1,32 @@
 import { useState, useRef, useCallback } from 'react';
-import { askQuestion, getHealth } from '../utils/api';
+import { askQuestion, deleteSession, getHealth } from '../utils/api';
+
+// crypto.randomUUID only exists in secure contexts (HTTPS, localhost);
+// getRandomValues works everywhere, so build the v4 UUID from it otherwise.
+const newSessionId = () => {
+  if (typeof crypto.randomUUID === 'function') return crypto.randomUUID();
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  bytes[6] = (bytes[6] & 0x0f) | 0x40;
+  bytes[8] = (bytes[8] & 0x3f) | 0x80;
+  const hex = Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+  return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+};
+
+// Sent with every question so a server that has lost the session (restart,
+// another worker) can pick up from the last few turns instead of nothing.
+const FALLBACK_HISTORY_MESSAGES = 6;
+
+const recentHistory = (messages) => messages
+  .filter(m => !m.isTyping && !m.isError && m.content)
+  .slice(-FALLBACK_HISTORY_MESSAGES)
+  .map(({ role, content }) => ({ role, content }));
 
 export function useChat() {
   const [messages, setMessages] = useState([]);
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [health, setHealth] = useState(null);
+  const sessionId = useRef(newSessionId());
   
   const refreshHealth = async () => {
     try {
@@ -16,13 +37,18 @@ export function useChat() {
     }
   };
 
-  const clearChat = useCallback(() => setMessages([]), []);
+  const clearChat = useCallback(() => {
+    deleteSession(sessionId.current).catch(() => {});
+    sessionId.current = newSessionId();
+    setMessages([]);
+  }, []);
 
   const sendMessage = useCallback(async (questionText) => {
     const q = (questionText ?? input).trim();
     if (!q || isLoading) return;
 
     setInput('');
+    const history = recentHistory(messages);
     // Optimistically add user message
     setMessages(prev => [...prev, { role: 'user', content: q }]);
     setIsLoading(true);
@@ -31,13 +57,7 @@ export function useChat() {
     setMessages(prev => [...prev, { role: 'assistant', content: '', isTyping: true }]);
 
     try {
-      // Prepare history for API (exclude typing indicators)
-      const history = messages
-        .filter(m => !m.isTyping)
-        .slice(-10)
-        .map(m => ({ role: m.role, content: m.content }));
-
-      const res = await askQuestion(q, history);
+      const res = await askQuestion(q, sessionId.current, history);
 
       setMessages(prev => {
         const withoutTyping = prev.filter(m => !m.isTyping);
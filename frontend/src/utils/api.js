@@ -37,15 +37,22 @@ export const deleteDocument = async (docId) => {
 
 // ── Chat ─────────────────────────────────────────────────────────────────────
 
-export const askQuestion = async (question, history = [], topK = 5) => {
+// History lives server-side under sessionId; `history` (the last few turns)
+// only seeds the session if the server has lost it
+export const askQuestion = async (question, sessionId, history = [], topK = 5) => {
   const { data } = await api.post('/chat/ask', {
     question,
+    session_id: sessionId,
     conversation_history: history,
     top_k: topK,
   })
   return data
 }
 
+export const deleteSession = async (sessionId) => {
+  await api.delete(`/chat/sessions/${sessionId}`)
+}
+
 // ── Health ───────────────────────────────────────────────────────────────────
 
 export const getHealth = async () => {